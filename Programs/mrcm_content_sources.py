@@ -0,0 +1,175 @@
+import codecs
+import hashlib
+import mmap
+import os
+import re
+import threading
+import zipfile
+
+# Bytes read per chunk from a zip member or a Drive download
+CHUNK_SIZE = 1024 * 1024
+
+# Notion export file names end with the page id: "Component Name 0123456789abcdef0123456789abcdef.md"
+NOTION_ID_SUFFIX = re.compile(r'\s+[0-9a-f]{32}$')
+
+def extract_file_id_from_url(url):
+    """
+    Extracts the file ID from a Google Drive link.
+    """
+    if 'id=' in url:
+        return url.split('id=')[1].split('&')[0]
+    return None
+
+def content_stem(file_name):
+    """
+    Returns the lookup key of an exported file: its base name without extension or Notion page id, lowercase.
+    """
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    return NOTION_ID_SUFFIX.sub('', stem).strip().lower()
+
+class HashingSink:
+    """
+    Write target that hashes and decodes the bytes as they arrive. The incremental decoder carries a
+    multi-byte character split across two chunks over to the next write.
+    """
+
+    def __init__(self):
+        self.sha256 = hashlib.sha256()
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.parts = []
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.parts.append(self.decoder.decode(data))
+        return len(data)
+
+    def result(self):
+        """
+        Returns (content, comp_key).
+        """
+        self.parts.append(self.decoder.decode(b'', final=True))
+        return ''.join(self.parts), self.sha256.hexdigest()
+
+class ContentSource:
+    """
+    Where component content is read from. fetch() returns (content, comp_key), the comp_key being the
+    SHA-256 of the content bytes, computed while they are read.
+    """
+
+    def fetch(self, link, name=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class FileIndex:
+    """
+    Finds an exported file from the component's Source (a relative path) or, failing that, its name.
+    A name shared by several files (e.g. in different folders) is ambiguous and must be found by path.
+    """
+
+    def __init__(self, paths):
+        self.by_path = {}
+        self.by_stem = {}
+        for path in paths:
+            self.by_path[path.replace('\\', '/').lower()] = path
+            self.by_stem.setdefault(content_stem(path), []).append(path)
+
+    def find(self, link, name=None):
+        if link and not str(link).startswith(('http://', 'https://')):
+            path = self.by_path.get(str(link).replace('\\', '/').lower())
+            if path:
+                return path
+        for candidate in (link, name):
+            if candidate:
+                paths = self.by_stem.get(content_stem(str(candidate)))
+                if paths and len(paths) > 1:
+                    raise LookupError(f"Several exported files match '{candidate}': {', '.join(sorted(paths))}.")
+                if paths:
+                    return paths[0]
+        raise FileNotFoundError(f"No exported file for '{name or link}'.")
+
+class LocalDirectorySource(ContentSource):
+    """
+    Reads content from a directory of exported files (e.g. an unzipped Notion export), memory-mapped.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        paths = []
+        for directory, _, file_names in os.walk(root):
+            for file_name in file_names:
+                paths.append(os.path.relpath(os.path.join(directory, file_name), root))
+        self.index = FileIndex(paths)
+
+    def fetch(self, link, name=None):
+        path = os.path.join(self.root, self.index.find(link, name))
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return '', hashlib.sha256().hexdigest()
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                # Both the hash and the decoding read the mapped pages directly
+                with memoryview(mapped) as view:
+                    comp_key = hashlib.sha256(view).hexdigest()
+                    content = str(view, 'utf-8')
+        return content, comp_key
+
+class ZipArchiveSource(ContentSource):
+    """
+    Reads content from a zip archive (a Notion export as downloaded), streaming each member.
+    """
+
+    def __init__(self, path):
+        self.archive = zipfile.ZipFile(path)
+        self.index = FileIndex(info.filename for info in self.archive.infolist() if not info.is_dir())
+
+    def fetch(self, link, name=None):
+        sink = HashingSink()
+        with self.archive.open(self.index.find(link, name)) as member:
+            for chunk in iter(lambda: member.read(CHUNK_SIZE), b''):
+                sink.write(chunk)
+        return sink.result()
+
+    def close(self):
+        self.archive.close()
+
+class DriveSource(ContentSource):
+    """
+    Downloads content from Google Drive links. The credentials are obtained once, by the caller; Google API
+    clients are not thread-safe, so each thread builds its own service from them.
+    """
+
+    def __init__(self, credentials):
+        self.credentials = credentials
+        self._local = threading.local()
+
+    def service(self):
+        if not hasattr(self._local, 'service'):
+            from googleapiclient.discovery import build
+            self._local.service = build('drive', 'v3', credentials=self.credentials)
+        return self._local.service
+
+    def fetch(self, link, name=None):
+        from googleapiclient.http import MediaIoBaseDownload
+
+        file_id = extract_file_id_from_url(link)
+        if not file_id:
+            raise ValueError("Invalid Google Drive link format.")
+        sink = HashingSink()
+        downloader = MediaIoBaseDownload(sink, self.service().files().get_media(fileId=file_id), chunksize=CHUNK_SIZE)
+        done = False
+        while not done:
+            _, done = downloader.next_chunk()
+        return sink.result()
+
+def open_content_source(spec, drive_credentials=None):
+    """
+    Opens the content source for a spec: 'drive' (with the Google Drive credentials), a .zip archive or a directory.
+    """
+    if spec == 'drive':
+        return DriveSource(drive_credentials)
+    if zipfile.is_zipfile(spec):
+        return ZipArchiveSource(spec)
+    if os.path.isdir(spec):
+        return LocalDirectorySource(spec)
+    raise ValueError(f"Unknown content source '{spec}' (expected 'drive', a zip archive or a directory).")
@@ -0,0 +1,135 @@
+import hashlib
+import re
+import threading
+
+# Words per shingle
+SHINGLE_SIZE = 5
+
+# MinHash signature length, split into LSH bands of BAND_ROWS values. Two components become candidates when
+# all the values of one band match; with 16 bands of 8 rows the candidate probability passes 50% around a
+# Jaccard similarity of 0.7.
+NUM_PERM = 128
+BAND_ROWS = 8
+
+# Estimated Jaccard similarity above which a component is recorded as a near-duplicate
+DEFAULT_THRESHOLD = 0.8
+
+# Near-duplicate relations recorded per component (the most similar ones), so a large cluster of copies
+# adds a bounded number of relations per component rather than one to every other copy
+MAX_MATCHES = 5
+
+# Shingles are hashed to 56 bits, so a signature value (plus the densification offset) fits a Neo4j integer
+HASH_BYTES = 7
+BIN_RANGE = (1 << (8 * HASH_BYTES)) // NUM_PERM
+
+WORD = re.compile(r'\w+')
+
+def shingles(content):
+    """
+    Returns the hashed word shingles of a content (the whole text as one shingle if it is shorter).
+    """
+    words = WORD.findall(content.lower())
+    if not words:
+        return set()
+    count = max(1, len(words) - SHINGLE_SIZE + 1)
+    return {int.from_bytes(hashlib.blake2b(' '.join(words[i:i + SHINGLE_SIZE]).encode(), digest_size=HASH_BYTES).digest(), 'big')
+            for i in range(count)}
+
+def minhash(content):
+    """
+    Returns the MinHash signature (NUM_PERM integers) of a content, or None if it has no words.
+    One-permutation MinHash: each shingle is hashed once, the low part of the hash picking one of NUM_PERM bins that
+    keeps the minimum of the high parts, so the cost is linear in the content rather than NUM_PERM times it.
+    Empty bins (short contents) borrow the next non-empty bin's value, offset by the distance.
+    """
+    hashes = shingles(content)
+    if not hashes:
+        return None
+    bins = [None] * NUM_PERM
+    for value in hashes:
+        position, value = value % NUM_PERM, value // NUM_PERM
+        if bins[position] is None or value < bins[position]:
+            bins[position] = value
+    signature = []
+    for position in range(NUM_PERM):
+        distance = 0
+        while bins[(position + distance) % NUM_PERM] is None:
+            distance += 1
+        signature.append(bins[(position + distance) % NUM_PERM] + distance * BIN_RANGE)
+    return signature
+
+def similarity(signature, other):
+    """
+    Estimates the Jaccard similarity of two contents from their signatures.
+    """
+    return sum(1 for x, y in zip(signature, other) if x == y) / len(signature)
+
+class LshIndex:
+    """
+    Locality-sensitive hashing index of MinHash signatures: each signature is filed under one bucket
+    per band, so a lookup only compares the signatures sharing a bucket instead of the whole corpus.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.signatures = {}  # comp_key -> signature
+        self.buckets = {}     # (band, band hash) -> comp_keys
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def _bands(self, signature):
+        for band, start in enumerate(range(0, len(signature), BAND_ROWS)):
+            yield band, hash(tuple(signature[start:start + BAND_ROWS]))
+
+    def add(self, comp_key, signature):
+        with self._lock:
+            self._add(comp_key, signature)
+
+    def _add(self, comp_key, signature):
+        if comp_key in self.signatures:
+            return
+        self.signatures[comp_key] = signature
+        for bucket in self._bands(signature):
+            self.buckets.setdefault(bucket, []).append(comp_key)
+
+    def query(self, signature, exclude=None):
+        """
+        Returns [(comp_key, similarity)] of the indexed components at or above the threshold, the MAX_MATCHES most similar first.
+        """
+        with self._lock:
+            return self._query(signature, exclude)
+
+    def _query(self, signature, exclude):
+        candidates = set()
+        for bucket in self._bands(signature):
+            candidates.update(self.buckets.get(bucket, ()))
+        candidates.discard(exclude)
+        matches = [(comp_key, similarity(signature, self.signatures[comp_key])) for comp_key in candidates]
+        matches = sorted((match for match in matches if match[1] >= self.threshold), key=lambda match: (-match[1], match[0]))
+        return matches[:MAX_MATCHES]
+
+    def add_and_query(self, comp_key, signature):
+        """
+        Returns the near-duplicates of a component among those indexed before it, then indexes it
+        (nothing if it is already indexed).
+        """
+        with self._lock:
+            if comp_key in self.signatures:
+                return []
+            matches = self._query(signature, comp_key)
+            self._add(comp_key, signature)
+        return matches
+
+def find_near_duplicates(signatures, threshold=DEFAULT_THRESHOLD):
+    """
+    Finds the near-duplicate pairs among {comp_key: signature}: returns [(comp_key, near-duplicate of, similarity)],
+    each pair once. Similarity is symmetric and the graph has no ingest order, so the direction carries no meaning:
+    NEAR_DUPLICATE_OF relations are treated as undirected (see GraphStore.write_near_duplicates).
+    """
+    index = LshIndex(threshold)
+    pairs = []
+    for comp_key in sorted(signatures):
+        pairs.extend((comp_key, other, score) for other, score in index.add_and_query(comp_key, signatures[comp_key]))
+    return pairs
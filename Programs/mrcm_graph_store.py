@@ -0,0 +1,963 @@
+import bisect
+import hashlib
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+
+import mrcm_metrics
+from mrcm_query_log import run_query, stream_query
+from mrcm_search import (COMPONENT_FIELDS, LIST_FIELDS, PROPERTY_FILTERS, SECTION_FIELDS, SIZE_LIMITS, TAGS_FIELD,
+                         build_component_search, build_section_search, criteria_matches, return_clause)
+from mrcm_tag_index import normalize_tag
+
+logger = logging.getLogger(__name__)
+
+# Also write the reverse (t)-[:TAG_OF]->(c) edge of every tag relation. Readers only traverse HAS_TAG
+# (in either direction), so it is off by default, halving relation writes; MARCOM_TAG_OF_EDGES=1 restores it
+# for external tools that still read TAG_OF. See util_graph-migrations.py to delete the existing edges.
+TAG_OF_EDGES = os.environ.get('MARCOM_TAG_OF_EDGES', '0') == '1'
+
+def compress_content(content):
+    """
+    Compresses component content for storage in a Content node.
+    """
+    return zlib.compress(content.encode('utf-8'), 6)
+
+def decompress_content(data):
+    """
+    Restores component content stored by compress_content.
+    """
+    return zlib.decompress(bytes(data)).decode('utf-8')
+
+# Sections are the paragraphs of the content: text between blank lines
+SECTION_SEPARATOR = re.compile(r'\n\s*\n')
+
+def tag_graph_signature(tag_names, links):
+    """
+    Returns the taxonomy signature: (number of tags, number of HAS_TAG relations, short hash of the tag names).
+    """
+    digest = hashlib.sha256('\n'.join(sorted(tag_names)).encode()).hexdigest()[:16]
+    return len(tag_names), links, digest
+
+def split_sections(content):
+    """
+    Splits component content into its sections: Section node properties in content order, the text
+    compressed like the content (sec_data). The text is thus stored twice, in the Content node and in its
+    Sections (paragraphs compress less well on their own), so that viewing a paragraph reads only its node.
+    """
+    paragraphs = (paragraph.strip() for paragraph in SECTION_SEPARATOR.split(content))
+    return [{'sec_position': position, 'sec_size': len(text), 'sec_key': hashlib.sha256(text.encode()).hexdigest(),
+             'sec_data': compress_content(text)}
+            for position, text in enumerate(paragraph for paragraph in paragraphs if paragraph)]
+
+class GraphStore:
+    """
+    The graph operations used by the Marcom programs and the web UI.
+    Components are returned as dictionaries keyed by the field names of COMPONENT_FIELDS
+    (and TAGS_FIELD for the component's tag names).
+    """
+
+    def ensure_constraints(self):
+        """
+        Creates the uniqueness constraints the loaders rely on.
+        """
+        raise NotImplementedError
+
+    def upsert_component(self, properties):
+        """
+        Creates or updates a Component from its comp_* properties (merged on comp_key).
+        comp_content, when given, is stored compressed apart from the Component.
+        """
+        raise NotImplementedError
+
+    def upsert_tag(self, tag_name):
+        """
+        Creates the Tag if it does not exist. Returns True on success.
+        """
+        raise NotImplementedError
+
+    def link_tag(self, comp_key, tag_name):
+        """
+        Relates a Component to an existing Tag (matched case-insensitively).
+        Returns False if the tag or the component does not exist.
+        """
+        raise NotImplementedError
+
+    def upsert_tags(self, tag_names):
+        """
+        Creates the Tags that do not exist, in one batch.
+        """
+        for tag_name in tag_names:
+            self.upsert_tag(tag_name)
+
+    def write_components(self, rows):
+        """
+        Upserts a batch of components with their tags: rows of (comp_* properties, exact tag names).
+        Returns the number of tag relations written.
+        """
+        linked = 0
+        for properties, tag_names in rows:
+            self.upsert_component(properties)
+            linked += sum(1 for tag_name in tag_names if self.link_tag(properties['comp_key'], tag_name))
+        return linked
+
+    def replace_component_tags(self, rows, fingerprint):
+        """
+        Replaces the tag relations of a batch of Components in one transaction: rows of
+        (comp_key, extracted tags, exact tag names). Relations to other tags are removed, and each
+        Component records its extracted tags and the taxonomy fingerprint it was tagged with.
+        Returns the number of tag relations.
+        """
+        raise NotImplementedError
+
+    def fetch_taxonomy_snapshots(self):
+        """
+        Returns {fingerprint: tag names} for the taxonomies components were tagged against.
+        """
+        raise NotImplementedError
+
+    def save_taxonomy_snapshot(self, fingerprint, tag_names):
+        """
+        Records the tag names of a taxonomy, so a later run can tell which tags changed since.
+        """
+        raise NotImplementedError
+
+    def fetch_signatures(self):
+        """
+        Returns {comp_key: MinHash signature} for the Components that have one (see mrcm_dedup).
+        """
+        raise NotImplementedError
+
+    def save_signatures(self, rows):
+        """
+        Stores the MinHash signatures of a batch of Components: rows of (comp_key, signature).
+        """
+        raise NotImplementedError
+
+    def write_near_duplicates(self, pairs):
+        """
+        Relates near-duplicate Components: pairs of (comp_key, comp_key it is a near-duplicate of, similarity).
+        NEAR_DUPLICATE_OF is undirected: a pair already related either way has its similarity updated, so
+        the ingestion pipeline and util_near-duplicates.py never relate the same two components twice.
+        Returns the number of relations written.
+        """
+        raise NotImplementedError
+
+    def fetch_near_duplicates(self):
+        """
+        Returns every (comp_key, near-duplicate of, similarity) relation, once, in the direction it was first written.
+        """
+        raise NotImplementedError
+
+    def clear_near_duplicates(self):
+        """
+        Deletes every near-duplicate relation. Returns the number deleted.
+        """
+        raise NotImplementedError
+
+    def fetch_components(self, fields=LIST_FIELDS):
+        """
+        Returns every Component with the requested fields.
+        """
+        raise NotImplementedError
+
+    def fetch_components_by_keys(self, comp_keys, fields=LIST_FIELDS):
+        """
+        Returns the Components with the given keys (unknown keys are ignored).
+        """
+        raise NotImplementedError
+
+    def search_components(self, filters=None, fields=LIST_FIELDS):
+        """
+        Returns the Components matching the filters (see mrcm_search.build_component_search), once each.
+        """
+        raise NotImplementedError
+
+    def iter_components(self, filters=None, fields=LIST_FIELDS, after=None, limit=None):
+        """
+        Yields the Components matching the filters in comp_key order, starting after the `after` comp_key,
+        at most `limit` of them, without holding the whole result in memory.
+        """
+        raise NotImplementedError
+
+    def fetch_content(self, comp_key):
+        """
+        Returns the content of a Component, or None if it does not exist.
+        """
+        raise NotImplementedError
+
+    def fetch_contents(self, comp_keys):
+        """
+        Returns {comp_key: content} for a batch of Components.
+        """
+        return {comp_key: self.fetch_content(comp_key) for comp_key in comp_keys}
+
+    def search_sections(self, filters=None, fields=LIST_FIELDS):
+        """
+        Returns the Sections fitting the size filter of the components matching the other filters
+        (see mrcm_search.build_section_search): the component fields plus SECTION_FIELDS, without text.
+        """
+        raise NotImplementedError
+
+    def fetch_section(self, comp_key, position):
+        """
+        Returns the text of one Section of a Component, or None if it does not exist.
+        """
+        raise NotImplementedError
+
+    def distinct_values(self, prop):
+        """
+        Returns the distinct values of a Component property.
+        """
+        raise NotImplementedError
+
+    def tag_weights(self):
+        """
+        Returns {tag_name: number of components carrying the tag} for every Tag.
+        """
+        raise NotImplementedError
+
+    def fetch_tag_links(self):
+        """
+        Returns every (comp_key, tag_name) relation.
+        """
+        raise NotImplementedError
+
+    def taxonomy_signature(self):
+        """
+        Returns a cheap value that changes when tags are added, removed or renamed, or tag relations are
+        added or removed (see tag_graph_signature).
+        """
+        raise NotImplementedError
+
+    def warm(self):
+        """
+        Loads whatever the store caches, so the first request does not pay for it.
+        """
+        pass
+
+    def close(self):
+        pass
+
+class Neo4jGraphStore(GraphStore):
+    """
+    GraphStore backed by a Neo4j server.
+    """
+
+    def __init__(self, uri, user, password, driver=None, tag_of_edges=None):
+        from neo4j import GraphDatabase
+
+        # A neo4j:// URI routes read transactions to the cluster's read replicas and write transactions
+        # to the leader; with bolt:// (one instance) both go to that instance
+        self.driver = driver or GraphDatabase.driver(uri, auth=(user, password))
+        self.tag_of_edges = TAG_OF_EDGES if tag_of_edges is None else tag_of_edges
+        # Shared by every session, so a read follows this store's earlier writes even on another cluster member
+        self.bookmarks = GraphDatabase.bookmark_manager()
+
+    def _session(self, read=False):
+        from neo4j import READ_ACCESS, WRITE_ACCESS
+
+        return self.driver.session(default_access_mode=READ_ACCESS if read else WRITE_ACCESS, bookmark_manager=self.bookmarks)
+
+    def _read(self, query, parameters=None):
+        def work(tx):
+            return run_query(tx, query, parameters)
+
+        with mrcm_metrics.timer('marcom_neo4j_query_seconds', "Time spent in Neo4j queries.", kind='read'):
+            with self._session(read=True) as session:
+                return session.execute_read(work)
+
+    def _write(self, query, parameters=None):
+        def work(tx):
+            return run_query(tx, query, parameters)
+
+        with mrcm_metrics.timer('marcom_neo4j_query_seconds', "Time spent in Neo4j queries.", kind='write'):
+            with self._session() as session:
+                return session.execute_write(work)
+
+    def _merge_links(self):
+        """
+        Returns the MERGE clauses relating the component `c` to the tag `t`.
+        """
+        if self.tag_of_edges:
+            return "MERGE (c)-[:HAS_TAG]->(t) MERGE (t)-[:TAG_OF]->(c)"
+        return "MERGE (c)-[:HAS_TAG]->(t)"
+
+    def ensure_constraints(self):
+        self._write("CREATE CONSTRAINT IF NOT EXISTS FOR (t:Tag) REQUIRE t.tag_name IS UNIQUE")
+        self._write("CREATE CONSTRAINT IF NOT EXISTS FOR (c:Component) REQUIRE c.comp_key IS UNIQUE")
+        self._write("CREATE CONSTRAINT IF NOT EXISTS FOR (x:Content) REQUIRE x.comp_key IS UNIQUE")
+        self._write("CREATE CONSTRAINT IF NOT EXISTS FOR (s:Section) REQUIRE (s.comp_key, s.sec_position) IS UNIQUE")
+        self._write("CREATE INDEX IF NOT EXISTS FOR (s:Section) ON (s.sec_size)")
+
+    def _component_row(self, properties):
+        """
+        Splits comp_* properties into the Component properties, the compressed content (or None)
+        and the content's sections.
+        """
+        properties = dict(properties)
+        content = properties.pop('comp_content', None)
+        if content is None:
+            return {'properties': properties, 'content': None, 'sections': []}
+        sections = split_sections(content)
+        properties['comp_sections'] = len(sections)
+        return {'properties': properties, 'content': compress_content(content), 'sections': sections}
+
+    def upsert_component(self, properties):
+        query = """
+        MERGE (c:Component {comp_key: $row.properties.comp_key})
+        SET c += $row.properties
+        FOREACH (data IN CASE WHEN $row.content IS NULL THEN [] ELSE [$row.content] END |
+            MERGE (x:Content {comp_key: c.comp_key})
+            SET x.data = data)
+        FOREACH (section IN $row.sections |
+            MERGE (s:Section {comp_key: c.comp_key, sec_position: section.sec_position})
+            SET s += section
+            MERGE (c)-[:HAS_SECTION]->(s))
+        """
+        self._write(query, {'row': self._component_row(properties)})
+
+    def upsert_tag(self, tag_name):
+        query = """
+        MERGE (t:Tag {tag_name: $tag_name})
+        RETURN t.tag_name AS tag_name
+        """
+        return bool(self._write(query, {'tag_name': tag_name}))
+
+    def link_tag(self, comp_key, tag_name):
+        query = """
+        MATCH (c:Component {comp_key: $comp_key})
+        MATCH (t:Tag) WHERE toLower(t.tag_name) = $tag_name
+        %s
+        RETURN count(t) AS linked
+        """ % self._merge_links()
+        result = self._write(query, {'comp_key': comp_key, 'tag_name': normalize_tag(tag_name)})
+        return bool(result and result[0]['linked'])
+
+    def upsert_tags(self, tag_names):
+        self._write("UNWIND $tag_names AS tag_name MERGE (t:Tag {tag_name: tag_name})", {'tag_names': list(tag_names)})
+
+    def write_components(self, rows):
+        # Tags are matched by exact name so the lookup uses the tag_name uniqueness index
+        query = """
+        UNWIND $rows AS row
+        MERGE (c:Component {comp_key: row.properties.comp_key})
+        SET c += row.properties
+        FOREACH (data IN CASE WHEN row.content IS NULL THEN [] ELSE [row.content] END |
+            MERGE (x:Content {comp_key: c.comp_key})
+            SET x.data = data)
+        FOREACH (section IN row.sections |
+            MERGE (s:Section {comp_key: c.comp_key, sec_position: section.sec_position})
+            SET s += section
+            MERGE (c)-[:HAS_SECTION]->(s))
+        WITH c, row
+        UNWIND row.tag_names AS tag_name
+        MATCH (t:Tag {tag_name: tag_name})
+        %s
+        RETURN count(*) AS linked
+        """ % self._merge_links()
+        parameters = {'rows': [dict(self._component_row(properties), tag_names=list(tag_names)) for properties, tag_names in rows]}
+        result = self._write(query, parameters)
+        return result[0]['linked'] if result else 0
+
+    def replace_component_tags(self, rows, fingerprint):
+        query = """
+        UNWIND $rows AS row
+        MATCH (c:Component {comp_key: row.comp_key})
+        SET c.comp_tagged_taxonomy = $fingerprint,
+            c.comp_extracted_tags = row.extracted_tags
+        WITH c, row
+        CALL {
+            WITH c, row
+            MATCH (c)-[r:HAS_TAG|TAG_OF]-(t:Tag)
+            WHERE NOT t.tag_name IN row.tag_names
+            DELETE r
+        }
+        WITH c, row
+        UNWIND row.tag_names AS tag_name
+        MATCH (t:Tag {tag_name: tag_name})
+        %s
+        RETURN count(*) AS linked
+        """ % self._merge_links()
+        parameters = {
+            'rows': [{'comp_key': comp_key, 'extracted_tags': list(extracted_tags), 'tag_names': list(tag_names)}
+                     for comp_key, extracted_tags, tag_names in rows],
+            'fingerprint': fingerprint,
+        }
+        result = self._write(query, parameters)
+        return result[0]['linked'] if result else 0
+
+    def fetch_taxonomy_snapshots(self):
+        query = "MATCH (s:TaxonomySnapshot) RETURN s.fingerprint AS fingerprint, s.tag_names AS tag_names"
+        return {record['fingerprint']: record['tag_names'] for record in self._read(query)}
+
+    def save_taxonomy_snapshot(self, fingerprint, tag_names):
+        query = "MERGE (s:TaxonomySnapshot {fingerprint: $fingerprint}) SET s.tag_names = $tag_names"
+        self._write(query, {'fingerprint': fingerprint, 'tag_names': sorted(tag_names)})
+
+    def fetch_signatures(self):
+        query = "MATCH (c:Component) WHERE c.comp_minhash IS NOT NULL RETURN c.comp_key AS key, c.comp_minhash AS signature"
+        return {record['key']: record['signature'] for record in self._read(query)}
+
+    def save_signatures(self, rows):
+        query = """
+        UNWIND $rows AS row
+        MATCH (c:Component {comp_key: row.comp_key})
+        SET c.comp_minhash = row.signature
+        """
+        self._write(query, {'rows': [{'comp_key': comp_key, 'signature': list(signature)} for comp_key, signature in rows]})
+
+    def write_near_duplicates(self, pairs):
+        query = """
+        UNWIND $pairs AS pair
+        MATCH (c:Component {comp_key: pair.comp_key})
+        MATCH (o:Component {comp_key: pair.original_key})
+        MERGE (c)-[r:NEAR_DUPLICATE_OF]-(o)
+        SET r.similarity = pair.similarity
+        RETURN count(r) AS written
+        """
+        parameters = {'pairs': [{'comp_key': comp_key, 'original_key': original_key, 'similarity': score}
+                                for comp_key, original_key, score in pairs]}
+        result = self._write(query, parameters)
+        return result[0]['written'] if result else 0
+
+    def fetch_near_duplicates(self):
+        query = """
+        MATCH (c:Component)-[r:NEAR_DUPLICATE_OF]->(o:Component)
+        RETURN c.comp_key AS key, o.comp_key AS original_key, r.similarity AS similarity
+        """
+        return [(record['key'], record['original_key'], record['similarity']) for record in self._read(query)]
+
+    def clear_near_duplicates(self, batch_size=10000):
+        query = "MATCH ()-[r:NEAR_DUPLICATE_OF]->() WITH r LIMIT $batch_size DELETE r RETURN count(*) AS deleted"
+        total = 0
+        while True:
+            deleted = self._write(query, {'batch_size': batch_size})[0]['deleted']
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+    def fetch_components(self, fields=LIST_FIELDS):
+        return self._read("MATCH (c:Component) " + return_clause(fields))
+
+    def fetch_components_by_keys(self, comp_keys, fields=LIST_FIELDS):
+        query = "UNWIND $comp_keys AS comp_key MATCH (c:Component {comp_key: comp_key}) " + return_clause(fields)
+        return self._read(query, {'comp_keys': list(comp_keys)})
+
+    def search_components(self, filters=None, fields=LIST_FIELDS):
+        query, parameters = build_component_search(filters, fields)
+        return self._read(query, parameters)
+
+    def iter_components(self, filters=None, fields=LIST_FIELDS, after=None, limit=None):
+        query, parameters = build_component_search(filters, fields, ordered=True, after=after, limit=limit)
+        # The read transaction stays open while the caller consumes the records. It is not retried
+        # like execute_read, since records may already have been handed out.
+        with self._session(read=True) as session, session.begin_transaction() as tx:
+            yield from stream_query(tx, query, parameters)
+
+    def fetch_content(self, comp_key):
+        return self.fetch_contents([comp_key]).get(comp_key)
+
+    def fetch_contents(self, comp_keys):
+        # comp_content is still read for components not yet moved by util_graph-migrations.py move-content
+        query = """
+        UNWIND $comp_keys AS comp_key
+        MATCH (c:Component {comp_key: comp_key})
+        OPTIONAL MATCH (x:Content {comp_key: comp_key})
+        RETURN comp_key AS key, x.data AS data, c.comp_content AS content
+        """
+        return {record['key']: decompress_content(record['data']) if record['data'] is not None else record['content']
+                for record in self._read(query, {'comp_keys': list(comp_keys)})}
+
+    def search_sections(self, filters=None, fields=LIST_FIELDS):
+        query, parameters = build_section_search(filters, fields)
+        return self._read(query, parameters)
+
+    def fetch_section(self, comp_key, position):
+        query = "MATCH (s:Section {comp_key: $comp_key, sec_position: $position}) RETURN s.sec_data AS data"
+        result = self._read(query, {'comp_key': comp_key, 'position': position})
+        return decompress_content(result[0]['data']) if result and result[0]['data'] is not None else None
+
+    def distinct_values(self, prop):
+        if prop not in COMPONENT_FIELDS.values():
+            raise ValueError(f"Unknown component property '{prop}'.")
+        return [record['value'] for record in self._read(f"MATCH (c:Component) RETURN DISTINCT c.{prop} AS value")]
+
+    def tag_weights(self):
+        query = "MATCH (t:Tag) RETURN t.tag_name AS tag_name, COUNT { (t)<-[:HAS_TAG]-(:Component) } AS weight"
+        return {record['tag_name']: record['weight'] for record in self._read(query)}
+
+    def fetch_tag_links(self):
+        query = "MATCH (c:Component)-[:HAS_TAG]->(t:Tag) RETURN c.comp_key AS key, t.tag_name AS tag_name"
+        return [(record['key'], record['tag_name']) for record in self._read(query)]
+
+    def taxonomy_signature(self):
+        # One row: the relation count is summed from the tags' degrees, and only tag names (not relations) travel
+        query = """
+        MATCH (t:Tag)
+        RETURN sum(COUNT { (t)<-[:HAS_TAG]-() }) AS links, collect(t.tag_name) AS tag_names
+        """
+        record = self._read(query)[0]
+        return tag_graph_signature(record['tag_names'], record['links'])
+
+    def move_content_to_nodes(self, batch_size=500):
+        """
+        Moves comp_content properties into compressed Content nodes, batch_size components per transaction.
+        Returns the number of components moved.
+        """
+        select = "MATCH (c:Component) WHERE c.comp_content IS NOT NULL RETURN c.comp_key AS key, c.comp_content AS content LIMIT $batch_size"
+        move = """
+        UNWIND $rows AS row
+        MATCH (c:Component {comp_key: row.comp_key})
+        MERGE (x:Content {comp_key: row.comp_key})
+        SET x.data = row.data
+        REMOVE c.comp_content
+        """
+        total = 0
+        while True:
+            records = self._read(select, {'batch_size': batch_size})
+            if not records:
+                return total
+            rows = [{'comp_key': record['key'], 'data': compress_content(record['content'])} for record in records]
+            self._write(move, {'rows': rows})
+            total += len(rows)
+            logger.info("Moved the content of %d components so far.", total)
+
+    def split_content_into_sections(self, batch_size=500):
+        """
+        Creates the Section nodes of the components stored before content was split,
+        batch_size components per transaction. Returns the number of components split.
+        """
+        select = "MATCH (c:Component) WHERE c.comp_sections IS NULL RETURN c.comp_key AS key LIMIT $batch_size"
+        split = """
+        UNWIND $rows AS row
+        MATCH (c:Component {comp_key: row.comp_key})
+        SET c.comp_sections = size(row.sections)
+        FOREACH (section IN row.sections |
+            MERGE (s:Section {comp_key: c.comp_key, sec_position: section.sec_position})
+            SET s += section
+            MERGE (c)-[:HAS_SECTION]->(s))
+        """
+        total = 0
+        while True:
+            comp_keys = [record['key'] for record in self._read(select, {'batch_size': batch_size})]
+            if not comp_keys:
+                return total
+            contents = self.fetch_contents(comp_keys)
+            # Components without content get no sections, but are marked so they are not selected again
+            rows = [{'comp_key': comp_key, 'sections': split_sections(contents.get(comp_key) or '')} for comp_key in comp_keys]
+            self._write(split, {'rows': rows})
+            total += len(rows)
+            logger.info("Split the content of %d components so far.", total)
+
+    def drop_tag_of_edges(self, batch_size=10000):
+        """
+        Deletes the reverse TAG_OF edges in transactions of at most batch_size edges.
+        Returns the number of edges deleted.
+        """
+        query = "MATCH ()-[r:TAG_OF]->() WITH r LIMIT $batch_size DELETE r RETURN count(*) AS deleted"
+        total = 0
+        while True:
+            deleted = self._write(query, {'batch_size': batch_size})[0]['deleted']
+            total += deleted
+            if deleted < batch_size:
+                return total
+            logger.info("Deleted %d TAG_OF edges so far.", total)
+
+    def close(self):
+        self.driver.close()
+
+class MemoryGraphStore(GraphStore):
+    """
+    Embedded GraphStore kept in dictionaries, with indexes on the filtered properties and on tags.
+    Used as a read replica for the web UI and as a stand-in for Neo4j in tests and benchmarks.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.components = {}       # comp_key -> comp_* properties
+        self.tags = {}             # normalized tag name -> tag_name
+        self.component_tags = {}   # comp_key -> normalized tag names
+        self.tag_components = {}   # normalized tag name -> comp_keys
+        self.property_index = {prop: {} for prop in PROPERTY_FILTERS.values()}  # prop -> value -> comp_keys
+        self.taxonomy_snapshots = {}  # fingerprint -> tag names
+        self.contents = {}            # comp_key -> compressed content
+        self.near_duplicates = {}     # (comp_key, near-duplicate of) -> similarity
+        self.sections = {}            # comp_key -> Section properties in content order
+
+    @classmethod
+    def copy_from(cls, source):
+        """
+        Builds a MemoryGraphStore holding a copy of another store's components (without content), tags and relations.
+        """
+        store = cls()
+        for tag_name in source.tag_weights():
+            store.upsert_tag(tag_name)
+        for component in source.fetch_components(list(COMPONENT_FIELDS)):
+            store.upsert_component({COMPONENT_FIELDS[field]: value for field, value in component.items()})
+        for comp_key, tag_name in source.fetch_tag_links():
+            store.link_tag(comp_key, tag_name)
+        return store
+
+    def ensure_constraints(self):
+        pass
+
+    def upsert_component(self, properties):
+        comp_key = properties['comp_key']
+        properties = dict(properties)
+        content = properties.pop('comp_content', None)
+        sections = split_sections(content) if content is not None else None
+        if sections is not None:
+            properties['comp_sections'] = len(sections)
+        with self._lock:
+            if content is not None:
+                self.contents[comp_key] = compress_content(content)
+                self.sections[comp_key] = sections
+            previous = self.components.get(comp_key)
+            if previous:
+                for prop, index in self.property_index.items():
+                    index.get(previous.get(prop), set()).discard(comp_key)
+            merged = dict(previous or {})
+            merged.update(properties)
+            self.components[comp_key] = merged
+            for prop, index in self.property_index.items():
+                index.setdefault(merged.get(prop), set()).add(comp_key)
+            self.component_tags.setdefault(comp_key, set())
+
+    def upsert_tag(self, tag_name):
+        key = normalize_tag(tag_name)
+        with self._lock:
+            self.tags.setdefault(key, tag_name)
+            self.tag_components.setdefault(key, set())
+        return True
+
+    def link_tag(self, comp_key, tag_name):
+        key = normalize_tag(tag_name)
+        with self._lock:
+            if key not in self.tags or comp_key not in self.components:
+                return False
+            self.component_tags[comp_key].add(key)
+            self.tag_components[key].add(comp_key)
+        return True
+
+    def replace_component_tags(self, rows, fingerprint):
+        linked = 0
+        with self._lock:
+            for comp_key, extracted_tags, tag_names in rows:
+                if comp_key not in self.components:
+                    continue
+                self.components[comp_key].update({
+                    'comp_tagged_taxonomy': fingerprint,
+                    'comp_extracted_tags': list(extracted_tags),
+                })
+                keys = {normalize_tag(tag_name) for tag_name in tag_names} & self.tags.keys()
+                for key in self.component_tags[comp_key] - keys:
+                    self.tag_components[key].discard(comp_key)
+                for key in keys:
+                    self.tag_components[key].add(comp_key)
+                self.component_tags[comp_key] = keys
+                linked += len(keys)
+        return linked
+
+    def fetch_taxonomy_snapshots(self):
+        with self._lock:
+            return dict(self.taxonomy_snapshots)
+
+    def save_taxonomy_snapshot(self, fingerprint, tag_names):
+        with self._lock:
+            self.taxonomy_snapshots[fingerprint] = sorted(tag_names)
+
+    def fetch_signatures(self):
+        with self._lock:
+            return {comp_key: properties['comp_minhash'] for comp_key, properties in self.components.items()
+                    if properties.get('comp_minhash') is not None}
+
+    def save_signatures(self, rows):
+        with self._lock:
+            for comp_key, signature in rows:
+                if comp_key in self.components:
+                    self.components[comp_key]['comp_minhash'] = list(signature)
+
+    def write_near_duplicates(self, pairs):
+        written = 0
+        with self._lock:
+            for comp_key, original_key, score in pairs:
+                if comp_key in self.components and original_key in self.components:
+                    if (original_key, comp_key) in self.near_duplicates:
+                        comp_key, original_key = original_key, comp_key
+                    self.near_duplicates[(comp_key, original_key)] = score
+                    written += 1
+        return written
+
+    def fetch_near_duplicates(self):
+        with self._lock:
+            return [(comp_key, original_key, score) for (comp_key, original_key), score in self.near_duplicates.items()]
+
+    def clear_near_duplicates(self):
+        with self._lock:
+            deleted = len(self.near_duplicates)
+            self.near_duplicates.clear()
+        return deleted
+
+    def _project(self, properties, fields):
+        row = {}
+        for field in fields:
+            if field == TAGS_FIELD:
+                row[field] = [self.tags[key] for key in self.component_tags.get(properties['comp_key'], ())]
+            else:
+                row[field] = properties.get(COMPONENT_FIELDS[field])
+        return row
+
+    def fetch_components(self, fields=LIST_FIELDS):
+        with self._lock:
+            return [self._project(properties, fields) for properties in self.components.values()]
+
+    def fetch_components_by_keys(self, comp_keys, fields=LIST_FIELDS):
+        with self._lock:
+            return [self._project(self.components[comp_key], fields) for comp_key in comp_keys if comp_key in self.components]
+
+    def _search_keys(self, filters):
+        """
+        Returns the comp_keys matching the filters (the lock must be held).
+        """
+        filters = filters or {}
+        # Start from the smallest indexed candidate set, then check the remaining filters
+        candidates = []
+        if filters.get('tag'):
+            candidates.append(self.tag_components.get(normalize_tag(filters['tag']), set()))
+        for name, prop in PROPERTY_FILTERS.items():
+            if filters.get(name):
+                candidates.append(self.property_index[prop].get(filters[name], set()))
+        if candidates:
+            keys = set.intersection(*sorted(candidates, key=len))
+        else:
+            keys = self.components.keys()
+
+        max_size = SIZE_LIMITS.get(filters.get('size'))
+        criteria = filters.get('criteria')
+        results = []
+        for comp_key in keys:
+            properties = self.components[comp_key]
+            if max_size is not None and (properties.get('comp_size') or 0) > max_size:
+                continue
+            if criteria and not criteria_matches(criteria, self.component_tags[comp_key]):
+                continue
+            results.append(comp_key)
+        return results
+
+    def search_components(self, filters=None, fields=LIST_FIELDS):
+        with self._lock:
+            return [self._project(self.components[comp_key], fields) for comp_key in self._search_keys(filters)]
+
+    def iter_components(self, filters=None, fields=LIST_FIELDS, after=None, limit=None):
+        with self._lock:
+            keys = sorted(self._search_keys(filters))
+        start = bisect.bisect_right(keys, after) if after is not None else 0
+        for comp_key in itertools.islice(keys, start, None if limit is None else start + limit):
+            with self._lock:
+                properties = self.components.get(comp_key)
+                row = self._project(properties, fields) if properties else None
+            if row is not None:
+                yield row
+
+    def fetch_content(self, comp_key):
+        with self._lock:
+            data = self.contents.get(comp_key)
+        return decompress_content(data) if data is not None else None
+
+    def search_sections(self, filters=None, fields=LIST_FIELDS):
+        filters = dict(filters or {})
+        max_size = SIZE_LIMITS.get(filters.pop('size', None))
+        fields = [field for field in fields if field != TAGS_FIELD]
+        results = []
+        with self._lock:
+            for comp_key in self._search_keys(filters):
+                row = self._project(self.components[comp_key], fields)
+                for section in self.sections.get(comp_key, ()):
+                    if max_size is None or section['sec_size'] <= max_size:
+                        results.append(dict(row, **{field: section[prop] for field, prop in SECTION_FIELDS.items()}))
+        return results
+
+    def fetch_section(self, comp_key, position):
+        with self._lock:
+            sections = self.sections.get(comp_key, ())
+            data = sections[position]['sec_data'] if 0 <= position < len(sections) else None
+        return decompress_content(data) if data is not None else None
+
+    def distinct_values(self, prop):
+        if prop not in COMPONENT_FIELDS.values():
+            raise ValueError(f"Unknown component property '{prop}'.")
+        with self._lock:
+            if prop in self.property_index:
+                return [value for value, keys in self.property_index[prop].items() if keys]
+            return list(dict.fromkeys(properties.get(prop) for properties in self.components.values()))
+
+    def tag_weights(self):
+        with self._lock:
+            return {tag_name: len(self.tag_components[key]) for key, tag_name in self.tags.items()}
+
+    def fetch_tag_links(self):
+        with self._lock:
+            return [(comp_key, self.tags[key]) for comp_key, keys in self.component_tags.items() for key in keys]
+
+    def taxonomy_signature(self):
+        with self._lock:
+            tag_names = list(self.tags.values())
+            links = sum(len(keys) for keys in self.component_tags.values())
+        return tag_graph_signature(tag_names, links)
+
+class ReadReplica(GraphStore):
+    """
+    Serves reads, content excepted, from a MemoryGraphStore copy of a source store, reloaded every `refresh_interval` seconds.
+    Writes go to the source. The copy is rebuilt aside, in a background thread, and swapped in, so readers never wait for
+    or see a partial load; until a first copy has loaded, reads go to the source.
+    """
+
+    def __init__(self, source, refresh_interval=300, retry_interval=30):
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self._store = None
+        self._loaded_at = None
+        self._failed_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        store = MemoryGraphStore.copy_from(self.source)
+        self._store = store
+        self._loaded_at = time.monotonic()
+        return store
+
+    def _try_refresh(self):
+        """
+        Reloads the copy unless another thread is already reloading it; a failure keeps the previous copy
+        (or the source) and is retried after `retry_interval` seconds.
+        """
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self.refresh()
+            self._failed_at = None
+        except Exception as e:
+            logger.exception("Error refreshing read replica: %s", e)
+            self._failed_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def _due(self):
+        now = time.monotonic()
+        if self._failed_at is not None and now - self._failed_at < self.retry_interval:
+            return False
+        return self._loaded_at is None or now - self._loaded_at >= self.refresh_interval
+
+    def current(self):
+        """
+        Returns the current copy (the source before the first load), starting a background reload if it is
+        older than the refresh interval.
+        """
+        if self._due() and not self._lock.locked():
+            threading.Thread(target=self._try_refresh, name='read-replica-refresh', daemon=True).start()
+        return self._store if self._store is not None else self.source
+
+    def warm(self):
+        self._try_refresh()
+
+    def ensure_constraints(self):
+        self.source.ensure_constraints()
+
+    def upsert_component(self, properties):
+        self.source.upsert_component(properties)
+
+    def upsert_tag(self, tag_name):
+        return self.source.upsert_tag(tag_name)
+
+    def link_tag(self, comp_key, tag_name):
+        return self.source.link_tag(comp_key, tag_name)
+
+    def upsert_tags(self, tag_names):
+        self.source.upsert_tags(tag_names)
+
+    def write_components(self, rows):
+        return self.source.write_components(rows)
+
+    def replace_component_tags(self, rows, fingerprint):
+        return self.source.replace_component_tags(rows, fingerprint)
+
+    def fetch_taxonomy_snapshots(self):
+        return self.source.fetch_taxonomy_snapshots()
+
+    def save_taxonomy_snapshot(self, fingerprint, tag_names):
+        self.source.save_taxonomy_snapshot(fingerprint, tag_names)
+
+    def fetch_signatures(self):
+        return self.source.fetch_signatures()
+
+    def save_signatures(self, rows):
+        self.source.save_signatures(rows)
+
+    def write_near_duplicates(self, pairs):
+        return self.source.write_near_duplicates(pairs)
+
+    def fetch_near_duplicates(self):
+        return self.source.fetch_near_duplicates()
+
+    def clear_near_duplicates(self):
+        return self.source.clear_near_duplicates()
+
+    def fetch_components(self, fields=LIST_FIELDS):
+        return self.current().fetch_components(fields)
+
+    def fetch_components_by_keys(self, comp_keys, fields=LIST_FIELDS):
+        return self.current().fetch_components_by_keys(comp_keys, fields)
+
+    def search_components(self, filters=None, fields=LIST_FIELDS):
+        return self.current().search_components(filters, fields)
+
+    def iter_components(self, filters=None, fields=LIST_FIELDS, after=None, limit=None):
+        return self.current().iter_components(filters, fields, after, limit)
+
+    def fetch_content(self, comp_key):
+        # The copy holds metadata only; content is read from the source when a component is opened
+        return self.source.fetch_content(comp_key)
+
+    def fetch_contents(self, comp_keys):
+        return self.source.fetch_contents(comp_keys)
+
+    def search_sections(self, filters=None, fields=LIST_FIELDS):
+        # Sections are part of the content, which the copy does not hold
+        return self.source.search_sections(filters, fields)
+
+    def fetch_section(self, comp_key, position):
+        return self.source.fetch_section(comp_key, position)
+
+    def distinct_values(self, prop):
+        return self.current().distinct_values(prop)
+
+    def tag_weights(self):
+        return self.current().tag_weights()
+
+    def fetch_tag_links(self):
+        return self.current().fetch_tag_links()
+
+    def taxonomy_signature(self):
+        return self.current().taxonomy_signature()
+
+    def close(self):
+        self.source.close()
+
+def open_graph_store(backend, uri, user, password, refresh_interval=300):
+    """
+    Opens the store for a backend name: 'neo4j', 'memory' (empty embedded store)
+    or 'replica' (reads served from an embedded copy of Neo4j, writes sent to Neo4j).
+    """
+    if backend == 'neo4j':
+        return Neo4jGraphStore(uri, user, password)
+    if backend == 'memory':
+        return MemoryGraphStore()
+    if backend == 'replica':
+        return ReadReplica(Neo4jGraphStore(uri, user, password), refresh_interval)
+    raise ValueError(f"Unknown graph backend '{backend}'.")
@@ -0,0 +1,196 @@
+import bisect
+import contextlib
+import threading
+import time
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Histogram behind stage timers and the end-of-run stage breakdown
+STAGE_METRIC = 'marcom_stage_seconds'
+
+def escape_label_value(value):
+    """
+    Escapes a label value for the Prometheus text format.
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(label_names, label_values, extra=None):
+    """
+    Formats a label set as {name="value",...} (empty string when there are no labels).
+    """
+    pairs = [f'{name}="{escape_label_value(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def format_value(value):
+    """
+    Formats a sample value, dropping the fraction of whole numbers.
+    """
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+class Counter:
+    """
+    Monotonic counter, one value per label set.
+    """
+    kind = 'counter'
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                yield f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}"
+
+class Histogram:
+    """
+    Histogram of observed values (cumulative buckets, sum and count), one series per label set.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}  # label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * len(self.buckets), 0.0, 0]
+            if position < len(self.buckets):
+                series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    def totals(self):
+        """
+        Returns {label values: (sum, count)}.
+        """
+        with self._lock:
+            return {key: (series[1], series[2]) for key, series in self.series.items()}
+
+    def samples(self):
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self.series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    labels = format_labels(self.label_names, key, 'le="%s"' % format_value(bound))
+                    yield f"{self.name}_bucket{labels} {cumulative}"
+                labels = format_labels(self.label_names, key, 'le="+Inf"')
+                yield f"{self.name}_bucket{labels} {count}"
+                labels = format_labels(self.label_names, key)
+                yield f"{self.name}_sum{labels} {format_value(total)}"
+                yield f"{self.name}_count{labels} {count}"
+
+class Registry:
+    """
+    Holds the metrics of a process and renders them.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_class, name, help_text, label_names, **options):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = metric_class(name, help_text, label_names, **options)
+            return metric
+
+    def counter(self, name, help_text, label_names=()):
+        return self._get_or_create(Counter, name, help_text, label_names)
+
+    def histogram(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, label_names, buckets=buckets)
+
+    @contextlib.contextmanager
+    def timer(self, name, help_text, **labels):
+        """
+        Times the enclosed block into a histogram (seconds), labelled with the given labels.
+        """
+        histogram = self.histogram(name, help_text, tuple(labels))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - start, **labels)
+
+    def stage(self, stage):
+        """
+        Times the enclosed block as a processing stage (reported by print_stage_report).
+        """
+        return self.timer(STAGE_METRIC, "Time spent in each processing stage.", stage=stage)
+
+    def record_stage(self, stage, seconds):
+        """
+        Records stage time measured elsewhere (e.g. in a worker process).
+        """
+        self.histogram(STAGE_METRIC, "Time spent in each processing stage.", ('stage',)).observe(seconds, stage=stage)
+
+    def stage_breakdown(self):
+        """
+        Returns [(stage, count, total seconds)] for every timed stage, slowest first.
+        """
+        histogram = self.metrics.get(STAGE_METRIC)
+        if histogram is None:
+            return []
+        rows = [(key[0], count, total) for key, (total, count) in histogram.totals().items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def print_stage_report(self, title="Stage breakdown"):
+        """
+        Prints where the time went, per stage.
+        """
+        rows = self.stage_breakdown()
+        if not rows:
+            return
+        overall = sum(total for _, _, total in rows) or 1.0
+        print(f"\n{title}:")
+        print(f"{'Stage':<24}{'Count':>8}{'Total s':>11}{'Mean ms':>11}{'Share':>8}")
+        for stage, count, total in rows:
+            print(f"{stage:<24}{count:>8}{total:>11.3f}{total / count * 1000:>11.2f}{total / overall:>8.1%}")
+
+    def render_prometheus(self):
+        """
+        Renders every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+# Process-wide registry used by the Programs and the web UI
+REGISTRY = Registry()
+
+stage = REGISTRY.stage
+record_stage = REGISTRY.record_stage
+timer = REGISTRY.timer
+counter = REGISTRY.counter
+histogram = REGISTRY.histogram
+print_stage_report = REGISTRY.print_stage_report
+render_prometheus = REGISTRY.render_prometheus
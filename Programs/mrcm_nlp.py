@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+import threading
+import urllib.error
+import urllib.request
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# spaCy model used for tag extraction (ensure spaCy's English model is installed)
+MODEL_NAME = "en_core_web_sm"
+
+# NLP daemon (prg-mrcm_nlp-daemon_v1.py) keeping the model loaded; set MARCOM_NLP_URL to '' to never use it
+DAEMON_URL = os.environ.get('MARCOM_NLP_URL', 'http://127.0.0.1:8765')
+
+# Seconds to wait for the daemon before falling back to the in-process model
+PROBE_TIMEOUT = 0.5
+REQUEST_TIMEOUT = 300
+
+# The parts of a spaCy Doc the Programs use, in a form that travels as JSON
+Span = namedtuple('Span', ['text', 'label_'])
+Doc = namedtuple('Doc', ['ents', 'noun_chunks'])
+
+_model = None
+_model_lock = threading.Lock()
+_daemon_available = None
+
+def configure(daemon_url):
+    """
+    Overrides the daemon URL set from the environment ('' for the in-process model only).
+    """
+    global DAEMON_URL, _daemon_available
+    DAEMON_URL = daemon_url
+    _daemon_available = None
+
+def load_model():
+    """
+    Loads the spaCy model on first use (a few seconds), once per process.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import spacy
+
+                logger.info("Loading spaCy model '%s'.", MODEL_NAME)
+                _model = spacy.load(MODEL_NAME)
+    return _model
+
+def to_doc(parsed):
+    return Doc([Span(ent.text, ent.label_) for ent in parsed.ents], [Span(chunk.text, '') for chunk in parsed.noun_chunks])
+
+def annotate_local(texts):
+    """
+    Annotates texts with the in-process model, returning Docs.
+    """
+    return [to_doc(parsed) for parsed in load_model().pipe(texts)]
+
+def doc_to_json(doc):
+    return {'ents': [[span.text, span.label_] for span in doc.ents], 'noun_chunks': [span.text for span in doc.noun_chunks]}
+
+def doc_from_json(data):
+    return Doc([Span(text, label) for text, label in data['ents']], [Span(text, '') for text in data['noun_chunks']])
+
+def daemon_available():
+    """
+    Returns True if the NLP daemon answers; checked once per process.
+    """
+    global _daemon_available
+    if _daemon_available is None:
+        _daemon_available = False
+        if DAEMON_URL:
+            try:
+                with urllib.request.urlopen(DAEMON_URL + '/health', timeout=PROBE_TIMEOUT) as response:
+                    _daemon_available = response.status == 200
+            except (OSError, urllib.error.URLError):
+                pass
+        logger.info("NLP daemon %s.", f"at {DAEMON_URL}" if _daemon_available else "not running, using the in-process model")
+    return _daemon_available
+
+def annotate_remote(texts):
+    """
+    Annotates texts with the NLP daemon, in one request.
+    """
+    request = urllib.request.Request(DAEMON_URL + '/annotate', data=json.dumps({'texts': texts}).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+        return [doc_from_json(data) for data in json.load(response)['docs']]
+
+def annotate(texts):
+    """
+    Returns a Doc (entities with labels, noun chunks) per text, from the NLP daemon when it is running,
+    otherwise from the model loaded in this process.
+    """
+    global _daemon_available
+    texts = list(texts)
+    if daemon_available():
+        try:
+            return annotate_remote(texts)
+        except (OSError, urllib.error.URLError, ValueError) as e:
+            logger.warning("NLP daemon request failed (%s), using the in-process model.", e)
+            _daemon_available = False
+    return annotate_local(texts)
+
+def nlp(text):
+    """
+    Annotates one text (drop-in for a spaCy pipeline call in the Programs).
+    """
+    return annotate([text])[0]
@@ -0,0 +1,14 @@
+import importlib.util
+import os
+
+PROGRAMS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def load_program(file_name):
+    """
+    Loads one of the Programs scripts (their file names are not importable) as a module.
+    """
+    module_name = os.path.splitext(file_name)[0].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(PROGRAMS_DIR, file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
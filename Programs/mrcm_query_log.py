@@ -0,0 +1,136 @@
+import hashlib
+import json
+import logging
+import os
+import re
+
+import mrcm_metrics
+
+logger = logging.getLogger('marcom.query')
+slow_logger = logging.getLogger('marcom.slowquery')
+
+# Queries whose server time (available + consumed) reaches this many milliseconds go to the slow-query log
+SLOW_QUERY_MS = float(os.environ.get('MARCOM_SLOW_QUERY_MS', 200))
+
+# Opt-in: prefix every query with PROFILE and log its db-hit plan
+PROFILE_QUERIES = os.environ.get('MARCOM_PROFILE_QUERIES', '') == '1'
+
+# Statements that cannot be profiled
+SCHEMA_COMMANDS = ('CREATE CONSTRAINT', 'CREATE INDEX', 'DROP ', 'SHOW ')
+
+def configure(slow_query_ms=None, profile=None):
+    """
+    Overrides the slow-query threshold and the PROFILE mode set from the environment.
+    """
+    global SLOW_QUERY_MS, PROFILE_QUERIES
+    if slow_query_ms is not None:
+        SLOW_QUERY_MS = float(slow_query_ms)
+    if profile is not None:
+        PROFILE_QUERIES = bool(profile)
+
+def configure_logging(level=None, slow_query_log=None):
+    """
+    Sets up logging for the command-line Programs (level from MARCOM_LOG_LEVEL, WARNING by default);
+    the slow-query log optionally goes to its own file (MARCOM_SLOW_QUERY_LOG).
+    """
+    level = level or os.environ.get('MARCOM_LOG_LEVEL', 'WARNING').upper()
+    logging.basicConfig(level=level, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    path = slow_query_log or os.environ.get('MARCOM_SLOW_QUERY_LOG')
+    if path:
+        handler = logging.FileHandler(path, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_logger.addHandler(handler)
+
+def query_shape(query):
+    """
+    Normalizes a query to its shape: literals replaced by '?', whitespace collapsed.
+    """
+    shape = re.sub(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"", "?", query)
+    shape = re.sub(r"\b\d+(?:\.\d+)?\b", "?", shape)
+    return ' '.join(shape.split())
+
+def parameters_fingerprint(parameters):
+    """
+    Returns a short, stable hash of the query parameters (values are never logged).
+    """
+    if not parameters:
+        return '-'
+    encoded = json.dumps(parameters, sort_keys=True, default=str).encode()
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+def plan_db_hits(plan):
+    """
+    Returns the total db hits of a profiled plan.
+    """
+    if not plan:
+        return 0
+    return (plan.get('dbHits') or 0) + sum(plan_db_hits(child) for child in plan.get('children') or [])
+
+def format_plan(plan, depth=0):
+    """
+    Formats a profiled plan as an indented operator tree with db hits and rows.
+    """
+    if not plan:
+        return []
+    lines = [f"{'  ' * depth}{plan.get('operatorType')} dbHits={plan.get('dbHits', 0)} rows={plan.get('rows', 0)}"]
+    for child in plan.get('children') or []:
+        lines.extend(format_plan(child, depth + 1))
+    return lines
+
+def record_summary(query, parameters, summary, rows):
+    """
+    Records one executed query: metrics, debug log, and the slow-query log when over the threshold.
+    Returns the logged entry.
+    """
+    available = summary.result_available_after or 0
+    consumed = summary.result_consumed_after or 0
+    entry = {
+        'shape': query_shape(query),
+        'parameters': parameters_fingerprint(parameters),
+        'available_after_ms': available,
+        'consumed_after_ms': consumed,
+        'rows': rows,
+    }
+    profile = getattr(summary, 'profile', None)
+    if profile:
+        entry['db_hits'] = plan_db_hits(profile)
+
+    mrcm_metrics.histogram('marcom_neo4j_server_seconds', "Neo4j server time per query (available + consumed).").observe((available + consumed) / 1000)
+    mrcm_metrics.counter('marcom_neo4j_rows_total', "Rows returned by Neo4j queries.").inc(rows)
+
+    logger.debug("query %s", json.dumps(entry))
+    if available + consumed >= SLOW_QUERY_MS:
+        mrcm_metrics.counter('marcom_neo4j_slow_queries_total', "Queries over the slow-query threshold.").inc()
+        slow_logger.warning("slow query %s", json.dumps(entry))
+    if profile:
+        logger.info("profile %s\n%s", entry['shape'], '\n'.join(format_plan(profile)))
+    return entry
+
+def prepare(query):
+    """
+    Returns the query text to send, prefixed with PROFILE when profiling is enabled (schema commands excepted).
+    """
+    if PROFILE_QUERIES and not query.lstrip().upper().startswith(SCHEMA_COMMANDS):
+        return f"PROFILE {query}"
+    return query
+
+def run_query(runner, query, parameters=None):
+    """
+    Runs a query on a session or transaction, returns its records as dictionaries and records its summary.
+    """
+    result = runner.run(prepare(query), parameters or {})
+    records = result.data()
+    record_summary(query, parameters, result.consume(), len(records))
+    return records
+
+def stream_query(runner, query, parameters=None):
+    """
+    Runs a query and yields its records as dictionaries as the driver fetches them, without holding
+    the whole result; the summary is recorded once the result is exhausted.
+    """
+    result = runner.run(prepare(query), parameters or {})
+    rows = 0
+    for record in result:
+        rows += 1
+        yield record.data()
+    record_summary(query, parameters, result.consume(), rows)
@@ -0,0 +1,216 @@
+import re
+
+from mrcm_tag_index import normalize_tag
+
+# Upper bound of comp_size (characters) for each size filter offered in the web UI
+SIZE_LIMITS = {
+    "bullet": 50,
+    "summary": 500,
+    "description": 1000,
+    "overview": 3000,
+}
+
+# Result field names and the Component node property behind each one
+COMPONENT_FIELDS = {
+    "key": "comp_key",
+    "name": "comp_name",
+    "domain": "comp_domain",
+    "about": "comp_about",
+    "context": "comp_context",
+    "size": "comp_size",
+    "link": "comp_link",
+    "comment": "comp_comment",
+    "tagged_taxonomy": "comp_tagged_taxonomy",    # taxonomy fingerprint the tag relations were matched against
+    "extracted_tags": "comp_extracted_tags",      # normalized tags extracted from the content
+    "sections": "comp_sections",                  # number of Section nodes the content is split into
+}
+
+# Section result fields and the Section node property behind each one
+SECTION_FIELDS = {
+    "section": "sec_position",
+    "section_size": "sec_size",
+    "section_key": "sec_key",
+}
+
+# Result field holding the names of the component's tags, aggregated into one row per component
+TAGS_FIELD = "tags"
+
+# Fields returned by listing queries (content is stored apart, see GraphStore.fetch_content)
+LIST_FIELDS = ["name", "domain", "about", "context", "size", "key"]
+
+# Search filters and the Component property each one compares for equality
+PROPERTY_FILTERS = {
+    "domain": "comp_domain",
+    "about": "comp_about",
+    "context": "comp_context",
+}
+
+def parse_tag_criteria(criteria):
+    """
+    Parses tag criteria such as "'cloud' & ('payments' | 'banking')" into a nested tuple expression:
+    ('tag', term), ('and', left, right) or ('or', left, right). '&' binds tighter than '|'.
+    Raises ValueError if the criteria are malformed.
+    """
+    tokens = re.findall(r"[()&|]|'[^']+'|[^\s()&|']+", criteria)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or():
+        expr = parse_and()
+        while peek() == '|':
+            take()
+            expr = ('or', expr, parse_and())
+        return expr
+
+    def parse_and():
+        expr = parse_term()
+        while peek() == '&':
+            take()
+            expr = ('and', expr, parse_term())
+        return expr
+
+    def parse_term():
+        token = peek()
+        if token is None:
+            raise ValueError("Criteria ended unexpectedly.")
+        take()
+        if token == '(':
+            expr = parse_or()
+            if peek() != ')':
+                raise ValueError("Missing closing parenthesis.")
+            take()
+            return expr
+        if token.startswith("'") and token.endswith("'") and len(token) > 2:
+            return ('tag', normalize_tag(token[1:-1]))
+        raise ValueError(f"Unexpected token {token!r} (tags must be quoted).")
+
+    expr = parse_or()
+    if peek() is not None:
+        raise ValueError(f"Unexpected token {peek()!r}.")
+    return expr
+
+def criteria_tags(expr):
+    """
+    Returns the tag terms used in a criteria expression.
+    """
+    if expr[0] == 'tag':
+        return [expr[1]]
+    return criteria_tags(expr[1]) + criteria_tags(expr[2])
+
+def criteria_to_cypher(expr, parameters):
+    """
+    Translates a criteria expression into a Cypher predicate on the component `c`.
+    A term matches when one of the component's tags contains it (case-insensitive).
+    """
+    if expr[0] == 'tag':
+        name = f"criteria_{len(parameters)}"
+        parameters[name] = expr[1]
+        return f"EXISTS {{ MATCH (c)-[:HAS_TAG]->(ct:Tag) WHERE toLower(ct.tag_name) CONTAINS ${name} }}"
+    operator = " AND " if expr[0] == 'and' else " OR "
+    return "(" + criteria_to_cypher(expr[1], parameters) + operator + criteria_to_cypher(expr[2], parameters) + ")"
+
+def criteria_matches(expr, tag_names):
+    """
+    Evaluates a criteria expression against a component's normalized tag names.
+    """
+    if expr[0] == 'tag':
+        return any(expr[1] in tag_name for tag_name in tag_names)
+    if expr[0] == 'and':
+        return criteria_matches(expr[1], tag_names) and criteria_matches(expr[2], tag_names)
+    return criteria_matches(expr[1], tag_names) or criteria_matches(expr[2], tag_names)
+
+def tags_clause(fields):
+    """
+    Builds the clause collecting the tag names of each component `c` (once per component) when TAGS_FIELD is requested.
+    """
+    if TAGS_FIELD not in fields:
+        return ""
+    return "WITH DISTINCT c OPTIONAL MATCH (c)-[:HAS_TAG]->(rt:Tag) WITH c, collect(DISTINCT rt.tag_name) AS tags "
+
+def return_clause(fields):
+    """
+    Builds the RETURN clause projecting Component properties (and collected tags) to result field names.
+    """
+    return tags_clause(fields) + "RETURN " + ", ".join(
+        TAGS_FIELD if field == TAGS_FIELD else f"c.{COMPONENT_FIELDS[field]} AS {field}" for field in fields)
+
+def match_clause(filters, parameters, size=True, after=None, node="(c:Component)"):
+    """
+    Builds the MATCH ... WHERE part of a component search, adding its parameters.
+    Filters: domain, about, context (equality), size (SIZE_LIMITS bucket, unless `size` is False),
+    tag (exact tag name) and criteria (expression from parse_tag_criteria). `after` keeps the
+    components whose comp_key comes after it. `node` is the component pattern.
+    """
+    query = f"MATCH {node} "
+    conditions = []
+
+    if filters.get('tag'):
+        query = f"MATCH {node}-[:HAS_TAG]->(t:Tag) "
+        conditions.append("toLower(t.tag_name) = $tag")
+        parameters['tag'] = normalize_tag(filters['tag'])
+
+    # Add conditions based on selected filters
+    for name, prop in PROPERTY_FILTERS.items():
+        if filters.get(name):
+            conditions.append(f"c.{prop} = ${name}")
+            parameters[name] = filters[name]
+    if size and filters.get('size') in SIZE_LIMITS:
+        conditions.append("c.comp_size <= $max_size")
+        parameters['max_size'] = SIZE_LIMITS[filters['size']]
+    if filters.get('criteria'):
+        conditions.append(criteria_to_cypher(filters['criteria'], parameters))
+    if after is not None:
+        conditions.append("c.comp_key > $after")
+        parameters['after'] = after
+
+    # If conditions exist, append them to the query
+    if conditions:
+        query += "WHERE " + " AND ".join(conditions)
+    return query
+
+def build_component_search(filters=None, fields=LIST_FIELDS, ordered=False, after=None, limit=None):
+    """
+    Builds the parameterized Cypher query for a component search (see match_clause for the filters).
+    Returns the query string and its parameters. With `ordered`, results come in comp_key order,
+    starting after the `after` comp_key (a cursor), at most `limit` of them.
+    """
+    parameters = {}
+    # An ordered search always has a comp_key range predicate (from '', every key, on the first page):
+    # with it the planner can read the comp_key uniqueness constraint's index in order instead of sorting
+    query = match_clause(filters or {}, parameters, after=(after or '') if ordered else None)
+
+    # Complete the query
+    query += " " + return_clause(fields)
+    if ordered:
+        query += " ORDER BY c.comp_key"
+        if limit is not None:
+            query += " LIMIT $limit"
+            parameters['limit'] = limit
+
+    return query, parameters
+
+def build_section_search(filters=None, fields=LIST_FIELDS):
+    """
+    Builds the parameterized Cypher query returning the Sections that fit the size filter, with the
+    fields of their component: the size bucket applies to each section rather than to the whole component.
+    Other filters select the components as in build_component_search. Tags cannot be requested.
+    The query starts from the sec_size index, then looks up each section's component by comp_key.
+    """
+    filters = filters or {}
+    parameters = {}
+    query = "MATCH (s:Section) "
+    if filters.get('size') in SIZE_LIMITS:
+        query += "WHERE s.sec_size <= $max_size "
+        parameters['max_size'] = SIZE_LIMITS[filters['size']]
+    query += match_clause(filters, parameters, size=False, node="(c:Component {comp_key: s.comp_key})")
+    query += " WITH DISTINCT c, s RETURN " + ", ".join(
+        [f"c.{COMPONENT_FIELDS[field]} AS {field}" for field in fields if field != TAGS_FIELD]
+        + [f"s.{prop} AS {field}" for field, prop in SECTION_FIELDS.items()])
+    return query, parameters
@@ -0,0 +1,176 @@
+import csv
+import gzip
+import json
+import os
+import time
+
+import mrcm_metrics
+from mrcm_search import COMPONENT_FIELDS
+
+# Snapshot files, in the CSV layout of `neo4j-admin database import full` (gzip-compressed CSV is accepted as is)
+COMPONENTS_FILE = 'components.csv.gz'
+TAGS_FILE = 'tags.csv.gz'
+HAS_TAG_FILE = 'has_tag.csv.gz'
+MANIFEST_FILE = 'manifest.json'
+
+# Component columns: (header, result field, neo4j-admin type); comp_key is the node ID.
+# The content goes in comp_content: neo4j-admin stores it on the node, to be moved with
+# `util_graph-migrations.py move-content`; import_snapshot writes Content nodes directly.
+COMPONENT_COLUMNS = [
+    ('comp_key:ID(Component)', 'key', 'string'),
+    ('comp_name', 'name', 'string'),
+    ('comp_domain', 'domain', 'string'),
+    ('comp_about', 'about', 'string'),
+    ('comp_context', 'context', 'string'),
+    ('comp_size:int', 'size', 'int'),
+    ('comp_link', 'link', 'string'),
+    ('comp_comment', 'comment', 'string'),
+    ('comp_tagged_taxonomy', 'tagged_taxonomy', 'string'),
+    ('comp_extracted_tags:string[]', 'extracted_tags', 'string[]'),
+    ('comp_content', 'content', 'string'),
+]
+
+# Array delimiter (pass --array-delimiter=TAB to neo4j-admin). Extracted tags are normalized to single spaces,
+# so they never contain a tab, while ';' (neo4j-admin's default) and '|' occur in noun phrases and tables.
+# The manifest records it; snapshots without one were written with '|'.
+ARRAY_DELIMITER = '\t'
+LEGACY_ARRAY_DELIMITER = '|'
+
+def encode_value(value, value_type):
+    """
+    Formats a property value as a CSV field (None as an empty field).
+    Raises ValueError for an array element containing the array delimiter, which would be split on import.
+    """
+    if value is None:
+        return ''
+    if value_type == 'string[]':
+        for element in value:
+            if ARRAY_DELIMITER in element:
+                raise ValueError(f"Array element {element!r} contains the array delimiter.")
+        return ARRAY_DELIMITER.join(value)
+    return value
+
+def decode_value(value, value_type, array_delimiter=ARRAY_DELIMITER):
+    """
+    Parses a CSV field written by encode_value. An empty field is read back as None (no property), as
+    neo4j-admin loads it: the CSV format has no separate null, so an empty string or array is not kept.
+    """
+    if not value:
+        return None
+    if value_type == 'int':
+        return int(value)
+    if value_type == 'string[]':
+        return value.split(array_delimiter)
+    return value
+
+def open_csv(path, mode):
+    return gzip.open(path, mode + 't', encoding='utf-8', newline='')
+
+def export_snapshot(store, directory, batch_size=1000):
+    """
+    Writes the Components (with their content), Tags and HAS_TAG relations of a store to a snapshot directory.
+    Returns the manifest (counts per file).
+    """
+    os.makedirs(directory, exist_ok=True)
+    with mrcm_metrics.stage('snapshot.read_components'):
+        components = store.fetch_components(list(COMPONENT_FIELDS))
+
+    with open_csv(os.path.join(directory, COMPONENTS_FILE), 'w') as file:
+        writer = csv.writer(file)
+        writer.writerow([header for header, _, _ in COMPONENT_COLUMNS] + [':LABEL'])
+        for i in range(0, len(components), batch_size):
+            batch = components[i:i + batch_size]
+            with mrcm_metrics.stage('snapshot.read_content'):
+                contents = store.fetch_contents([component['key'] for component in batch])
+            with mrcm_metrics.stage('snapshot.write_components'):
+                for component in batch:
+                    component['content'] = contents.get(component['key'])
+                    writer.writerow([encode_value(component.get(field), value_type) for _, field, value_type in COMPONENT_COLUMNS] + ['Component'])
+
+    with mrcm_metrics.stage('snapshot.write_tags'):
+        tag_names = sorted(store.tag_weights())
+        with open_csv(os.path.join(directory, TAGS_FILE), 'w') as file:
+            writer = csv.writer(file)
+            writer.writerow(['tag_name:ID(Tag)', ':LABEL'])
+            writer.writerows([tag_name, 'Tag'] for tag_name in tag_names)
+
+    with mrcm_metrics.stage('snapshot.write_relations'):
+        links = store.fetch_tag_links()
+        with open_csv(os.path.join(directory, HAS_TAG_FILE), 'w') as file:
+            writer = csv.writer(file)
+            writer.writerow([':START_ID(Component)', ':END_ID(Tag)', ':TYPE'])
+            writer.writerows([comp_key, tag_name, 'HAS_TAG'] for comp_key, tag_name in links)
+
+    manifest = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'components': len(components),
+        'tags': len(tag_names),
+        'has_tag': len(links),
+        'array_delimiter': ARRAY_DELIMITER,
+    }
+    with open(os.path.join(directory, MANIFEST_FILE), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+def read_manifest(directory):
+    """
+    Returns the manifest of a snapshot ({} if it has none).
+    """
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.isfile(path):
+        return {}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+def read_component_rows(directory):
+    """
+    Yields the comp_* properties of every component in a snapshot. Columns are matched by header, so
+    columns of older snapshots that are no longer in COMPONENT_COLUMNS are skipped.
+    """
+    array_delimiter = read_manifest(directory).get('array_delimiter', LEGACY_ARRAY_DELIMITER)
+    value_types = {header: value_type for header, _, value_type in COMPONENT_COLUMNS}
+    with open_csv(os.path.join(directory, COMPONENTS_FILE), 'r') as file:
+        reader = csv.reader(file)
+        headers = next(reader)
+        for row in reader:
+            yield {header.split(':')[0]: decode_value(value, value_types[header], array_delimiter)
+                   for header, value in zip(headers, row) if header in value_types}
+
+def import_snapshot(store, directory, batch_size=1000):
+    """
+    Loads a snapshot into a store: tags first, then components with their content and tag relations,
+    batch_size components per transaction. Returns (components, relations) written.
+    """
+    with mrcm_metrics.stage('snapshot.read_tags'):
+        with open_csv(os.path.join(directory, TAGS_FILE), 'r') as file:
+            reader = csv.reader(file)
+            next(reader)
+            tag_names = [row[0] for row in reader]
+    store.ensure_constraints()
+    for i in range(0, len(tag_names), batch_size):
+        with mrcm_metrics.stage('snapshot.write_tags'):
+            store.upsert_tags(tag_names[i:i + batch_size])
+
+    with mrcm_metrics.stage('snapshot.read_relations'):
+        component_tags = {}
+        with open_csv(os.path.join(directory, HAS_TAG_FILE), 'r') as file:
+            reader = csv.reader(file)
+            next(reader)
+            for comp_key, tag_name, _ in reader:
+                component_tags.setdefault(comp_key, []).append(tag_name)
+
+    written = 0
+    relations = 0
+    batch = []
+    for properties in read_component_rows(directory):
+        batch.append((properties, component_tags.get(properties['comp_key'], [])))
+        if len(batch) >= batch_size:
+            with mrcm_metrics.stage('snapshot.write_components'):
+                relations += store.write_components(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        with mrcm_metrics.stage('snapshot.write_components'):
+            relations += store.write_components(batch)
+        written += len(batch)
+    return written, relations
@@ -0,0 +1,144 @@
+import hashlib
+import random
+
+# Size buckets (name, min chars, max chars, share of the corpus), aligned with the web UI size filters
+SIZE_BUCKETS = [
+    ("bullet", 20, 50, 0.20),
+    ("summary", 51, 500, 0.35),
+    ("description", 501, 1000, 0.25),
+    ("overview", 1001, 3000, 0.15),
+    ("long", 3001, 12000, 0.05),
+]
+
+# Property values offered by the web UI filters
+DOMAINS = ["PROMPT", "APP-SWE", "DGTLX", "GROWTH", "FINTK", "PROCESS", "AD-PROFILE"]
+ABOUTS = ["AD", "CIAD", "ITD2", "PALMA$$", "SFENA", "SLB", "TRT"]
+CONTEXTS = ["Case-Experience", "Submission", "Capability-Expertise", "Value-Proposal", "Service-Offer", "Profile Description"]
+
+# Vocabulary used to build tag phrases and filler sentences
+ADJECTIVES = [
+    "digital", "agile", "scalable", "secure", "integrated", "automated", "strategic", "customer",
+    "financial", "operational", "cloud", "mobile", "predictive", "regulatory", "global", "data",
+]
+NOUNS = [
+    "platform", "transformation", "analytics", "payments", "governance", "architecture", "roadmap",
+    "onboarding", "banking", "marketing", "workflow", "compliance", "delivery", "growth", "pipeline",
+    "experience", "strategy", "integration", "automation", "insight", "portfolio", "service",
+]
+VERBS = ["improves", "supports", "enables", "accelerates", "simplifies", "drives", "delivers", "reshapes"]
+FILLER = ["the team", "our clients", "each project", "the business", "a new market", "the organisation"]
+
+# Sentences per paragraph; paragraphs are separated by a blank line, as in the Notion export
+PARAGRAPH_SENTENCES = (1, 4)
+
+# Neo4j comp_comment marker set on synthetic components so benchmark data can be told apart and removed
+SYNTHETIC_MARKER = "synthetic-benchmark"
+
+def generate_taxonomy(num_tags, seed=0):
+    """
+    Generates `num_tags` unique one- to three-word tag names.
+    """
+    rng = random.Random(seed)
+    tags = []
+    seen = set()
+    attempts = 0
+    while len(tags) < num_tags:
+        attempts += 1
+        words = rng.randint(1, 3)
+        if words == 1:
+            tag = rng.choice(NOUNS)
+        else:
+            tag = ' '.join(rng.choice(ADJECTIVES) for _ in range(words - 1)) + ' ' + rng.choice(NOUNS)
+        # Once the vocabulary is exhausted, number the tags to keep them unique
+        if tag in seen and attempts > num_tags * 10:
+            tag = f"{tag} {len(tags)}"
+        if tag not in seen:
+            seen.add(tag)
+            tags.append(tag)
+    return tags
+
+def pick_size(rng):
+    """
+    Picks a target content length following the SIZE_BUCKETS distribution.
+    """
+    roll = rng.random()
+    for _, low, high, share in SIZE_BUCKETS:
+        if roll < share:
+            return rng.randint(low, high)
+        roll -= share
+    _, low, high, _ = SIZE_BUCKETS[-1]
+    return rng.randint(low, high)
+
+def generate_content(rng, length, taxonomy, hit_rate):
+    """
+    Generates about `length` characters of marketing-like text, in paragraphs separated by blank lines.
+    Each sentence mentions a taxonomy tag with probability `hit_rate`; returns the text and the tags used.
+    """
+    paragraphs = []
+    sentences = []
+    paragraph_sentences = rng.randint(*PARAGRAPH_SENTENCES)
+    used_tags = []
+    total = 0
+    while total < length:
+        if taxonomy and rng.random() < hit_rate:
+            tag = rng.choice(taxonomy)
+            used_tags.append(tag)
+            subject = f"the {tag}"
+        else:
+            subject = f"the {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"
+        sentence = f"{rng.choice(FILLER).capitalize()} {rng.choice(VERBS)} {subject} for {rng.choice(FILLER)}."
+        sentences.append(sentence)
+        total += len(sentence) + 1
+        if len(sentences) == paragraph_sentences:
+            paragraphs.append(' '.join(sentences))
+            sentences = []
+            paragraph_sentences = rng.randint(*PARAGRAPH_SENTENCES)
+            total += 1
+    if sentences:
+        paragraphs.append(' '.join(sentences))
+    text = '\n\n'.join(paragraphs)
+    if len(text) > length:
+        # Cut at a word boundary so the size lands in the intended bucket
+        text = text[:length].rsplit(None, 1)[0] or text[:length]
+    return text, [tag for tag in dict.fromkeys(used_tags) if tag in text]
+
+def generate_components(num_components, taxonomy, hit_rate=0.3, seed=0):
+    """
+    Generates `num_components` synthetic components shaped like the Notion export rows.
+    Each component carries its content, size, key and the taxonomy tags embedded in it.
+    """
+    rng = random.Random(seed)
+    components = []
+    for i in range(num_components):
+        # Suffix the index so keys stay unique even if two generated texts collide
+        suffix = f" #{i}"
+        content, tags = generate_content(rng, max(pick_size(rng) - len(suffix), 1), taxonomy, hit_rate)
+        content += suffix
+        components.append({
+            "Component Name": f"Synthetic component {i:06d}",
+            "Domain": rng.choice(DOMAINS),
+            "About": rng.choice(ABOUTS),
+            "Context": rng.choice(CONTEXTS),
+            "Source": f"https://drive.google.com/open?id=synthetic-{i:06d}",
+            "content": content,
+            "comp_size": len(content),
+            "comp_key": hashlib.sha256(content.encode()).hexdigest(),
+            "tags": tags,
+        })
+    return components
+
+def component_properties(component):
+    """
+    Maps a synthetic component to the Neo4j Component node properties used by the ingester.
+    """
+    return {
+        "comp_name": component["Component Name"],
+        "comp_domain": component["Domain"],
+        "comp_about": component["About"],
+        "comp_context": component["Context"],
+        "comp_comment": SYNTHETIC_MARKER,
+        "comp_link": component["Source"],
+        "comp_content": component["content"],
+        "comp_size": component["comp_size"],
+        "comp_key": component["comp_key"],
+    }
@@ -0,0 +1,154 @@
+import bisect
+import hashlib
+import heapq
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bound appended to a prefix to find the end of its range in the sorted keys
+PREFIX_END = '\U0010ffff'
+
+def normalize_tag(tag_name):
+    """
+    Normalizes a tag name for matching: trimmed, lowercase, single-spaced.
+    """
+    return ' '.join(str(tag_name).split()).lower()
+
+def taxonomy_fingerprint(tag_names):
+    """
+    Returns a short hash identifying a taxonomy (a set of tag names, compared normalized).
+    """
+    keys = sorted({normalize_tag(tag_name) for tag_name in tag_names})
+    return hashlib.sha256('\n'.join(keys).encode()).hexdigest()[:16]
+
+def match_tags(taxonomy, extracted_tags):
+    """
+    Returns the exact names of the taxonomy tags among the extracted tags, once each.
+    `taxonomy` maps normalized tag names to tag names.
+    """
+    matched = (taxonomy.get(normalize_tag(tag_name)) for tag_name in extracted_tags)
+    return list(dict.fromkeys(tag_name for tag_name in matched if tag_name))
+
+class TagIndex:
+    """
+    In-memory prefix index of tag names, weighted by the number of components carrying each tag.
+    Tags are kept in a sorted array so a prefix lookup is two bisects plus a top-k selection.
+    """
+
+    def __init__(self, weights=None):
+        merged = {}
+        names = {}
+        for tag_name, weight in (weights or {}).items():
+            key = normalize_tag(tag_name)
+            if not key:
+                continue
+            merged[key] = merged.get(key, 0) + (weight or 0)
+            names.setdefault(key, str(tag_name).strip())
+
+        self._keys = sorted(merged)
+        self._weights = [merged[key] for key in self._keys]
+        self._names = [names[key] for key in self._keys]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, tag_name):
+        key = normalize_tag(tag_name)
+        i = bisect.bisect_left(self._keys, key)
+        return i < len(self._keys) and self._keys[i] == key
+
+    def prefix_range(self, prefix):
+        """
+        Returns the (start, end) slice of the sorted keys that begin with the prefix.
+        """
+        key = normalize_tag(prefix)
+        start = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_left(self._keys, key + PREFIX_END, start)
+        return start, end
+
+    def suggest(self, prefix, limit=10):
+        """
+        Returns up to `limit` (tag_name, weight) pairs starting with the prefix, heaviest first.
+        """
+        start, end = self.prefix_range(prefix)
+        rank = lambda i: (-self._weights[i], self._keys[i])
+        if end - start <= limit:
+            positions = sorted(range(start, end), key=rank)
+        else:
+            positions = heapq.nsmallest(limit, range(start, end), key=rank)
+        return [(self._names[i], self._weights[i]) for i in positions]
+
+    def complete(self, prefix, limit=50):
+        """
+        Returns the tag names starting with the prefix, heaviest first (used for tab-completion).
+        """
+        return [tag_name for tag_name, _ in self.suggest(prefix, limit)]
+
+class TagIndexCache:
+    """
+    Holds the current TagIndex and rebuilds it when the taxonomy signature changes.
+    The signature is checked at most once every `check_interval` seconds, in a background thread, so lookups
+    are always served from memory and never wait for the store.
+    """
+
+    def __init__(self, loader, signature=None, check_interval=30):
+        self._loader = loader
+        self._signature = signature
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checking = threading.Lock()
+        self._index = TagIndex()
+        self._current_signature = None
+        self._checked_at = None
+
+    def refresh(self):
+        """
+        Rebuilds the index unconditionally.
+        """
+        signature = self._signature() if self._signature else None
+        index = TagIndex(self._loader())
+        with self._lock:
+            self._index = index
+            self._current_signature = signature
+            self._checked_at = time.monotonic()
+        return index
+
+    def warm(self):
+        """
+        Loads the index at startup; failures are reported and retried by the next check.
+        """
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.exception("Error loading tag index: %s", e)
+
+    def check(self):
+        """
+        Rebuilds the index if the taxonomy signature changed since it was built (or it never loaded),
+        unless another thread is already checking.
+        """
+        if not self._checking.acquire(blocking=False):
+            return
+        try:
+            if self._current_signature is None or not self._signature or self._signature() != self._current_signature:
+                self.refresh()
+        except Exception as e:
+            logger.exception("Error refreshing tag index: %s", e)
+        finally:
+            self._checking.release()
+
+    def get(self):
+        """
+        Returns the current index, starting a background check of the taxonomy signature if the last one
+        is older than the check interval (the rebuilt index is swapped in when ready).
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = self._checked_at is None or now - self._checked_at >= self._check_interval
+            if due:
+                self._checked_at = now
+        if due and not self._checking.locked():
+            threading.Thread(target=self.check, name='tag-index-check', daemon=True).start()
+        return self._index
@@ -0,0 +1,267 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import mrcm_synth
+from mrcm_graph_store import MemoryGraphStore, Neo4jGraphStore
+from mrcm_programs import PROGRAMS_DIR, load_program
+from mrcm_query_log import configure_logging, run_query
+from mrcm_search import SIZE_LIMITS
+
+# Neo4j connection settings (use a scratch instance: the benchmark writes synthetic data)
+NEO4J_URI = os.environ.get('MARCOM_NEO4J_URI', "bolt://localhost:7687")
+NEO4J_USER = "neo4j"
+NEO4J_PASSWORD = "marcomapp"
+
+# Stages in execution order
+STAGES = ['ingest', 'tag_load', 'nlp_extraction', 'relations', 'cli_query', 'web_search']
+
+def summarize(latencies):
+    """
+    Summarizes a list of per-operation latencies (seconds) into the reported statistics.
+    """
+    if not latencies:
+        return {'count': 0}
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    percentile = lambda p: ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+    return {
+        'count': len(ordered),
+        'total_s': round(total, 6),
+        'ops_per_s': round(len(ordered) / total, 3) if total else None,
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 4),
+        'p50_ms': round(percentile(0.50) * 1000, 4),
+        'p95_ms': round(percentile(0.95) * 1000, 4),
+        'max_ms': round(ordered[-1] * 1000, 4),
+    }
+
+def time_operations(items, operation):
+    """
+    Runs the operation on every item and returns the per-item latencies. Program output is discarded.
+    """
+    latencies = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for item in items:
+            start = time.perf_counter()
+            operation(item)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+def open_target(target):
+    """
+    Opens the graph store to benchmark: Neo4j, or the embedded in-memory store.
+    """
+    if target == 'neo4j':
+        store = Neo4jGraphStore(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+        store.ensure_constraints()
+        return store
+    return MemoryGraphStore()
+
+def remove_synthetic_data(store, taxonomy):
+    """
+    Deletes the synthetic components, and the synthetic tags left without relations, from Neo4j.
+    """
+    if not isinstance(store, Neo4jGraphStore):
+        return
+
+    def work(tx):
+        run_query(tx, "MATCH (c:Component {comp_comment: $marker}) OPTIONAL MATCH (x:Content {comp_key: c.comp_key}) "
+                      "OPTIONAL MATCH (c)-[:HAS_SECTION]->(s:Section) DETACH DELETE c, x, s",
+                  {'marker': mrcm_synth.SYNTHETIC_MARKER})
+        run_query(tx, "UNWIND $tags AS tag MATCH (t:Tag {tag_name: tag}) WHERE NOT (t)--() DELETE t", {'tags': taxonomy})
+
+    with store.driver.session(bookmark_manager=store.bookmarks) as session:
+        session.execute_write(work)
+
+def relate_tags(store, comp_key, filtered_tags):
+    """
+    Relates a component to the extracted tags that exist, like the relation builder does.
+    """
+    return sum(1 for tag_name in filtered_tags if store.link_tag(comp_key, tag_name))
+
+def generate_queries(num_queries, taxonomy, seed):
+    """
+    Generates the CLI query (constraints, criteria) and web search filter workloads.
+    """
+    rng = random.Random(seed)
+    property_values = {
+        'comp_domain': mrcm_synth.DOMAINS,
+        'comp_about': mrcm_synth.ABOUTS,
+        'comp_context': mrcm_synth.CONTEXTS,
+    }
+
+    cli_queries = []
+    for _ in range(num_queries):
+        chosen = rng.sample(sorted(property_values), rng.randint(1, 3))
+        constraints = {prop: (rng.choice(property_values[prop]) if prop in chosen else None) for prop in property_values}
+        criteria = f"'{rng.choice(taxonomy)}'" if taxonomy and rng.random() < 0.5 else None
+        cli_queries.append((constraints, criteria))
+
+    web_queries = []
+    for _ in range(num_queries):
+        web_queries.append({
+            'domain': rng.choice(mrcm_synth.DOMAINS) if rng.random() < 0.5 else None,
+            'about': rng.choice(mrcm_synth.ABOUTS) if rng.random() < 0.5 else None,
+            'context': rng.choice(mrcm_synth.CONTEXTS) if rng.random() < 0.5 else None,
+            'size': rng.choice([None] + list(SIZE_LIMITS)),
+            'tag': rng.choice(taxonomy) if taxonomy and rng.random() < 0.3 else None,
+        })
+    return cli_queries, web_queries
+
+def git_revision():
+    """
+    Returns the current git commit of the repository, if available.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PROGRAMS_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def run_benchmark(args):
+    """
+    Generates the corpus, times every stage on the selected target and returns the results document.
+    """
+    taxonomy = mrcm_synth.generate_taxonomy(args.tags, seed=args.seed)
+    components = mrcm_synth.generate_components(args.components, taxonomy, hit_rate=args.hit_rate, seed=args.seed)
+    cli_queries, web_queries = generate_queries(args.queries, taxonomy, args.seed)
+
+    queries_prg = load_program('prg-mrcm_n4j-ui_db-queries_v1.py')
+
+    stages = {}
+    store = open_target(args.target)
+    try:
+        print(f"Ingesting {len(components)} components...")
+        stages['ingest'] = summarize(time_operations(
+            [mrcm_synth.component_properties(c) for c in components], store.upsert_component))
+
+        print(f"Loading {len(taxonomy)} tags...")
+        stages['tag_load'] = summarize(time_operations(taxonomy, store.upsert_tag))
+
+        extracted = {}
+        if args.skip_nlp:
+            stages['nlp_extraction'] = {'count': 0, 'skipped': 'disabled with --skip-nlp'}
+        else:
+            print("Running NLP extraction...")
+            try:
+                relations_prg = load_program('prg-mrcm_n4j-ui_create-relations_comp-tag_v1.py')
+                # Loads the model (or reaches the NLP daemon) before timing starts
+                relations_prg.extract_tags_from_text("warm up")
+            except (ImportError, OSError) as e:
+                relations_prg = None
+                stages['nlp_extraction'] = {'count': 0, 'skipped': f"spaCy unavailable: {e}"}
+            if relations_prg:
+                stages['nlp_extraction'] = summarize(time_operations(
+                    components,
+                    lambda c: extracted.__setitem__(c['comp_key'], relations_prg.extract_tags_from_text(c['content']))))
+
+        # Without NLP, relate the tags the generator embedded in each component
+        print("Building relations...")
+        stages['relations'] = summarize(time_operations(
+            components,
+            lambda c: relate_tags(store, c['comp_key'], extracted.get(c['comp_key'], c['tags']))))
+
+        print(f"Running {len(cli_queries)} CLI queries and {len(web_queries)} web searches...")
+        stages['cli_query'] = summarize(time_operations(
+            cli_queries,
+            lambda q: queries_prg.execute_search(store, queries_prg.generate_search_filters(*q))))
+        stages['web_search'] = summarize(time_operations(web_queries, store.search_components))
+
+        if not args.keep_data:
+            remove_synthetic_data(store, taxonomy)
+    finally:
+        store.close()
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'target': args.target,
+            'components': args.components,
+            'tags': args.tags,
+            'hit_rate': args.hit_rate,
+            'queries': args.queries,
+            'seed': args.seed,
+        },
+        'stages': stages,
+    }
+
+def compare_results(current, baseline, tolerance):
+    """
+    Compares stage mean latencies with a baseline run and returns the list of regressed stages.
+    """
+    regressions = []
+    print(f"\n{'Stage':<16}{'Baseline ms':>14}{'Current ms':>14}{'Change':>10}")
+    for stage in STAGES:
+        old = baseline.get('stages', {}).get(stage, {}).get('mean_ms')
+        new = current['stages'].get(stage, {}).get('mean_ms')
+        if old is None or new is None:
+            print(f"{stage:<16}{'-':>14}{'-':>14}{'n/a':>10}")
+            continue
+        change = (new - old) / old if old else 0.0
+        flag = ''
+        if change > tolerance:
+            regressions.append(stage)
+            flag = '  REGRESSION'
+        print(f"{stage:<16}{old:>14.4f}{new:>14.4f}{change:>+10.1%}{flag}")
+    return regressions
+
+def print_results(results):
+    """
+    Prints the per-stage statistics of a run.
+    """
+    print(f"\n{'Stage':<16}{'Count':>8}{'Total s':>11}{'Ops/s':>11}{'Mean ms':>11}{'p50 ms':>11}{'p95 ms':>11}")
+    for stage in STAGES:
+        stats = results['stages'].get(stage, {})
+        if not stats.get('count'):
+            print(f"{stage:<16}{'skipped':>8}  {stats.get('skipped', '')}")
+            continue
+        print(f"{stage:<16}{stats['count']:>8}{stats['total_s']:>11.3f}{stats['ops_per_s'] or 0:>11.1f}"
+              f"{stats['mean_ms']:>11.4f}{stats['p50_ms']:>11.4f}{stats['p95_ms']:>11.4f}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Marcom ingest, tagging and query paths on a synthetic corpus.")
+    parser.add_argument('--target', choices=['memory', 'neo4j'], default='memory', help="Backend to benchmark (neo4j writes synthetic data to the configured instance).")
+    parser.add_argument('--components', type=int, default=1000, help="Number of synthetic components.")
+    parser.add_argument('--tags', type=int, default=200, help="Number of taxonomy tags.")
+    parser.add_argument('--hit-rate', type=float, default=0.3, help="Probability that a sentence mentions a taxonomy tag.")
+    parser.add_argument('--queries', type=int, default=200, help="Number of CLI queries and of web searches.")
+    parser.add_argument('--seed', type=int, default=42, help="Seed of the corpus generator.")
+    parser.add_argument('--skip-nlp', action='store_true', help="Skip spaCy extraction and relate the generated tags directly.")
+    parser.add_argument('--keep-data', action='store_true', help="Leave the synthetic data in Neo4j after the run.")
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    parser.add_argument('--baseline', help="Compare with a previous JSON results file.")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="Allowed mean latency increase before a stage is flagged (0.15 = 15%%).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    configure_logging()
+    args = parse_args(argv)
+    results = run_benchmark(args)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"\nResults written to '{args.output}'.")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare_results(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions detected in: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,21 @@
 import pandas as pd
-import hashlib
-from neo4j import GraphDatabase
 from datetime import datetime
+import argparse
 import os
-import io
 import csv
 
 # Google API libraries
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload  # Importing the MediaIoBaseDownload class
+
+import mrcm_metrics
+from mrcm_content_sources import open_content_source
+from mrcm_graph_store import Neo4jGraphStore
+from mrcm_query_log import configure_logging
 
 # Neo4j connection settings
-NEO4J_URI = "bolt://localhost:7687"
+NEO4J_URI = os.environ.get('MARCOM_NEO4J_URI', "bolt://localhost:7687")
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "marcomapp"  # Change this to your actual password
 
@@ -26,9 +27,9 @@ LOG_FILE_PATH = r'D:\##ITD2\#SWDEV-Projects\Marcom-Components\SWDEV\LOGS\log-mar
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 CREDENTIALS_PATH = 'D:\##ITD2\client_secret_google-drive_marcom-components.json'  # Path to your credentials file
 
-def authenticate_google_drive():
+def get_google_drive_credentials():
     """
-    Authenticates and returns the Google Drive service instance.
+    Authenticates and returns the Google Drive credentials, refreshing or creating token.json.
     """
     creds = None
     if os.path.exists('token.json'):
@@ -41,30 +42,7 @@ def authenticate_google_drive():
             creds = flow.run_local_server(port=0)
         with open('token.json', 'w') as token:
             token.write(creds.to_json())
-
-    return build('drive', 'v3', credentials=creds)
-
-def download_file_from_google_drive(service, file_id):
-    """
-    Downloads a file's content from Google Drive.
-    """
-    request = service.files().get_media(fileId=file_id)
-    file_content = io.BytesIO()
-    downloader = MediaIoBaseDownload(file_content, request)
-
-    done = False
-    while not done:
-        status, done = downloader.next_chunk()
-
-    return file_content.getvalue().decode('utf-8')
-
-def extract_file_id_from_url(url):
-    """
-    Extracts the file ID from a Google Drive link.
-    """
-    if 'id=' in url:
-        return url.split('id=')[1].split('&')[0]
-    return None
+    return creds
 
 def prompt_for_file():
     """
@@ -87,20 +65,17 @@ def prompt_for_file():
         else:
             print("Invalid input. Please enter [y]es, [x]exit, or [e/new file name].")
 
-def calculate_properties(row, service):
+def calculate_properties(row, source):
     """
-    Calculates properties of the component based on the CSV data.
+    Calculates properties of the component based on the CSV data, reading its content from the source.
     """
-    file_id = extract_file_id_from_url(row["Source"])
     comp_link = row["Source"]
 
-    if file_id:
-        comp_content = download_file_from_google_drive(service, file_id)
-        comp_size = len(comp_content)
-        comp_key = hashlib.sha256(comp_content.encode()).hexdigest()
-        return comp_link, comp_content, comp_size, comp_key
-    else:
-        raise ValueError("Invalid Google Drive link format.")
+    # The content is hashed while it is read
+    with mrcm_metrics.stage('read_content'):
+        comp_content, comp_key = source.fetch(comp_link, row["Component Name"])
+    comp_size = len(comp_content)
+    return comp_link, comp_content, comp_size, comp_key
 
 def log_operation(result, comp_name, comp_key):
     """
@@ -121,67 +96,67 @@ def log_operation(result, comp_name, comp_key):
         writer = csv.writer(log_file)
         writer.writerow([result, comp_name, comp_key, date_stamp, time_stamp])
 
-def create_component(tx, properties):
-    """
-    Sends a create/merge request to Neo4j to add/update a component node.
-    """
-    query = """
-    MERGE (c:Component {comp_key: $comp_key})
-    SET c.comp_name = $comp_name,
-        c.comp_domain = $comp_domain,
-        c.comp_about = $comp_about,
-        c.comp_context = $comp_context,
-        c.comp_comment = $comp_comment,
-        c.comp_link = $comp_link,
-        c.comp_content = $comp_content,
-        c.comp_size = $comp_size
-    RETURN c
-    """
-    tx.run(query, properties)
-
-def process_components(file_name, service):
-    """
-    Processes the components from the CSV file and sends requests to Neo4j.
-    """
-    # Connect to Neo4j
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    
-    try:
-        df = pd.read_csv(os.path.join(CSV_PATH, file_name))
-
-        for _, row in df.iterrows():
+def process_components(file_name, source, store):
+    """
+    Processes the components from the CSV file and sends them to the graph store.
+    """
+    df = pd.read_csv(os.path.join(CSV_PATH, file_name))
+    processed = mrcm_metrics.counter('marcom_components_processed_total', "Components processed by the ingester.", ('result',))
+
+    for _, row in df.iterrows():
+        try:
+            comp_link, comp_content, comp_size, comp_key = calculate_properties(row, source)
+            properties = {
+                "comp_name": row["Component Name"],
+                "comp_domain": row["Domain"],
+                "comp_about": row["About"],
+                "comp_context": row["Context"],
+                "comp_comment": "",  # Initially empty, can be modified later
+                "comp_link": comp_link,
+                "comp_content": comp_content,
+                "comp_size": comp_size,
+                "comp_key": comp_key
+            }
+            
             try:
-                comp_link, comp_content, comp_size, comp_key = calculate_properties(row, service)
-                properties = {
-                    "comp_name": row["Component Name"],
-                    "comp_domain": row["Domain"],
-                    "comp_about": row["About"],
-                    "comp_context": row["Context"],
-                    "comp_comment": "",  # Initially empty, can be modified later
-                    "comp_link": comp_link,
-                    "comp_content": comp_content,
-                    "comp_size": comp_size,
-                    "comp_key": comp_key
-                }
-                
-                with driver.session() as session:
-                    try:
-                        session.write_transaction(create_component, properties)
-                        log_operation('Added component', properties['comp_name'], properties['comp_key'])
-                        print(f"Component '{properties['comp_name']}' processed and added to Neo4j.")
-                    except Exception as e:
-                        log_operation(f'Failed to add component: {str(e)}', properties['comp_name'], properties['comp_key'])
-                        print(f"Failed to process component '{properties['comp_name']}': {e}")
+                with mrcm_metrics.stage('neo4j_merge'):
+                    store.upsert_component(properties)
+                with mrcm_metrics.stage('log_write'):
+                    log_operation('Added component', properties['comp_name'], properties['comp_key'])
+                processed.inc(result='added')
+                print(f"Component '{properties['comp_name']}' processed and added to Neo4j.")
             except Exception as e:
-                print(f"Error processing file: {str(e)}")
-
-    finally:
-        driver.close()
+                log_operation(f'Failed to add component: {str(e)}', properties['comp_name'], properties['comp_key'])
+                processed.inc(result='failed')
+                print(f"Failed to process component '{properties['comp_name']}': {e}")
+        except Exception as e:
+            processed.inc(result='error')
+            print(f"Error processing file: {str(e)}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Creates the Component nodes from the Notion export CSV.")
+    parser.add_argument('--source', default='drive',
+                        help="Where component content is read from: 'drive' (the Source links, default), or a Notion "
+                             "export as a directory or .zip archive (files matched by Source path or component name).")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    # Authenticate Google Drive
-    drive_service = authenticate_google_drive()
+    configure_logging()
+    args = parse_args()
+
+    # Open the content source (authenticates Google Drive for 'drive')
+    credentials = get_google_drive_credentials() if args.source == 'drive' else None
+    source = open_content_source(args.source, credentials)
 
     # Prompt for CSV file
     csv_file_name = prompt_for_file()
-    process_components(csv_file_name, drive_service)
+
+    # Connect to Neo4j
+    store = Neo4jGraphStore(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+
+    try:
+        process_components(csv_file_name, source, store)
+    finally:
+        source.close()
+        store.close()
+        mrcm_metrics.print_stage_report()
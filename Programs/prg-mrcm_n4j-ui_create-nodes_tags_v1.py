@@ -1,11 +1,14 @@
 import pandas as pd
-from neo4j import GraphDatabase
 from datetime import datetime
 import os
 import csv
 
+import mrcm_metrics
+from mrcm_graph_store import Neo4jGraphStore
+from mrcm_query_log import configure_logging
+
 # Neo4j connection settings
-NEO4J_URI = "bolt://localhost:7687"
+NEO4J_URI = os.environ.get('MARCOM_NEO4J_URI', "bolt://localhost:7687")
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "marcomapp"  # Change this to your actual password
 
@@ -53,58 +56,44 @@ def log_operation(result, tag_name):
         writer = csv.writer(log_file)
         writer.writerow([result, tag_name, date_stamp, time_stamp])
 
-def create_tag_constraint(tx):
-    """
-    Creates a unique constraint on the 'tag-name' property of the 'Tags' Node.
-    """
-
-    constraint_query = "CREATE CONSTRAINT IF NOT EXISTS FOR (t:Tag) REQUIRE t.tag_name IS UNIQUE"
-    tx.run(constraint_query)
-
-def create_or_merge_tag(tx, tag_name):
-    """
-    Sends a create/merge request to Neo4j to add/update a tag node.
+def process_tags(file_name, store):
     """
-    query = """
-    MERGE (t:Tag {tag_name: $tag_name})
-    RETURN t
+    Processes the tags from the CSV file and sends them to the graph store.
     """
-    result = tx.run(query, tag_name=tag_name)
-    return result.single()
-
-def process_tags(file_name):
-    """
-    Processes the tags from the CSV file and sends requests to Neo4j.
-    """
-    # Connect to Neo4j
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    
-    try:
-        with driver.session() as session:
-            # Create unique constraint on tag-name
-            session.write_transaction(create_tag_constraint)
+    # Create unique constraint on tag-name
+    with mrcm_metrics.stage('neo4j_constraint'):
+        store.ensure_constraints()
 
+    with mrcm_metrics.stage('csv_read'):
         df = pd.read_csv(os.path.join(CSV_PATH, file_name))
 
-        with driver.session() as session:
-            for _, row in df.iterrows():
-                tag_name = row['Tag'].strip()
-                try:
-                    result = session.write_transaction(create_or_merge_tag, tag_name)
-                    if result:
-                        log_operation('Added tag', tag_name)
-                        print(f"Tag '{tag_name}' processed and added to Neo4j.")
-                    else:
-                        log_operation('Failed to add tag', tag_name)
-                        print(f"Failed to process tag '{tag_name}'.")
-                except Exception as e:
-                    log_operation(f'Error: {str(e)}', tag_name)
-                    print(f"Error processing tag '{tag_name}': {e}")
-
-    finally:
-        driver.close()
+    for _, row in df.iterrows():
+        tag_name = row['Tag'].strip()
+        try:
+            with mrcm_metrics.stage('neo4j_merge'):
+                added = store.upsert_tag(tag_name)
+            if added:
+                with mrcm_metrics.stage('log_write'):
+                    log_operation('Added tag', tag_name)
+                print(f"Tag '{tag_name}' processed and added to Neo4j.")
+            else:
+                log_operation('Failed to add tag', tag_name)
+                print(f"Failed to process tag '{tag_name}'.")
+        except Exception as e:
+            log_operation(f'Error: {str(e)}', tag_name)
+            print(f"Error processing tag '{tag_name}': {e}")
 
 if __name__ == "__main__":
+    configure_logging()
+
     # Prompt for CSV file
     csv_file_name = prompt_for_file()
-    process_tags(csv_file_name)
+
+    # Connect to Neo4j
+    store = Neo4jGraphStore(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+
+    try:
+        process_tags(csv_file_name, store)
+    finally:
+        store.close()
+        mrcm_metrics.print_stage_report()
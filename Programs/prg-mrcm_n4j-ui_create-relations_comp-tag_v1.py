@@ -1,20 +1,30 @@
 import os
 import csv
-import spacy
-from neo4j import GraphDatabase
+import argparse
+import multiprocessing
 from datetime import datetime
 
-# Initialize the NLP model (ensure spaCy's English model is installed)
-nlp = spacy.load("en_core_web_sm")
+import mrcm_metrics
+import mrcm_nlp
+from mrcm_graph_store import Neo4jGraphStore
+from mrcm_query_log import configure_logging
+from mrcm_tag_index import match_tags, normalize_tag, taxonomy_fingerprint
 
 # Neo4j connection settings
-NEO4J_URI = "bolt://localhost:7687"
+NEO4J_URI = os.environ.get('MARCOM_NEO4J_URI', "bolt://localhost:7687")
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "marcomapp"
 
 # Log file path
 LOG_FILE_PATH = r'D:\##ITD2\#SWDEV-Projects\Marcom-Components\SWDEV\LOGS\log-marcom_comp-relation-tag_operations.csv'
 
+# First line of a checkpoint journal: the taxonomy fingerprint its components were tagged against
+CHECKPOINT_HEADER = "# taxonomy {}"
+
+# Store and taxonomy used by a relation-building worker process (see init_worker)
+worker_store = None
+worker_taxonomy = None
+
 # Explicit set for filter words
 FILTER_WORDS = {'a', 'an', 'the', 'my', 'i'}
 
@@ -23,8 +33,13 @@ def extract_tags_from_text(text):
     Extracts meaningful tags from the text using NLP.
     This uses Named Entity Recognition (NER) and keyword extraction.
     """
-    doc = nlp(text)
-    
+    return filter_tags(mrcm_nlp.nlp(text))
+
+def filter_tags(doc):
+    """
+    Returns the tags of an annotated text (see mrcm_nlp.annotate).
+    """
+
     # Collect named entities as tags
     original_tags = []
     filtered_tags = []
@@ -73,45 +88,32 @@ def log_operation(result, tag_name, comp_name, relations_count=None):
             writer.writerow(['Operation Result', 'Tag Name', 'Component Name', 'Date', 'Time', 'Relations Count'])  # Write header only once
         writer.writerow([result, tag_name, comp_name, date_stamp, time_stamp, relations_count if relations_count is not None else ''])
 
-def fetch_components_from_neo4j(driver):
+def fetch_components_from_neo4j(store):
     """
-    Fetch all Component nodes from Neo4j.
+    Fetch all Component nodes from the graph store (content is loaded per processed component).
     """
-    query = "MATCH (c:Component) RETURN c.comp_name AS name, c.comp_domain AS domain, c.comp_about AS about, c.comp_context AS context, c.comp_size AS size, c.comp_content AS content, c.comp_key AS key"
-    with driver.session() as session:
-        result = session.run(query)
-        return result.data()
+    return store.fetch_components(['name', 'domain', 'about', 'context', 'size', 'key'])
 
-def create_relationships(driver, comp_name, comp_key, filtered_tags):
+def create_relationships(store, comp_name, comp_key, filtered_tags):
     """
-    Create or merge relationships between Component and Tag nodes in Neo4j.
+    Create or merge relationships between Component and Tag nodes in the graph store.
     """
     relationships_created = 0  # Counter for the number of relationships created
+    tag_results = mrcm_metrics.counter('marcom_extracted_tags_total', "Extracted tags, by whether they matched a taxonomy tag.", ('result',))
 
-    with driver.session() as session:
-        for tag_name in filtered_tags:
-            # Check if Tag exists (case-insensitive)
-            check_query = "MATCH (t:Tag) WHERE toLower(t.tag_name) = $tag_name RETURN t"
-            tag_exists = session.run(check_query, tag_name=tag_name).single()
-
-            if tag_exists:
-                # Create/merge the relationships
-                merge_query1 = """
-                MATCH (c:Component {comp_key: $comp_key}), (t:Tag {tag_name: $tag_name})
-                MERGE (c)-[:HAS_TAG]->(t)
-                """
-                merge_query2 = """
-                MATCH (c:Component {comp_key: $comp_key}), (t:Tag {tag_name: $tag_name})
-                MERGE (t)-[:TAG_OF]->(c)
-                """
-                session.run(merge_query1, comp_key=comp_key, tag_name=tag_name)
-                session.run(merge_query2, comp_key=comp_key, tag_name=tag_name)
+    for tag_name in filtered_tags:
+        # Relate the tag if it exists (matched case-insensitively)
+        with mrcm_metrics.stage('tag_link'):
+            linked = store.link_tag(comp_key, tag_name)
+        with mrcm_metrics.stage('log_write'):
+            if linked:
                 print(f"Related tag '{tag_name}' with Component '{comp_name}'.")
                 log_operation('related tag', tag_name, comp_name)
                 relationships_created += 1  # Increment the counter
             else:
                 print(f"Skipped tag '{tag_name}' for Component '{comp_name}' as it does not exist.")
                 log_operation('skipped tag', tag_name, comp_name)
+        tag_results.inc(result='related' if linked else 'skipped')
 
     # Print and log the number of relationships created for the current component
     print(f"Total relationships created for Component '{comp_name}': {relationships_created}")
@@ -132,11 +134,12 @@ def prompt_user_for_processing(comp_data, process_all):
     user_input = input("[a]ll to process all, [y]es to process this Component, [s]kip to next, [x] to exit: ").strip().lower()
     return user_input
 
-def process_components(driver):
+def process_components(store):
     """
     Process components to create relationships with tags.
     """
-    components = fetch_components_from_neo4j(driver)
+    with mrcm_metrics.stage('fetch_components'):
+        components = fetch_components_from_neo4j(store)
     process_all = False  # Flag to check if 'All' option is selected
     
     for comp_data in components:
@@ -153,16 +156,202 @@ def process_components(driver):
             process_all = True
             user_input = 'y'  # Set to 'yes' to process the current component
         if user_input == 'y':
-            filtered_tags = extract_tags_from_text(comp_data['content'])
-            create_relationships(driver, comp_data['name'], comp_data['key'], filtered_tags)
+            with mrcm_metrics.stage('fetch_content'):
+                content = store.fetch_content(comp_data['key'])
+            with mrcm_metrics.stage('nlp_extraction'):
+                filtered_tags = extract_tags_from_text(content or '')
+            create_relationships(store, comp_data['name'], comp_data['key'], filtered_tags)
         else:
             print("Invalid input. Please enter [a], [y], [s], or [x].")
 
+def load_checkpoint(checkpoint_path, fingerprint):
+    """
+    Returns the comp_keys recorded as completed in the checkpoint journal, or None if there is no journal
+    or it was written against another taxonomy (its components would keep stale tags).
+    """
+    if not checkpoint_path or not os.path.isfile(checkpoint_path):
+        return None
+    with open(checkpoint_path, encoding='utf-8') as journal:
+        if journal.readline().strip() != CHECKPOINT_HEADER.format(fingerprint):
+            print(f"Checkpoint '{checkpoint_path}' was written against another taxonomy; starting over.")
+            return None
+        return {line.strip() for line in journal if line.strip()}
+
+def open_checkpoint(checkpoint_path, fingerprint, resume):
+    """
+    Opens the checkpoint journal for appending, starting a new one (header only) unless resuming.
+    """
+    if resume:
+        return open(checkpoint_path, 'a', encoding='utf-8')
+    journal = open(checkpoint_path, 'w', encoding='utf-8')
+    journal.write(CHECKPOINT_HEADER.format(fingerprint) + "\n")
+    journal.flush()
+    os.fsync(journal.fileno())
+    return journal
+
+def append_checkpoint(journal, comp_keys):
+    """
+    Records completed comp_keys in the checkpoint journal, synced to disk before returning.
+    """
+    journal.write(''.join(f"{comp_key}\n" for comp_key in comp_keys))
+    journal.flush()
+    os.fsync(journal.fileno())
+
+def shard_keys(comp_keys, batch_size):
+    """
+    Splits the comp_keys into contiguous comp_key ranges of at most batch_size keys.
+    """
+    comp_keys = sorted(comp_keys)
+    return [comp_keys[i:i + batch_size] for i in range(0, len(comp_keys), batch_size)]
+
+def load_taxonomy(store):
+    """
+    Returns the current taxonomy as ({normalized tag name: tag name}, fingerprint), and records it
+    as a snapshot so later delta runs can diff against it.
+    """
+    tag_names = list(store.tag_weights())
+    fingerprint = taxonomy_fingerprint(tag_names)
+    store.save_taxonomy_snapshot(fingerprint, tag_names)
+    return {normalize_tag(tag_name): tag_name for tag_name in tag_names}, fingerprint
+
+def init_worker(uri, user, password, taxonomy):
+    """
+    Opens the worker's own connection. Workers load their own spaCy model on first use rather than
+    sharing the NLP daemon, which would serialize their extraction.
+    """
+    global worker_store, worker_taxonomy
+    mrcm_nlp.configure('')
+    worker_store = Neo4jGraphStore(uri, user, password)
+    worker_taxonomy = taxonomy
+
+def tag_batch(comp_keys, store=None, taxonomy=None):
+    """
+    Extracts the tags of a batch of components and replaces their tag relations in one transaction.
+    Returns (comp_keys, relations written, [(stage, seconds)]).
+    """
+    store = store or worker_store
+    tags, fingerprint = taxonomy or worker_taxonomy
+    timings = mrcm_metrics.Registry()
+    with timings.stage('fetch_content'):
+        contents = store.fetch_contents(comp_keys)
+    rows = []
+    with timings.stage('nlp_extraction'):
+        docs = mrcm_nlp.annotate(content or '' for content in contents.values())
+        for comp_key, doc in zip(contents, docs):
+            extracted_tags = list(dict.fromkeys(normalize_tag(tag_name) for tag_name in filter_tags(doc)))
+            rows.append((comp_key, extracted_tags, match_tags(tags, extracted_tags)))
+    with timings.stage('tag_link'):
+        linked = store.replace_component_tags(rows, fingerprint)
+    return comp_keys, linked, [(stage, total) for stage, _, total in timings.stage_breakdown()]
+
+def retag_taxonomy_changes(store, taxonomy, batch_size=50):
+    """
+    Delta tagging: re-matches, from their stored extracted tags, the components whose tags are affected
+    by the taxonomy changes since they were tagged. Returns the comp_keys of the components that were never
+    tagged, which need NLP extraction. The comp_key is the hash of the content, so changed content is
+    always a new, untagged component.
+    """
+    tags, fingerprint = taxonomy
+    snapshots = store.fetch_taxonomy_snapshots()
+    untagged_keys = []
+    stale = {}  # tagged taxonomy fingerprint -> comp_keys
+    for comp_data in store.fetch_components(['key', 'tagged_taxonomy']):
+        if comp_data['tagged_taxonomy'] is None:
+            untagged_keys.append(comp_data['key'])
+        elif comp_data['tagged_taxonomy'] != fingerprint:
+            stale.setdefault(comp_data['tagged_taxonomy'], []).append(comp_data['key'])
+
+    rows = []
+    for tagged_taxonomy, comp_keys in stale.items():
+        # Tags added or removed since; without a snapshot every extracted tag is re-checked
+        previous = snapshots.get(tagged_taxonomy)
+        diff = set(tags) ^ {normalize_tag(tag_name) for tag_name in previous} if previous is not None else None
+        for comp_data in store.fetch_components_by_keys(comp_keys, ['key', 'extracted_tags']):
+            extracted_tags = comp_data['extracted_tags'] or []
+            if diff is None or diff.intersection(extracted_tags):
+                rows.append((comp_data['key'], extracted_tags, match_tags(tags, extracted_tags)))
+
+    relations = 0
+    for i in range(0, len(rows), batch_size):
+        relations += store.replace_component_tags(rows[i:i + batch_size], fingerprint)
+    print(f"Taxonomy changes: re-matched {len(rows)} of {sum(len(comp_keys) for comp_keys in stale.values())} "
+          f"components tagged against an older taxonomy, {relations} relations.")
+    return untagged_keys
+
+def process_components_parallel(store, workers, batch_size=50, checkpoint_path=None, delta=False):
+    """
+    Builds the relations of the components without prompting, across worker processes.
+    Each batch covers a contiguous comp_key range; its keys are journaled once its relations are committed,
+    so an interrupted run resumes with the components that were not finished (as long as the taxonomy has
+    not changed). The journal is removed once every batch is done.
+    In delta mode only the components never tagged (new content) or whose relevant taxonomy tags changed are processed.
+    """
+    taxonomy = load_taxonomy(store)
+    with mrcm_metrics.stage('fetch_components'):
+        if delta:
+            comp_keys = retag_taxonomy_changes(store, taxonomy, batch_size)
+        else:
+            comp_keys = [comp_data['key'] for comp_data in store.fetch_components(['key'])]
+    completed = load_checkpoint(checkpoint_path, taxonomy[1])
+    resume = completed is not None
+    completed = completed or set()
+    pending = [comp_key for comp_key in comp_keys if comp_key not in completed]
+    batches = shard_keys(pending, batch_size)
+    print(f"{len(pending)} components to process ({len(comp_keys) - len(pending)} already completed), "
+          f"{len(batches)} batches on {workers} worker(s).")
+
+    journal = open_checkpoint(checkpoint_path, taxonomy[1], resume) if checkpoint_path else None
+    done = 0
+    relations = 0
+    try:
+        if workers == 1:
+            results = (tag_batch(batch, store, taxonomy) for batch in batches)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(workers, initializer=init_worker, initargs=(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, taxonomy))
+            results = pool.imap_unordered(tag_batch, batches)
+        try:
+            for batch_keys, linked, timings in results:
+                if journal:
+                    append_checkpoint(journal, batch_keys)
+                for stage, seconds in timings:
+                    mrcm_metrics.record_stage(stage, seconds)
+                done += len(batch_keys)
+                relations += linked
+                print(f"Processed {done}/{len(pending)} components, {relations} relations written.")
+        finally:
+            if pool:
+                pool.terminate()
+                pool.join()
+    finally:
+        if journal:
+            journal.close()
+    if checkpoint_path:
+        os.remove(checkpoint_path)
+    log_operation('summary', 'N/A', f'{done} components', relations_count=relations)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Relates Components to Tags using NLP tag extraction.")
+    parser.add_argument('--workers', type=int, default=0, help="Process every component without prompting, on this many worker processes (default: interactive).")
+    parser.add_argument('--batch-size', type=int, default=50, help="Components per batch (one comp_key range, one write transaction).")
+    parser.add_argument('--delta', action='store_true', help="Only tag components never tagged (new content) or whose tags are affected by taxonomy changes (implies --workers 1 unless set).")
+    parser.add_argument('--checkpoint', help="Journal of completed comp_keys; an interrupted run with the same journal and taxonomy resumes where it stopped.")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
+    configure_logging()
+    args = parse_args()
+    if args.delta and args.workers == 0:
+        args.workers = 1
+
     # Connect to Neo4j
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    store = Neo4jGraphStore(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
     
     try:
-        process_components(driver)
+        if args.workers > 0:
+            process_components_parallel(store, args.workers, args.batch_size, args.checkpoint, args.delta)
+        else:
+            process_components(store)
     finally:
-        driver.close()
+        store.close()
+        mrcm_metrics.print_stage_report()
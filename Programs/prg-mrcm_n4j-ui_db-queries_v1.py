@@ -1,19 +1,26 @@
+import csv
+import json
+import os
+import pydoc
 import re
-from neo4j import GraphDatabase
+
+import mrcm_metrics
+from mrcm_graph_store import Neo4jGraphStore
+from mrcm_query_log import configure_logging
+from mrcm_search import TAGS_FIELD, parse_tag_criteria
+from mrcm_tag_index import TagIndex
 
 # Neo4j connection settings
-NEO4J_URI = "bolt://localhost:7687"
+NEO4J_URI = os.environ.get('MARCOM_NEO4J_URI', "bolt://localhost:7687")
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "marcomapp"
 
-def validate_criteria(criteria):
-    """
-    Validates the user's input criteria for constructing the Cypher queries.
-    """
-    # Regex pattern to match valid criteria inputs
-    pattern = r"^[\(\)\s'&|a-zA-Z0-9]+$"
-    # Check if the input matches the allowed characters and operators
-    return bool(re.match(pattern, criteria))
+# Search result fields: no content, which is fetched per component on request
+RESULT_FIELDS = ['key', 'name', 'domain', 'about', 'context', 'size', TAGS_FIELD]
+
+# Results listed per page, and components whose content is fetched per query when exporting
+PAGE_SIZE = 20
+EXPORT_BATCH_SIZE = 100
 
 def extract_tags_from_criteria(criteria):
     """
@@ -23,14 +30,12 @@ def extract_tags_from_criteria(criteria):
     tokens = re.findall(r"[()&|]|'[^']+'", criteria)
     return tokens
 
-def fetch_property_values(driver, prop):
+def fetch_property_values(store, prop):
     """
-    Fetches unique values for a given property from the Component nodes in Neo4j.
+    Fetches unique values for a given property from the Component nodes in the graph store.
     """
-    query = f"MATCH (c:Component) RETURN DISTINCT c.{prop} AS value"
-    with driver.session() as session:
-        results = session.run(query)
-        return [record["value"] for record in results]
+    with mrcm_metrics.stage('property_values'):
+        return store.distinct_values(prop)
 
 def prompt_user_for_property(prop_name, values):
     """
@@ -53,60 +58,140 @@ def prompt_user_for_property(prop_name, values):
                 return values[choice - 1]
         print("Invalid input. Please enter a valid choice.")
 
-def generate_cypher_query(constraints, criteria):
+def enable_tag_completion(tag_index):
+    """
+    Enables <Tab> completion of tag names inside quoted criteria (where readline is available).
     """
-    Generates the Cypher query based on user input constraints and tag criteria.
+    try:
+        import readline
+    except ImportError:
+        return False
+
+    matches = []
+
+    def complete(text, state):
+        if state == 0:
+            matches[:] = tag_index.complete(text)
+        return matches[state] if state < len(matches) else None
+
+    # Only quotes, parentheses and operators delimit a tag, so multi-word tags complete as one token
+    readline.set_completer_delims("'()&|")
+    readline.set_completer(complete)
+    readline.parse_and_bind("tab: complete")
+    return True
+
+def print_tag_suggestions(tag_index, prefix):
     """
-    match_conditions = " AND ".join([f"c.{prop} = '{value}'" for prop, value in constraints.items() if value])
+    Prints the tags starting with the prefix, with the number of components carrying each one.
+    """
+    suggestions = tag_index.suggest(prefix, limit=20)
+    if not suggestions:
+        print(f"No tags start with '{prefix}'.")
+    for tag_name, weight in suggestions:
+        print(f"  '{tag_name}' ({weight})")
+
+def generate_search_filters(constraints, criteria):
+    """
+    Generates the graph store search filters based on user input constraints and tag criteria.
+    Raises ValueError if the tag criteria are malformed.
+    """
+    filters = {
+        'domain': constraints.get('comp_domain'),
+        'about': constraints.get('comp_about'),
+        'context': constraints.get('comp_context'),
+    }
     if criteria:
-        tag_conditions = criteria.replace("&", " AND ").replace("|", " OR ")
-        query = f"""
-        MATCH (c:Component)-[:HAS_TAG]->(t:Tag)
-        WHERE {match_conditions} AND t.tag_name CONTAINS {tag_conditions}
-        RETURN c.comp_name AS ComponentName, 
-               c.comp_domain AS Domain, 
-               c.comp_about AS About, 
-               c.comp_context AS Context, 
-               c.comp_size AS Size,
-               c.comp_content AS Content,
-               t.tag_name AS Tag
-        """
+        filters['criteria'] = parse_tag_criteria(criteria)
+    return filters
+
+def execute_search(store, filters):
+    """
+    Executes the search on the graph store and retrieves the results: one row per component,
+    with its tags aggregated by the store and without content, keyed by comp_key.
+    """
+    with mrcm_metrics.stage('search'):
+        results = store.search_components(filters, RESULT_FIELDS)
+    results.sort(key=lambda record: (record['name'] or '', record['key']))
+    return {record["key"]: record for record in results}
+
+def print_results(results, page=0):
+    """
+    Prints one page of results in a formatted way (content is shown on request).
+    """
+    records = list(results.values())
+    if not records:
+        print("No components match the filters.")
+        return
+    first = page * PAGE_SIZE
+    print(f"Results {first + 1}-{min(first + PAGE_SIZE, len(records))} of {len(records)}:")
+    for number, result in enumerate(records[first:first + PAGE_SIZE], start=first + 1):
+        print(f"[{number}] Component Name: {result['name']}")
+        print(f"    Domain: {result['domain']} | About: {result['about']} | Context: {result['context']} | Size: {result['size']}")
+        print(f"    Tags: {', '.join(sorted(result['tags'])) or '-'}")
+
+def view_content(store, result):
+    """
+    Fetches the content of one component and shows it through the pager.
+    """
+    with mrcm_metrics.stage('fetch_content'):
+        content = store.fetch_content(result['key'])
+    pydoc.pager(('#X' * 15) + f" <{result['name']}> content: " + ('#X' * 15) + f"\n\n{content}\n\n"
+                + ('=X' * 15) + f" <{result['name']}> end of record" + ('=X' * 15) + "\n")
+
+def export_results(store, results, path, with_content=False):
+    """
+    Exports the results to a JSON or CSV file (by extension), optionally with the components' content.
+    """
+    records = [dict(record, tags=sorted(record['tags'])) for record in results.values()]
+    if with_content:
+        keys = list(results)
+        for i in range(0, len(keys), EXPORT_BATCH_SIZE):
+            with mrcm_metrics.stage('fetch_content'):
+                contents = store.fetch_contents(keys[i:i + EXPORT_BATCH_SIZE])
+            for record in records[i:i + EXPORT_BATCH_SIZE]:
+                record['content'] = contents.get(record['key'])
+    if path.lower().endswith('.json'):
+        with open(path, 'w', encoding='utf-8') as export_file:
+            json.dump(records, export_file, ensure_ascii=False, indent=2)
+    elif path.lower().endswith('.csv'):
+        with open(path, 'w', newline='', encoding='utf-8') as export_file:
+            writer = csv.DictWriter(export_file, fieldnames=RESULT_FIELDS + (['content'] if with_content else []))
+            writer.writeheader()
+            for record in records:
+                writer.writerow(dict(record, tags='; '.join(record['tags'])))
     else:
-        query = f"""
-        MATCH (c:Component)
-        WHERE {match_conditions}
-        RETURN c.comp_name AS ComponentName, 
-               c.comp_domain AS Domain, 
-               c.comp_about AS About, 
-               c.comp_context AS Context, 
-               c.comp_size AS Size,
-               c.comp_content AS Content
-        """
-    return query
-
-def execute_cypher_query(driver, query):
-    """
-    Executes the Cypher query on Neo4j and retrieves the results.
-    """
-    with driver.session() as session:
-        results = session.run(query)
-        return {record["ComponentName"]: record for record in results}
-
-def print_results(results):
-    """
-    Prints the results of the query in a formatted way.
-    """
-    print("Results:")
-    for component, result in results.items():
-        print(f"Component Name: {result['ComponentName']}")
-        print(f"Domain: {result['Domain']}")
-        print(f"About: {result['About']}")
-        print(f"Context: {result['Context']}")
-        print(f"Size: {result['Size']}")
-        print(f"Tag: {result.get('Tag', 'N/A')}\n")
-        print(('#X' * 15) + f" <{result['ComponentName']}> content: " + ('#X' * 15))
-        print(f"\n {result['Content']}")
-        print('\n' + ('=X' * 15) + f" <{result['ComponentName']}> end of record" + ('=X' * 15) + '\n')
+        raise ValueError("the file name must end with .json or .csv")
+    print(f"Exported {len(records)} results to '{path}'.")
+
+def browse_results(store, results):
+    """
+    Pages through the results; content is fetched only for the components the user opens.
+    """
+    page = 0
+    pages = max(1, -(-len(results) // PAGE_SIZE))
+    records = list(results.values())
+    while True:
+        with mrcm_metrics.stage('print_results'):
+            print_results(results, page)
+        if not records:
+            return
+        user_input = input("/v/N to view content, /n next page, /p previous page, /e/file.json|csv to export (/ec/ with content), /b back: ").strip()
+        if user_input == '/b':
+            return
+        elif user_input == '/n':
+            page = min(page + 1, pages - 1)
+        elif user_input == '/p':
+            page = max(page - 1, 0)
+        elif user_input.startswith('/v/') and user_input[3:].isdigit() and 1 <= int(user_input[3:]) <= len(records):
+            view_content(store, records[int(user_input[3:]) - 1])
+        elif user_input.startswith(('/e/', '/ec/')):
+            with_content = user_input.startswith('/ec/')
+            try:
+                export_results(store, results, user_input[4 if with_content else 3:].strip(), with_content)
+            except (OSError, ValueError) as e:
+                print(f"Export failed ({e}).")
+        else:
+            print("Invalid input.")
 
 def print_constraints_summary(constraints, tag_criteria):
     """
@@ -128,8 +213,10 @@ def print_constraints_summary(constraints, tag_criteria):
     print(('/' * 80) + f"\n")
 
 def main():
+    configure_logging()
+
     # Connect to Neo4j
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    store = Neo4jGraphStore(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
 
     print("Welcome to the Marcom Neo4j Database Query Tool (v1)")
 
@@ -138,14 +225,19 @@ def main():
     properties = ['comp_domain', 'comp_about', 'comp_context']
 
     for prop in properties:
-        values = fetch_property_values(driver, prop)
+        values = fetch_property_values(store, prop)
         choice = prompt_user_for_property(prop, values)
         constraints[prop] = choice
 
     # Part Two: Set Tag Constraints
-    print("Now set constraints for tags.")
+    with mrcm_metrics.stage('tag_index_load'):
+        tag_index = TagIndex(store.tag_weights())
+    if enable_tag_completion(tag_index):
+        print("Now set constraints for tags (press <Tab> inside quotes to complete tag names).")
+    else:
+        print("Now set constraints for tags.")
     while True:
-        user_input = input("Enter your query (/q/'criteria', /s to skip tag filter) or exit (/x): ").strip()
+        user_input = input("Enter your query (/q/'criteria', /t/prefix to list tags, /s to skip tag filter) or exit (/x): ").strip()
 
         if user_input.lower() == '/x':
             print("Exiting the program...")
@@ -155,30 +247,34 @@ def main():
             criteria = None
             # Print summary of filters applied
             print_constraints_summary(constraints, criteria)
-            # Generate Cypher query from constraints without tag criteria
-            cypher_query = generate_cypher_query(constraints, criteria)
-            # Execute the query
-            results = execute_cypher_query(driver, cypher_query)
-            # Print the results
-            print_results(results)
+            # Generate search filters from constraints without tag criteria
+            filters = generate_search_filters(constraints, criteria)
+            # Execute the search
+            results = execute_search(store, filters)
+            # Browse the results
+            browse_results(store, results)
             break
+        elif user_input.startswith("/t/"):
+            print_tag_suggestions(tag_index, user_input[3:])
         elif user_input.startswith("/q/"):
             criteria = user_input[3:].strip()
-            if validate_criteria(criteria):
-                # Print summary of filters applied
-                print_constraints_summary(constraints, criteria)
-                # Generate Cypher query from constraints and criteria
-                cypher_query = generate_cypher_query(constraints, criteria)
-                # Execute the query
-                results = execute_cypher_query(driver, cypher_query)
-                # Print the results
-                print_results(results)
-            else:
-                print("Invalid criteria format. Please enter a valid criteria.")
+            try:
+                # Generate search filters from constraints and criteria (parse_tag_criteria validates them)
+                filters = generate_search_filters(constraints, criteria)
+            except ValueError as e:
+                print(f"Invalid criteria format ({e}). Please enter a valid criteria.")
+                continue
+            # Print summary of filters applied
+            print_constraints_summary(constraints, criteria)
+            # Execute the search
+            results = execute_search(store, filters)
+            # Browse the results
+            browse_results(store, results)
         else:
-            print("Invalid input. Please enter '/x' to exit, '/s' to skip tag filter, or '/q/' to enter a query criteria.")
+            print("Invalid input. Please enter '/x' to exit, '/s' to skip tag filter, '/t/' to list tags, or '/q/' to enter a query criteria.")
 
-    driver.close()
+    store.close()
+    mrcm_metrics.print_stage_report()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,303 @@
+import argparse
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+
+import pandas as pd
+
+import mrcm_dedup
+import mrcm_metrics
+from mrcm_content_sources import open_content_source
+from mrcm_graph_store import Neo4jGraphStore
+from mrcm_programs import load_program
+from mrcm_query_log import configure_logging
+from mrcm_tag_index import match_tags, normalize_tag, taxonomy_fingerprint
+
+# Neo4j connection settings
+NEO4J_URI = os.environ.get('MARCOM_NEO4J_URI', "bolt://localhost:7687")
+NEO4J_USER = "neo4j"
+NEO4J_PASSWORD = "marcomapp"
+
+logger = logging.getLogger('marcom.pipeline')
+
+# Marks the end of a stage's input
+SENTINEL = object()
+
+class Stage:
+    """
+    A pipeline stage: worker threads take items from the inbox, apply `func` and put non-None results
+    in the outbox. Bounded queues between stages provide back-pressure. When every worker has seen
+    the end of the input, the stage passes the end marker downstream.
+    """
+
+    def __init__(self, name, func, inbox, outbox, workers=1):
+        self.name = name
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = workers
+        self.failed = 0
+        self._remaining = workers
+        self._lock = threading.Lock()
+        self.threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def _work(self):
+        while True:
+            item = self.inbox.get()
+            if item is SENTINEL:
+                # Leave the marker for the sibling workers
+                self.inbox.put(SENTINEL)
+                break
+            try:
+                with mrcm_metrics.stage(self.name):
+                    result = self.func(item)
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                logger.error("%s failed for '%s': %s", self.name, item.get('comp_name', '?'), e)
+                continue
+            if result is not None:
+                self.outbox.put(result)
+
+        with self._lock:
+            self._remaining -= 1
+            last = self._remaining == 0
+        if last:
+            self.outbox.put(SENTINEL)
+
+class Taxonomy:
+    """
+    The taxonomy tags by normalized name, loaded in the background while content is being read.
+    """
+
+    def __init__(self):
+        self.tags = {}
+        self.fingerprint = None
+        self.failed = False
+        self.ready = threading.Event()
+
+    def load(self, store, csv_path):
+        try:
+            if csv_path:
+                with mrcm_metrics.stage('taxonomy_write'):
+                    tag_names = [str(tag).strip() for tag in pd.read_csv(csv_path)['Tag'].dropna()]
+                    store.ensure_constraints()
+                    store.upsert_tags(tag_names)
+                logger.info("Loaded %d taxonomy tags from '%s'.", len(tag_names), csv_path)
+            with mrcm_metrics.stage('taxonomy_read'):
+                tag_names = list(store.tag_weights())
+                self.tags = {normalize_tag(tag_name): tag_name for tag_name in tag_names}
+                self.fingerprint = taxonomy_fingerprint(tag_names)
+                store.save_taxonomy_snapshot(self.fingerprint, tag_names)
+        except Exception as e:
+            # Components are still written, without tag relations
+            self.failed = True
+            logger.exception("Error loading the taxonomy: %s", e)
+        finally:
+            self.ready.set()
+
+    def match(self, extracted_tags):
+        """
+        Returns the exact names of the taxonomy tags among the extracted tags.
+        """
+        self.ready.wait()
+        return match_tags(self.tags, extracted_tags)
+
+class Pipeline:
+    """
+    content read (hashed as it streams) -> near-duplicate detection -> NLP extraction -> tag matching
+    -> batched Neo4j write, as concurrent stages.
+    """
+
+    def __init__(self, args, store, source):
+        self.args = args
+        self.store = store
+        self.source = source
+        self.taxonomy = Taxonomy()
+        self.relations_prg = None
+        self._nlp_lock = threading.Lock()
+        self.dedup_index = None
+        self._dedup_lock = threading.Lock()
+        self.near_duplicates = []
+        self.reader_error = None
+        self.written = 0
+        self.linked = 0
+
+    def read_content(self, item):
+        item['comp_content'], item['comp_key'] = self.source.fetch(item['comp_link'], item['comp_name'])
+        item['comp_size'] = len(item['comp_content'])
+        return item
+
+    def dedup(self, item):
+        # The signatures already in the graph are indexed on first use
+        if self.dedup_index is None:
+            with self._dedup_lock:
+                if self.dedup_index is None:
+                    index = mrcm_dedup.LshIndex(self.args.dedup_threshold)
+                    for comp_key, signature in self.store.fetch_signatures().items():
+                        index.add(comp_key, signature)
+                    self.dedup_index = index
+        signature = mrcm_dedup.minhash(item['comp_content'])
+        if signature is not None:
+            item['comp_minhash'] = signature
+            matches = self.dedup_index.add_and_query(item['comp_key'], signature)
+            with self._dedup_lock:
+                self.near_duplicates.extend((item['comp_key'], comp_key, score) for comp_key, score in matches)
+        return item
+
+    def extract(self, item):
+        # The spaCy model loads in this stage, while the first contents are already being read
+        if self.relations_prg is None:
+            with self._nlp_lock:
+                if self.relations_prg is None:
+                    self.relations_prg = load_program('prg-mrcm_n4j-ui_create-relations_comp-tag_v1.py')
+        extracted_tags = self.relations_prg.extract_tags_from_text(item['comp_content'])
+        item['comp_extracted_tags'] = list(dict.fromkeys(normalize_tag(tag_name) for tag_name in extracted_tags))
+        return item
+
+    def match(self, item):
+        item['tag_names'] = self.taxonomy.match(item['comp_extracted_tags'])
+        if not self.taxonomy.failed:
+            # Recorded for delta re-tagging by the relation builder
+            item['comp_tagged_taxonomy'] = self.taxonomy.fingerprint
+        return item
+
+    def write(self, inbox):
+        """
+        Writes components in batches until the end of the input.
+        """
+        batch = []
+        while True:
+            item = inbox.get()
+            if item is not SENTINEL:
+                tag_names = item.pop('tag_names', [])
+                batch.append((item, tag_names))
+            if batch and (item is SENTINEL or len(batch) >= self.args.write_batch_size):
+                with mrcm_metrics.stage('neo4j_write'):
+                    self.linked += self.store.write_components(batch)
+                self.written += len(batch)
+                logger.info("Wrote %d components (%d so far).", len(batch), self.written)
+                batch = []
+            if item is SENTINEL:
+                return
+
+    def write_near_duplicates(self):
+        """
+        Relates the near-duplicates found, once every component is written.
+        """
+        written = 0
+        for i in range(0, len(self.near_duplicates), self.args.write_batch_size):
+            with mrcm_metrics.stage('neo4j_write'):
+                written += self.store.write_near_duplicates(self.near_duplicates[i:i + self.args.write_batch_size])
+        return written
+
+    def read_rows(self, outbox):
+        """
+        Feeds the components CSV rows into the pipeline. The end marker is always sent, so the stages
+        drain and stop even if the CSV cannot be read; the error is re-raised by run().
+        """
+        try:
+            df = pd.read_csv(self.args.components_csv)
+            for _, row in df.iterrows():
+                outbox.put({
+                    "comp_name": row["Component Name"],
+                    "comp_domain": row["Domain"],
+                    "comp_about": row["About"],
+                    "comp_context": row["Context"],
+                    "comp_comment": "",
+                    "comp_link": row["Source"],
+                })
+        except Exception as e:
+            self.reader_error = e
+            logger.error("Error reading '%s': %s", self.args.components_csv, e)
+        finally:
+            outbox.put(SENTINEL)
+
+    def run(self):
+        size = self.args.queue_size
+        rows, read, deduped, extracted, matched = (queue.Queue(size) for _ in range(5))
+
+        taxonomy_thread = threading.Thread(target=self.taxonomy.load, args=(self.store, self.args.taxonomy_csv), daemon=True)
+        taxonomy_thread.start()
+
+        stages = [
+            Stage('read_content', self.read_content, rows, read, self.args.download_workers),
+        ]
+        if self.args.skip_dedup:
+            deduped = read
+        else:
+            stages.append(Stage('near_duplicates', self.dedup, read, deduped))
+        if self.args.skip_relations:
+            stages.append(Stage('no_tags', lambda item: dict(item, tag_names=[]), deduped, matched))
+        else:
+            stages.append(Stage('nlp_extraction', self.extract, deduped, extracted, self.args.nlp_workers))
+            stages.append(Stage('tag_matching', self.match, extracted, matched))
+        for stage in stages:
+            stage.start()
+
+        reader = threading.Thread(target=self.read_rows, args=(rows,), daemon=True)
+        reader.start()
+        self.write(matched)
+        self.write_near_duplicates()
+        reader.join()
+        taxonomy_thread.join()
+        if self.reader_error is not None:
+            raise self.reader_error
+        return sum(stage.failed for stage in stages) + int(self.taxonomy.failed)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Non-interactive ingestion: components, taxonomy tags and tag relations in one overlapped run.")
+    parser.add_argument('components_csv', help="Notion export CSV of the components (Component Name, Domain, About, Context, Source).")
+    parser.add_argument('--taxonomy-csv', help="Taxonomy CSV (Tag column) to load before matching; default: use the tags already in Neo4j.")
+    parser.add_argument('--skip-relations', action='store_true', help="Only ingest components, without NLP extraction and tag relations.")
+    parser.add_argument('--source', default='drive',
+                        help="Where component content is read from: 'drive' (the Source links, default), or a Notion "
+                             "export as a directory or .zip archive, read locally without network access.")
+    parser.add_argument('--skip-dedup', action='store_true', help="Do not look for near-duplicate components.")
+    parser.add_argument('--dedup-threshold', type=float, default=mrcm_dedup.DEFAULT_THRESHOLD,
+                        help="Estimated Jaccard similarity from which a component is related NEAR_DUPLICATE_OF an earlier one.")
+    parser.add_argument('--download-workers', type=int, default=8, help="Concurrent content reads (Google Drive downloads or local files).")
+    parser.add_argument('--nlp-workers', type=int, default=1, help="Threads running NLP extraction.")
+    parser.add_argument('--write-batch-size', type=int, default=100, help="Components written per Neo4j transaction.")
+    parser.add_argument('--queue-size', type=int, default=64, help="Capacity of the queues between stages (back-pressure).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    configure_logging()
+    args = parse_args(argv)
+
+    # Google Drive is only needed for the 'drive' source (token.json must exist). It authenticates once,
+    # here, and the download threads each build their service from these credentials.
+    if args.source == 'drive':
+        credentials = load_program('prg-mrcm_n4j-ui_create-nodes_components_v0.py').get_google_drive_credentials()
+    else:
+        credentials = None
+    source = open_content_source(args.source, credentials)
+
+    # Connect to Neo4j
+    store = Neo4jGraphStore(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+    start = time.perf_counter()
+    try:
+        pipeline = Pipeline(args, store, source)
+        failed = pipeline.run()
+    finally:
+        source.close()
+        store.close()
+
+    print(f"Ingested {pipeline.written} components with {pipeline.linked} tag relations and "
+          f"{len(pipeline.near_duplicates)} near-duplicates ({failed} failed) in {time.perf_counter() - start:.1f}s.")
+    mrcm_metrics.print_stage_report("Stage breakdown (busy time per stage; stages overlap)")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
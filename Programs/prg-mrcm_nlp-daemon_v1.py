@@ -0,0 +1,78 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import mrcm_metrics
+import mrcm_nlp
+from mrcm_query_log import configure_logging
+
+logger = logging.getLogger('marcom.nlp_daemon')
+
+class AnnotateHandler(BaseHTTPRequestHandler):
+    """
+    POST /annotate {"texts": [...]} -> {"docs": [{"ents": [[text, label]], "noun_chunks": [text]}]}
+    GET /health, GET /metrics (Prometheus text format).
+    """
+
+    def send_body(self, status, body, content_type='application/json'):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.send_body(200, json.dumps({'model': mrcm_nlp.MODEL_NAME}))
+        elif self.path == '/metrics':
+            self.send_body(200, mrcm_metrics.render_prometheus(), 'text/plain; version=0.0.4')
+        else:
+            self.send_body(404, json.dumps({'error': 'not found'}))
+
+    def do_POST(self):
+        if self.path != '/annotate':
+            self.send_body(404, json.dumps({'error': 'not found'}))
+            return
+        try:
+            texts = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))['texts']
+            if not all(isinstance(text, str) for text in texts):
+                raise ValueError("texts must be strings")
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_body(400, json.dumps({'error': str(e)}))
+            return
+        start = time.perf_counter()
+        with mrcm_metrics.stage('annotate'):
+            docs = [mrcm_nlp.doc_to_json(doc) for doc in mrcm_nlp.annotate_local(texts)]
+        mrcm_metrics.counter('marcom_nlp_texts_total', "Texts annotated by the NLP daemon.").inc(len(texts))
+        logger.info("Annotated %d texts in %.0f ms.", len(texts), (time.perf_counter() - start) * 1000)
+        self.send_body(200, json.dumps({'docs': docs}))
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Keeps the spaCy model loaded and serves batched tag extraction to the Programs over loopback HTTP.")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on (loopback by default).")
+    parser.add_argument('--port', type=int, default=8765, help="Port; the Programs look for the daemon at MARCOM_NLP_URL (default http://127.0.0.1:8765).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    configure_logging('INFO')
+    args = parse_args(argv)
+    mrcm_nlp.load_model()
+    server = HTTPServer((args.host, args.port), AnnotateHandler)
+    print(f"NLP daemon ready on http://{args.host}:{args.port} (model {mrcm_nlp.MODEL_NAME}).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import hashlib
+import os
+import tempfile
+import threading
+import unittest
+import zipfile
+from unittest import mock
+
+import mrcm_content_sources
+from mrcm_content_sources import DriveSource, HashingSink, LocalDirectorySource, ZipArchiveSource, open_content_source
+
+# Multi-byte characters, so that small chunks split them
+CONTENT = "Paiements par carte — réglés en deux jours ✓\n\n" * 50
+
+def read_whole_file_key(path):
+    """
+    The comp_key as computed before content was streamed: the decoded file re-encoded and hashed.
+    """
+    with open(path, encoding='utf-8') as file:
+        return hashlib.sha256(file.read().encode()).hexdigest()
+
+class ContentSourceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.directory, 'Components'))
+        self.path = os.path.join(self.directory, 'Components', 'Card Payments 0123456789abcdef0123456789abcdef.md')
+        with open(self.path, 'w', encoding='utf-8', newline='') as file:
+            file.write(CONTENT)
+        open(os.path.join(self.directory, 'Empty.md'), 'w').close()
+        self.expected = (CONTENT, read_whole_file_key(self.path))
+
+    def test_local_directory(self):
+        source = open_content_source(self.directory)
+        self.assertIsInstance(source, LocalDirectorySource)
+        self.assertEqual(source.fetch('Components/Card Payments 0123456789abcdef0123456789abcdef.md'), self.expected)
+        # A Drive link falls back to the component name
+        self.assertEqual(source.fetch('https://drive.google.com/open?id=x', 'Card Payments'), self.expected)
+        self.assertEqual(source.fetch('empty.md'), ('', hashlib.sha256().hexdigest()))
+        with self.assertRaises(FileNotFoundError):
+            source.fetch('missing.md', 'Missing')
+
+    def test_ambiguous_name(self):
+        os.mkdir(os.path.join(self.directory, 'Archive'))
+        with open(os.path.join(self.directory, 'Archive', 'Card Payments.md'), 'w', encoding='utf-8') as file:
+            file.write("An older version.")
+        source = open_content_source(self.directory)
+        with self.assertRaises(LookupError):
+            source.fetch('https://drive.google.com/open?id=x', 'Card Payments')
+        # The Source path still finds the file
+        self.assertEqual(source.fetch('Archive/Card Payments.md')[0], "An older version.")
+
+    def test_zip_archive(self):
+        archive = os.path.join(self.directory, 'export.zip')
+        with zipfile.ZipFile(archive, 'w') as export:
+            export.write(self.path, 'Export/Components/Card Payments 0123456789abcdef0123456789abcdef.md')
+        source = open_content_source(archive)
+        self.addCleanup(source.close)
+        self.assertIsInstance(source, ZipArchiveSource)
+        with mock.patch.object(mrcm_content_sources, 'CHUNK_SIZE', 7):
+            self.assertEqual(source.fetch(None, 'Card Payments'), self.expected)
+
+    def test_hashing_sink(self):
+        data = CONTENT.encode('utf-8')
+        sink = HashingSink()
+        for i in range(0, len(data), 7):
+            sink.write(data[i:i + 7])
+        self.assertEqual(sink.result(), self.expected)
+        # A character cut off at the end of the file is still an error
+        sink = HashingSink()
+        sink.write("✓".encode('utf-8')[:2])
+        with self.assertRaises(UnicodeDecodeError):
+            sink.result()
+
+    def test_drive_service_per_thread(self):
+        credentials = object()
+        source = open_content_source('drive', credentials)
+        self.assertIsInstance(source, DriveSource)
+        services = []
+        with mock.patch('googleapiclient.discovery.build', side_effect=lambda *args, **kwargs: object()) as build:
+            threads = [threading.Thread(target=lambda: services.extend([source.service(), source.service()])) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(build.call_args_list, [mock.call('drive', 'v3', credentials=credentials)] * 2)
+        self.assertIs(services[0], services[1])
+        self.assertIs(services[2], services[3])
+        self.assertIsNot(services[0], services[2])
+
+    def test_unknown_source(self):
+        with self.assertRaises(ValueError):
+            open_content_source(os.path.join(self.directory, 'nowhere'))
+
+if __name__ == '__main__':
+    unittest.main()
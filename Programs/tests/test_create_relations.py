@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from mrcm_graph_store import MemoryGraphStore
+from mrcm_programs import load_program
+
+relations = load_program('prg-mrcm_n4j-ui_create-relations_comp-tag_v1.py')
+
+def add_component(store, comp_key):
+    store.upsert_component({
+        'comp_key': comp_key, 'comp_name': comp_key, 'comp_domain': 'Fintech', 'comp_about': 'Payments',
+        'comp_context': 'Product', 'comp_comment': '', 'comp_link': f"{comp_key}.md", 'comp_size': 5, 'comp_content': 'Hello',
+    })
+
+class RetagTaxonomyChangesTest(unittest.TestCase):
+
+    def test_rematches_only_affected_components(self):
+        store = MemoryGraphStore()
+        for comp_key in ('a', 'b', 'new'):
+            add_component(store, comp_key)
+        store.upsert_tags(['Cloud'])
+        old = relations.load_taxonomy(store)
+        store.replace_component_tags([('a', ['cloud', 'open banking'], ['Cloud']), ('b', ['cloud'], ['Cloud'])], old[1])
+
+        store.upsert_tags(['Open Banking'])
+        new = relations.load_taxonomy(store)
+        with mock.patch('builtins.print'):
+            changed = relations.retag_taxonomy_changes(store, new)
+
+        self.assertEqual(changed, ['new'])
+        self.assertEqual(sorted(store.fetch_tag_links()), [('a', 'Cloud'), ('a', 'Open Banking'), ('b', 'Cloud')])
+        tagged = {row['key']: row['tagged_taxonomy'] for row in store.fetch_components(['key', 'tagged_taxonomy'])}
+        self.assertEqual(tagged, {'a': new[1], 'b': old[1], 'new': None})
+
+class CheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = MemoryGraphStore()
+        for comp_key in ('a', 'b', 'c'):
+            add_component(self.store, comp_key)
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'relations.journal')
+        self.batches = []
+        self.fail_on = None
+        patches = [
+            mock.patch.object(relations, 'tag_batch', self.tag_batch),
+            mock.patch.object(relations, 'log_operation'),
+            mock.patch('builtins.print'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tag_batch(self, comp_keys, store=None, taxonomy=None):
+        if comp_keys == self.fail_on:
+            raise RuntimeError("Interrupted")
+        self.batches.append(comp_keys)
+        return comp_keys, 0, []
+
+    def run_relations(self):
+        relations.process_components_parallel(self.store, 1, batch_size=1, checkpoint_path=self.checkpoint)
+
+    def test_shards_are_contiguous_key_ranges(self):
+        self.assertEqual(relations.shard_keys(['e', 'a', 'c', 'b', 'd'], 2), [['a', 'b'], ['c', 'd'], ['e']])
+
+    def test_resume_after_interruption(self):
+        self.fail_on = ['b']
+        with self.assertRaises(RuntimeError):
+            self.run_relations()
+        with open(self.checkpoint, encoding='utf-8') as journal:
+            self.assertEqual(journal.read().splitlines()[1:], ['a'])
+
+        self.fail_on = None
+        self.run_relations()
+        self.assertEqual(self.batches, [['a'], ['b'], ['c']])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_changed_taxonomy_starts_over(self):
+        with open(self.checkpoint, 'w', encoding='utf-8') as journal:
+            journal.write(relations.CHECKPOINT_HEADER.format('older') + "\na\nb\n")
+        self.run_relations()
+        self.assertEqual(self.batches, [['a'], ['b'], ['c']])
+
+if __name__ == '__main__':
+    unittest.main()
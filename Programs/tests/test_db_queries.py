@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from mrcm_graph_store import MemoryGraphStore
+from mrcm_programs import load_program
+
+queries = load_program('prg-mrcm_n4j-ui_db-queries_v1.py')
+
+class ExecuteSearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = MemoryGraphStore()
+        for comp_key, content in (('b', "Cloud card payments."), ('a', "Cloud ledger.")):
+            self.store.upsert_component({
+                'comp_key': comp_key, 'comp_name': 'Payments', 'comp_domain': 'Fintech', 'comp_about': 'Payments',
+                'comp_context': 'Product', 'comp_comment': '', 'comp_link': f"{comp_key}.md", 'comp_size': len(content),
+                'comp_content': content,
+            })
+        self.store.upsert_tags(['Cloud', 'Card Payments'])
+        self.store.link_tag('b', 'cloud')
+        self.store.link_tag('b', 'card payments')
+        self.store.link_tag('a', 'cloud')
+
+    def search(self, criteria):
+        return queries.execute_search(self.store, queries.generate_search_filters({}, criteria))
+
+    def test_one_row_per_component_with_its_tags(self):
+        results = self.search("'cloud' | 'payments'")
+        # Components sharing a name are both kept, keyed by comp_key
+        self.assertEqual(list(results), ['a', 'b'])
+        self.assertEqual(sorted(results['b']['tags']), ['Card Payments', 'Cloud'])
+        self.assertEqual(results['a']['tags'], ['Cloud'])
+        self.assertNotIn('content', results['b'])
+
+    def test_tag_names_beyond_ascii(self):
+        self.store.upsert_tags(['E-commerce', 'Paiement à la carte'])
+        self.store.link_tag('a', 'e-commerce')
+        self.store.link_tag('b', 'paiement à la carte')
+        self.assertEqual(list(self.search("'e-commerce' | 'paiement à la carte'")), ['a', 'b'])
+        with self.assertRaises(ValueError):
+            self.search("'e-commerce' &")
+
+    def test_export_fetches_content_in_batches(self):
+        results = self.search("'cloud'")
+        path = os.path.join(tempfile.mkdtemp(), 'results.json')
+        with mock.patch.object(queries, 'EXPORT_BATCH_SIZE', 1), \
+                mock.patch.object(self.store, 'fetch_contents', wraps=self.store.fetch_contents) as fetch_contents, \
+                mock.patch('builtins.print'):
+            queries.export_results(self.store, results, path, with_content=True)
+        self.assertEqual(fetch_contents.call_args_list, [mock.call(['a']), mock.call(['b'])])
+        with open(path, encoding='utf-8') as export_file:
+            records = json.load(export_file)
+        self.assertEqual([(record['key'], record['content']) for record in records],
+                         [('a', "Cloud ledger."), ('b', "Cloud card payments.")])
+        self.assertEqual(records[1]['tags'], ['Card Payments', 'Cloud'])
+
+    def test_export_needs_a_known_format(self):
+        with self.assertRaises(ValueError):
+            queries.export_results(self.store, self.search("'cloud'"), 'results.txt')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import mrcm_dedup
+
+WORDS = ("the component describes how payment providers settle card transactions between issuing and acquiring "
+         "banks across regions with different currencies clearing cycles fees and dispute rules").split()
+
+def text(words):
+    return ' '.join(words)
+
+class MinHashTest(unittest.TestCase):
+
+    def test_signature(self):
+        signature = mrcm_dedup.minhash(text(WORDS))
+        self.assertEqual(len(signature), mrcm_dedup.NUM_PERM)
+        self.assertEqual(signature, mrcm_dedup.minhash(text(WORDS).upper()))
+        self.assertIsNone(mrcm_dedup.minhash(' ... '))
+
+    def test_similarity_follows_overlap(self):
+        original = mrcm_dedup.minhash(text(WORDS))
+        edited = mrcm_dedup.minhash(text(WORDS[:-1] + ['chargebacks']))
+        unrelated = mrcm_dedup.minhash("a short note about office plants and watering schedules for the summer")
+        self.assertGreater(mrcm_dedup.similarity(original, edited), 0.7)
+        self.assertLess(mrcm_dedup.similarity(original, unrelated), 0.2)
+
+class LshIndexTest(unittest.TestCase):
+
+    def test_finds_near_duplicates_only(self):
+        signatures = {
+            'a': mrcm_dedup.minhash(text(WORDS)),
+            'b': mrcm_dedup.minhash(text(WORDS)),
+            'c': mrcm_dedup.minhash(text(reversed(WORDS))),
+        }
+        self.assertEqual(mrcm_dedup.find_near_duplicates(signatures), [('b', 'a', 1.0)])
+
+    def test_add_and_query_skips_indexed_components(self):
+        index = mrcm_dedup.LshIndex()
+        signature = mrcm_dedup.minhash(text(WORDS))
+        self.assertEqual(index.add_and_query('a', signature), [])
+        self.assertEqual(index.add_and_query('b', signature), [('a', 1.0)])
+        self.assertEqual(index.add_and_query('b', signature), [])
+        self.assertEqual(len(index), 2)
+
+    def test_matches_are_capped(self):
+        index = mrcm_dedup.LshIndex()
+        signature = mrcm_dedup.minhash(text(WORDS))
+        for i in range(mrcm_dedup.MAX_MATCHES + 3):
+            index.add(f"k{i}", signature)
+        self.assertEqual(len(index.query(signature)), mrcm_dedup.MAX_MATCHES)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import threading
+import time
+import unittest
+
+from mrcm_graph_store import MemoryGraphStore, Neo4jGraphStore, ReadReplica, compress_content, decompress_content, split_sections
+from mrcm_search import parse_tag_criteria
+
+def component(comp_key, content="Card payments settle in two days.", **properties):
+    return dict({
+        'comp_key': comp_key, 'comp_name': f"Component {comp_key}", 'comp_domain': 'Fintech', 'comp_about': 'Payments',
+        'comp_context': 'Product', 'comp_comment': '', 'comp_link': f"{comp_key}.md", 'comp_content': content,
+        'comp_size': len(content or ''),
+    }, **properties)
+
+SECTIONED = "# Payments\n\nCard payments settle in two days.\n  \nRefunds reverse a settlement.\n"
+
+class SplitSectionsTest(unittest.TestCase):
+
+    def test_paragraphs_in_order(self):
+        sections = split_sections(SECTIONED)
+        texts = [decompress_content(section['sec_data']) for section in sections]
+        self.assertEqual(texts, ["# Payments", "Card payments settle in two days.", "Refunds reverse a settlement."])
+        self.assertEqual([section['sec_position'] for section in sections], [0, 1, 2])
+        self.assertEqual([section['sec_size'] for section in sections], [len(text) for text in texts])
+        self.assertEqual(split_sections(" \n\n "), [])
+
+class ScriptedNeo4jStore(Neo4jGraphStore):
+    """
+    Neo4jGraphStore answering its queries from a list of components, recording the writes.
+    """
+
+    def __init__(self, contents, unsplit):
+        self.contents = contents
+        self.unsplit = list(unsplit)
+        self.writes = []
+
+    def _read(self, query, parameters=None):
+        return [{'key': comp_key} for comp_key in self.unsplit[:parameters['batch_size']]]
+
+    def _write(self, query, parameters=None):
+        self.writes.append(parameters['rows'])
+        split = {row['comp_key'] for row in parameters['rows']}
+        self.unsplit = [comp_key for comp_key in self.unsplit if comp_key not in split]
+
+    def fetch_contents(self, comp_keys):
+        return {comp_key: self.contents.get(comp_key) for comp_key in comp_keys}
+
+class SplitContentIntoSectionsTest(unittest.TestCase):
+
+    def test_splits_in_batches(self):
+        store = ScriptedNeo4jStore({'a': SECTIONED, 'b': "One paragraph.", 'c': None}, ['a', 'b', 'c'])
+        self.assertEqual(store.split_content_into_sections(batch_size=2), 3)
+        self.assertEqual([[row['comp_key'] for row in rows] for rows in store.writes], [['a', 'b'], ['c']])
+        sections = {row['comp_key']: row['sections'] for rows in store.writes for row in rows}
+        self.assertEqual([len(sections[comp_key]) for comp_key in 'abc'], [3, 1, 0])
+
+class MemoryGraphStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = MemoryGraphStore()
+        self.store.upsert_component(component('a'))
+        self.store.upsert_component(component('b', "A much longer description of a ledger. " * 5, comp_domain='Banking'))
+        self.store.upsert_component(component('c', "Cloud hosting."))
+        self.store.upsert_tag('Cloud')
+        self.store.upsert_tag('Card Payments')
+        self.store.link_tag('a', 'card payments')
+        self.store.link_tag('c', 'CLOUD')
+        self.store.link_tag('a', 'cloud')
+
+    def search(self, **filters):
+        return sorted(row['key'] for row in self.store.search_components(filters, ['key']))
+
+    def test_search_filters(self):
+        self.assertEqual(self.search(), ['a', 'b', 'c'])
+        self.assertEqual(self.search(domain='Fintech'), ['a', 'c'])
+        self.assertEqual(self.search(size='bullet'), ['a', 'c'])
+        self.assertEqual(self.search(tag='Cloud', domain='Fintech'), ['a', 'c'])
+        self.assertEqual(self.search(criteria=parse_tag_criteria("'cloud' & 'payments'")), ['a'])
+        self.assertEqual(self.search(domain='Retail'), [])
+
+    def test_update_moves_indexed_property(self):
+        self.store.upsert_component(component('a', comp_domain='Banking'))
+        self.assertEqual(self.search(domain='Banking'), ['a', 'b'])
+        self.assertEqual(self.search(domain='Fintech'), ['c'])
+
+    def test_tags(self):
+        self.assertFalse(self.store.link_tag('a', 'unknown'))
+        self.assertEqual(self.store.tag_weights(), {'Cloud': 2, 'Card Payments': 1})
+        self.assertEqual(sorted(self.store.fetch_tag_links()), [('a', 'Card Payments'), ('a', 'Cloud'), ('c', 'Cloud')])
+
+    def test_near_duplicates_are_undirected(self):
+        # The pipeline relates the new component to the earlier one, the utility pairs them in comp_key order
+        self.assertEqual(self.store.write_near_duplicates([('c', 'a', 0.9)]), 1)
+        self.assertEqual(self.store.write_near_duplicates([('a', 'c', 0.95), ('a', 'missing', 0.9)]), 1)
+        self.assertEqual(self.store.fetch_near_duplicates(), [('c', 'a', 0.95)])
+
+    def test_taxonomy_signature_follows_tags_and_relations(self):
+        signature = self.store.taxonomy_signature()
+        self.assertEqual(signature[:2], (2, 3))
+        self.assertEqual(self.store.taxonomy_signature(), signature)
+        self.store.replace_component_tags([('c', [], [])], 'fingerprint')
+        self.assertNotEqual(self.store.taxonomy_signature(), signature)
+
+        # Same counts, a tag renamed
+        store = MemoryGraphStore()
+        store.upsert_tags(['Cloud'])
+        renamed = MemoryGraphStore()
+        renamed.upsert_tags(['Cloud Hosting'])
+        self.assertNotEqual(store.taxonomy_signature(), renamed.taxonomy_signature())
+
+    def test_content_is_kept_apart(self):
+        self.assertNotIn('content', self.store.fetch_components(['key'])[0])
+        self.assertEqual(self.store.fetch_content('c'), "Cloud hosting.")
+        self.assertEqual(self.store.fetch_contents(['a', 'c']), {'a': "Card payments settle in two days.", 'c': "Cloud hosting."})
+
+    def test_compressed_content_round_trip(self):
+        content = "Paiements par carte réglés en deux jours. " * 20
+        data = compress_content(content)
+        self.assertLess(len(data), len(content))
+        self.assertEqual(decompress_content(bytearray(data)), content)
+
+    def test_sections_fit_the_size_bucket(self):
+        long_paragraph = "A single, much longer paragraph about card settlement. " * 3
+        self.store.upsert_component(component('d', f"Short note.\n\n{long_paragraph}", comp_domain='Retail'))
+        results = self.store.search_sections({'domain': 'Retail', 'size': 'bullet'}, ['key'])
+        self.assertEqual([(row['key'], row['section'], row['section_size']) for row in results], [('d', 0, 11)])
+        results = self.store.search_sections({'domain': 'Retail'}, ['key'])
+        self.assertEqual([(row['key'], row['section']) for row in results], [('d', 0), ('d', 1)])
+        self.assertEqual(self.store.fetch_section('d', 1), long_paragraph.strip())
+        self.assertIsNone(self.store.fetch_section('d', 2))
+        self.assertEqual(self.store.fetch_components_by_keys(['d'], ['sections']), [{'sections': 2}])
+
+class ReadReplicaTest(unittest.TestCase):
+
+    def test_serves_a_copy(self):
+        source = MemoryGraphStore()
+        source.upsert_component(component('a'))
+        replica = ReadReplica(source, refresh_interval=3600)
+        replica.warm()
+        source.upsert_component(component('b'))
+        self.assertEqual([row['key'] for row in replica.fetch_components(['key'])], ['a'])
+        replica.refresh()
+        self.assertEqual(sorted(row['key'] for row in replica.fetch_components(['key'])), ['a', 'b'])
+
+    def test_reads_go_to_the_source_until_loaded(self):
+        loading = threading.Event()
+
+        class SlowSource(MemoryGraphStore):
+            def fetch_components(self, fields=None):
+                loading.wait(5)
+                return super().fetch_components(fields)
+
+        source = SlowSource()
+        source.upsert_component(component('a'))
+        replica = ReadReplica(source, refresh_interval=3600)
+        self.assertIs(replica.current(), source)
+        loading.set()
+        for _ in range(500):
+            if replica.current() is not source:
+                break
+            time.sleep(0.01)
+        self.assertIsNot(replica.current(), source)
+        self.assertEqual([row['key'] for row in replica.fetch_components(['key'])], ['a'])
+
+    def test_failed_load_is_retried(self):
+        class FailingSource(MemoryGraphStore):
+            failures = 1
+
+            def fetch_components(self, fields=None):
+                if FailingSource.failures:
+                    FailingSource.failures -= 1
+                    raise ConnectionError("Neo4j unavailable")
+                return super().fetch_components(fields)
+
+        replica = ReadReplica(FailingSource(), refresh_interval=3600, retry_interval=0)
+        with self.assertLogs('mrcm_graph_store', 'ERROR'):
+            replica.warm()
+        self.assertIsNone(replica._loaded_at)
+        replica.warm()
+        self.assertIsNotNone(replica._loaded_at)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import queue
+import tempfile
+import unittest
+
+import pandas as pd
+
+from mrcm_content_sources import LocalDirectorySource
+from mrcm_graph_store import MemoryGraphStore
+from mrcm_programs import load_program
+
+pipeline = load_program('prg-mrcm_n4j-ui_ingest-pipeline_v1.py')
+
+def drain(inbox):
+    items = []
+    while True:
+        item = inbox.get(timeout=5)
+        if item is pipeline.SENTINEL:
+            return items
+        items.append(item)
+
+class StageTest(unittest.TestCase):
+
+    def test_single_worker_stages_keep_the_order(self):
+        rows, doubled, counted = queue.Queue(2), queue.Queue(2), queue.Queue()
+        pipeline.Stage('double', lambda item: dict(item, n=item['n'] * 2), rows, doubled).start()
+        pipeline.Stage('count', lambda item: dict(item, n=item['n'] + 1), doubled, counted).start()
+        for n in range(20):
+            rows.put({'n': n})
+        rows.put(pipeline.SENTINEL)
+        self.assertEqual([item['n'] for item in drain(counted)], [n * 2 + 1 for n in range(20)])
+
+    def test_failures_are_counted_and_skipped(self):
+        def work(item):
+            if item['n'] % 3 == 0:
+                raise ValueError("broken")
+            return None if item['n'] == 4 else item
+
+        inbox, outbox = queue.Queue(), queue.Queue()
+        stage = pipeline.Stage('work', work, inbox, outbox, workers=4)
+        for n in range(10):
+            inbox.put({'n': n, 'comp_name': f"c{n}"})
+        inbox.put(pipeline.SENTINEL)
+        with self.assertLogs('marcom.pipeline', 'ERROR') as logs:
+            stage.start()
+            items = drain(outbox)
+            for thread in stage.threads:
+                thread.join(5)
+        self.assertEqual(sorted(item['n'] for item in items), [1, 2, 5, 7, 8])
+        self.assertEqual(stage.failed, 4)
+        self.assertEqual(len(logs.records), 4)
+        # The end marker is passed on once, after every worker stopped
+        self.assertTrue(outbox.empty())
+
+class PipelineTest(unittest.TestCase):
+
+    CONTENTS = {'Payments 0123456789abcdef0123456789abcdef.md': "Cloud payments for merchants.", 'ledger.md': "A ledger."}
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for file_name, content in self.CONTENTS.items():
+            with open(os.path.join(self.directory, file_name), 'w', encoding='utf-8') as file:
+                file.write(content)
+        self.components_csv = os.path.join(self.directory, 'components.csv')
+        pd.DataFrame([
+            {'Component Name': 'Payments', 'Domain': 'Fintech', 'About': 'Payments', 'Context': 'Product', 'Source': 'https://drive/a'},
+            {'Component Name': 'Ledger', 'Domain': 'Banking', 'About': 'Ledger', 'Context': 'Product', 'Source': 'ledger.md'},
+            {'Component Name': 'Missing', 'Domain': 'Banking', 'About': 'Ledger', 'Context': 'Product', 'Source': 'missing.md'},
+        ]).to_csv(self.components_csv, index=False)
+        self.store = MemoryGraphStore()
+        self.store.upsert_tags(['Cloud', 'Merchants'])
+
+    def run_pipeline(self, *options):
+        args = pipeline.parse_args([self.components_csv, '--source', self.directory, '--write-batch-size', '1', *options])
+        run = pipeline.Pipeline(args, self.store, LocalDirectorySource(self.directory))
+        # Tags are the words of the content instead of spaCy's noun phrases
+        run.extract = lambda item: dict(item, comp_extracted_tags=item['comp_content'].rstrip('.').lower().split())
+        with self.assertLogs('marcom.pipeline', 'ERROR'):
+            failed = run.run()
+        return run, failed
+
+    def test_components_and_relations_are_written(self):
+        run, failed = self.run_pipeline()
+        self.assertEqual((failed, run.written, run.linked), (1, 2, 2))
+        components = {row['name']: row for row in self.store.fetch_components(['name', 'key', 'size', 'tagged_taxonomy'])}
+        content = self.CONTENTS['Payments 0123456789abcdef0123456789abcdef.md']
+        self.assertEqual(components['Payments']['key'], hashlib.sha256(content.encode()).hexdigest())
+        self.assertEqual(components['Payments']['size'], len(content))
+        self.assertEqual(components['Payments']['tagged_taxonomy'], run.taxonomy.fingerprint)
+        self.assertEqual(self.store.fetch_content(components['Ledger']['key']), "A ledger.")
+        self.assertEqual(sorted(tag for _, tag in self.store.fetch_tag_links()), ['Cloud', 'Merchants'])
+
+    def test_skip_relations(self):
+        run, failed = self.run_pipeline('--skip-relations')
+        self.assertEqual((failed, run.written, run.linked), (1, 2, 0))
+
+    def test_reader_error_ends_the_run(self):
+        pd.DataFrame([{'Component Name': 'Payments', 'Domain': 'Fintech'}]).to_csv(self.components_csv, index=False)
+        with self.assertRaises(KeyError):
+            self.run_pipeline()
+        self.assertEqual(self.store.fetch_components(['key']), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from mrcm_metrics import Registry
+
+class RenderPrometheusTest(unittest.TestCase):
+
+    def test_counter(self):
+        registry = Registry()
+        requests = registry.counter('marcom_requests_total', "Requests served.", ('view',))
+        requests.inc(view='index')
+        requests.inc(2, view='say "hi"\n')
+        self.assertEqual(registry.render_prometheus(), (
+            '# HELP marcom_requests_total Requests served.\n'
+            '# TYPE marcom_requests_total counter\n'
+            'marcom_requests_total{view="index"} 1\n'
+            'marcom_requests_total{view="say \\"hi\\"\\n"} 2\n'))
+
+    def test_histogram(self):
+        registry = Registry()
+        latency = registry.histogram('marcom_latency_seconds', "Latency.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 2.0):
+            latency.observe(value)
+        lines = registry.render_prometheus().splitlines()
+        self.assertEqual(lines[1], '# TYPE marcom_latency_seconds histogram')
+        self.assertEqual(lines[2:], [
+            'marcom_latency_seconds_bucket{le="0.1"} 1',
+            'marcom_latency_seconds_bucket{le="1"} 2',
+            'marcom_latency_seconds_bucket{le="+Inf"} 3',
+            'marcom_latency_seconds_sum 2.55',
+            'marcom_latency_seconds_count 3',
+        ])
+
+    def test_stage_breakdown(self):
+        registry = Registry()
+        for stage in ('nlp_extraction', 'fetch_content', 'nlp_extraction'):
+            with registry.stage(stage):
+                pass
+        counts = {stage: count for stage, count, _ in registry.stage_breakdown()}
+        self.assertEqual(counts, {'nlp_extraction': 2, 'fetch_content': 1})
+
+if __name__ == '__main__':
+    unittest.main()
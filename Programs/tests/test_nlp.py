@@ -0,0 +1,80 @@
+import socket
+import threading
+import unittest
+from http.server import HTTPServer
+from types import SimpleNamespace
+from unittest import mock
+
+import mrcm_nlp
+from mrcm_programs import load_program
+
+daemon = load_program('prg-mrcm_nlp-daemon_v1.py')
+
+class FakeModel:
+    """
+    Stands in for the spaCy model: every capitalized word is an entity, the text is one noun chunk.
+    """
+
+    def pipe(self, texts):
+        for text in texts:
+            ents = [SimpleNamespace(text=word, label_='ORG') for word in text.split() if word.istitle()]
+            yield SimpleNamespace(ents=ents, noun_chunks=[SimpleNamespace(text=text)])
+
+class CountingHandler(daemon.AnnotateHandler):
+    annotated = 0
+
+    def do_POST(self):
+        type(self).annotated += 1
+        super().do_POST()
+
+class FailingHandler(daemon.AnnotateHandler):
+
+    def do_POST(self):
+        self.send_body(500, '{"error": "model crashed"}')
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+class AnnotateTest(unittest.TestCase):
+
+    EXPECTED = [mrcm_nlp.Doc([mrcm_nlp.Span('Cloud', 'ORG')], [mrcm_nlp.Span('Cloud payments', '')])]
+
+    def setUp(self):
+        self.addCleanup(mrcm_nlp.configure, mrcm_nlp.DAEMON_URL)
+        patch = mock.patch.object(mrcm_nlp, '_model', FakeModel())
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def start_daemon(self, handler):
+        server = HTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        mrcm_nlp.configure(f"http://127.0.0.1:{server.server_port}")
+
+    def test_falls_back_when_daemon_is_not_running(self):
+        mrcm_nlp.configure(f"http://127.0.0.1:{closed_port()}")
+        self.assertEqual(mrcm_nlp.annotate(["Cloud payments"]), self.EXPECTED)
+        self.assertFalse(mrcm_nlp.daemon_available())
+
+    def test_daemon_disabled(self):
+        mrcm_nlp.configure('')
+        self.assertEqual(mrcm_nlp.nlp("Cloud payments"), self.EXPECTED[0])
+
+    def test_uses_daemon(self):
+        self.start_daemon(CountingHandler)
+        self.assertEqual(mrcm_nlp.annotate(["Cloud payments", "ledger"]),
+                         self.EXPECTED + [mrcm_nlp.Doc([], [mrcm_nlp.Span('ledger', '')])])
+        self.assertEqual(CountingHandler.annotated, 1)
+
+    def test_falls_back_when_daemon_request_fails(self):
+        self.start_daemon(FailingHandler)
+        with self.assertLogs('mrcm_nlp', 'WARNING'):
+            self.assertEqual(mrcm_nlp.annotate(["Cloud payments"]), self.EXPECTED)
+        # The daemon is not asked again in this process
+        self.assertFalse(mrcm_nlp.daemon_available())
+
+if __name__ == '__main__':
+    unittest.main()
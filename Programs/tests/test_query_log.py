@@ -0,0 +1,82 @@
+import json
+import unittest
+from types import SimpleNamespace
+
+import mrcm_query_log
+
+def summary(available, consumed, profile=None):
+    return SimpleNamespace(result_available_after=available, result_consumed_after=consumed, profile=profile)
+
+class FakeResult:
+
+    def __init__(self, records, summary):
+        self.records = records
+        self.summary = summary
+
+    def data(self):
+        return self.records
+
+    def consume(self):
+        return self.summary
+
+class FakeRunner:
+
+    def __init__(self, result):
+        self.result = result
+        self.queries = []
+
+    def run(self, query, parameters):
+        self.queries.append((query, parameters))
+        return self.result
+
+class QueryLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(mrcm_query_log.configure, mrcm_query_log.SLOW_QUERY_MS, mrcm_query_log.PROFILE_QUERIES)
+        mrcm_query_log.configure(slow_query_ms=100, profile=False)
+
+    def test_shape_and_fingerprint_hide_values(self):
+        query = "MATCH (c:Component) WHERE c.comp_domain = 'Fintech' AND c.comp_size <= 500 RETURN c"
+        self.assertEqual(mrcm_query_log.query_shape(query), "MATCH (c:Component) WHERE c.comp_domain = ? AND c.comp_size <= ? RETURN c")
+        fingerprint = mrcm_query_log.parameters_fingerprint({'domain': 'Fintech', 'max_size': 500})
+        self.assertEqual(fingerprint, mrcm_query_log.parameters_fingerprint({'max_size': 500, 'domain': 'Fintech'}))
+        self.assertNotIn('Fintech', fingerprint)
+        self.assertEqual(mrcm_query_log.parameters_fingerprint(None), '-')
+
+    def test_entry_fields(self):
+        entry = mrcm_query_log.record_summary("MATCH (t:Tag) RETURN t", {'x': 1}, summary(3, 4), 12)
+        self.assertEqual(entry, {
+            'shape': "MATCH (t:Tag) RETURN t",
+            'parameters': mrcm_query_log.parameters_fingerprint({'x': 1}),
+            'available_after_ms': 3,
+            'consumed_after_ms': 4,
+            'rows': 12,
+        })
+
+    def test_slow_query_threshold(self):
+        with self.assertNoLogs('marcom.slowquery'):
+            mrcm_query_log.record_summary("MATCH (t:Tag) RETURN t", None, summary(60, 39), 1)
+        with self.assertLogs('marcom.slowquery', 'WARNING') as logs:
+            mrcm_query_log.record_summary("MATCH (t:Tag) RETURN t", None, summary(60, 40), 1)
+        entry = json.loads(logs.records[0].getMessage().split(' ', 2)[2])
+        self.assertEqual((entry['available_after_ms'], entry['consumed_after_ms']), (60, 40))
+
+    def test_profile(self):
+        self.assertEqual(mrcm_query_log.prepare("MATCH (c) RETURN c"), "MATCH (c) RETURN c")
+        mrcm_query_log.configure(profile=True)
+        self.assertEqual(mrcm_query_log.prepare("MATCH (c) RETURN c"), "PROFILE MATCH (c) RETURN c")
+        self.assertEqual(mrcm_query_log.prepare("CREATE INDEX IF NOT EXISTS FOR (c:Component) ON (c.comp_size)"),
+                         "CREATE INDEX IF NOT EXISTS FOR (c:Component) ON (c.comp_size)")
+
+        plan = {'operatorType': 'ProduceResults', 'dbHits': 1, 'rows': 2,
+                'children': [{'operatorType': 'NodeByLabelScan', 'dbHits': 5, 'rows': 2}]}
+        runner = FakeRunner(FakeResult([{'c': 1}, {'c': 2}], summary(1, 1, plan)))
+        with self.assertLogs('marcom.query', 'INFO') as logs:
+            records = mrcm_query_log.run_query(runner, "MATCH (c) RETURN c")
+        self.assertEqual(records, [{'c': 1}, {'c': 2}])
+        self.assertEqual(runner.queries, [("PROFILE MATCH (c) RETURN c", {})])
+        self.assertIn("NodeByLabelScan dbHits=5 rows=2", logs.output[0])
+        self.assertEqual(mrcm_query_log.plan_db_hits(plan), 6)
+
+if __name__ == '__main__':
+    unittest.main()
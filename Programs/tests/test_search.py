@@ -0,0 +1,91 @@
+import unittest
+
+from mrcm_search import TAGS_FIELD, build_component_search, build_section_search, criteria_matches, criteria_tags, criteria_to_cypher, parse_tag_criteria
+
+class ParseTagCriteriaTest(unittest.TestCase):
+
+    def test_and_binds_tighter_than_or(self):
+        expr = parse_tag_criteria("'Cloud' | 'payments' & 'banking'")
+        self.assertEqual(expr, ('or', ('tag', 'cloud'), ('and', ('tag', 'payments'), ('tag', 'banking'))))
+
+    def test_parentheses(self):
+        expr = parse_tag_criteria("('cloud' | 'payments') & 'banking'")
+        self.assertEqual(expr, ('and', ('or', ('tag', 'cloud'), ('tag', 'payments')), ('tag', 'banking')))
+        self.assertEqual(criteria_tags(expr), ['cloud', 'payments', 'banking'])
+
+    def test_malformed(self):
+        for criteria in ("cloud", "'cloud' &", "('cloud'", "'cloud' 'banking'", ""):
+            with self.subTest(criteria=criteria):
+                with self.assertRaises(ValueError):
+                    parse_tag_criteria(criteria)
+
+    def test_matches_tag_substrings(self):
+        expr = parse_tag_criteria("'cloud' & ('payments' | 'banking')")
+        self.assertTrue(criteria_matches(expr, ['cloud computing', 'open banking']))
+        self.assertFalse(criteria_matches(expr, ['cloud computing', 'retail']))
+
+    def test_cypher_is_parameterized(self):
+        parameters = {}
+        predicate = criteria_to_cypher(parse_tag_criteria("'Cloud' | 'open  banking'"), parameters)
+        self.assertEqual(predicate.count("EXISTS {"), 2)
+        self.assertIn(" OR ", predicate)
+        self.assertEqual(sorted(parameters.values()), ['cloud', 'open banking'])
+        for name in parameters:
+            self.assertIn(f"${name}", predicate)
+
+class BuildComponentSearchTest(unittest.TestCase):
+
+    def test_filters_are_parameters(self):
+        query, parameters = build_component_search({'domain': "O'Reilly", 'size': 'bullet', 'tag': ' Cloud '})
+        self.assertTrue(query.startswith("MATCH (c:Component)-[:HAS_TAG]->(t:Tag) WHERE "))
+        self.assertIn("c.comp_domain = $domain", query)
+        self.assertNotIn("O'Reilly", query)
+        self.assertEqual(parameters, {'tag': 'cloud', 'domain': "O'Reilly", 'max_size': 50})
+
+    def test_no_filters(self):
+        query, parameters = build_component_search({}, ['key'])
+        self.assertNotIn("WHERE", query)
+        self.assertTrue(query.endswith("RETURN c.comp_key AS key"))
+        self.assertEqual(parameters, {})
+
+    def test_tags_are_collected_once_per_component(self):
+        query, _ = build_component_search({'tag': 'cloud'}, ['key', TAGS_FIELD])
+        self.assertIn("WITH DISTINCT c OPTIONAL MATCH (c)-[:HAS_TAG]->(rt:Tag)", query)
+        self.assertIn("collect(DISTINCT rt.tag_name) AS tags", query)
+        self.assertTrue(query.endswith("RETURN c.comp_key AS key, tags"))
+
+    def test_ordered_search_always_has_a_key_range(self):
+        query, parameters = build_component_search({}, ordered=True, limit=10)
+        self.assertIn("c.comp_key > $after", query)
+        self.assertTrue(query.endswith("ORDER BY c.comp_key LIMIT $limit"))
+        self.assertEqual(parameters, {'after': '', 'limit': 10})
+
+        _, parameters = build_component_search({'domain': 'Fintech'}, ordered=True, after='abc', limit=10)
+        self.assertEqual(parameters, {'domain': 'Fintech', 'after': 'abc', 'limit': 10})
+
+    def test_unordered_search_has_no_key_range(self):
+        query, parameters = build_component_search({'domain': 'Fintech'}, after='abc')
+        self.assertNotIn("$after", query)
+        self.assertNotIn("ORDER BY", query)
+        self.assertEqual(parameters, {'domain': 'Fintech'})
+
+class BuildSectionSearchTest(unittest.TestCase):
+
+    def test_size_applies_to_sections(self):
+        query, parameters = build_section_search({'domain': 'Fintech', 'size': 'bullet'}, ['key'])
+        # Sections are selected by size first, then joined to their component
+        self.assertTrue(query.startswith("MATCH (s:Section) WHERE s.sec_size <= $max_size "
+                                         "MATCH (c:Component {comp_key: s.comp_key}) WHERE c.comp_domain = $domain"))
+        self.assertNotIn("c.comp_size", query)
+        self.assertTrue(query.endswith("RETURN c.comp_key AS key, s.sec_position AS section, "
+                                       "s.sec_size AS section_size, s.sec_key AS section_key"))
+        self.assertEqual(parameters, {'domain': 'Fintech', 'max_size': 50})
+
+    def test_tag_filter(self):
+        query, parameters = build_section_search({'tag': 'Cloud'}, ['key'])
+        self.assertTrue(query.startswith("MATCH (s:Section) MATCH (c:Component {comp_key: s.comp_key})-[:HAS_TAG]->(t:Tag) "
+                                         "WHERE toLower(t.tag_name) = $tag"))
+        self.assertEqual(parameters, {'tag': 'cloud'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+import mrcm_snapshot
+from mrcm_graph_store import MemoryGraphStore
+from mrcm_search import COMPONENT_FIELDS
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.source = MemoryGraphStore()
+        self.source.upsert_component({
+            'comp_key': 'a', 'comp_name': 'Payments, "cards"', 'comp_domain': 'Fintech', 'comp_about': 'Payments',
+            'comp_context': 'Product', 'comp_comment': '', 'comp_link': 'a.md', 'comp_size': 24,
+            'comp_content': "First line\n\nSecond; line|",
+        })
+        self.source.upsert_component({
+            'comp_key': 'b', 'comp_name': 'Ledger', 'comp_domain': 'Fintech', 'comp_about': None,
+            'comp_context': 'Platform', 'comp_comment': 'Reviewed', 'comp_link': 'b.md', 'comp_size': 0,
+        })
+        self.source.upsert_tags(['Cloud', 'Card Payments'])
+        self.source.replace_component_tags([('a', ['card payments', 'a | b table'], ['Card Payments'])], 'fingerprint')
+        self.directory = tempfile.mkdtemp()
+
+    def test_round_trip(self):
+        manifest = mrcm_snapshot.export_snapshot(self.source, self.directory, batch_size=1)
+        self.assertEqual((manifest['components'], manifest['tags'], manifest['has_tag']), (2, 2, 1))
+        self.assertTrue(os.path.isfile(os.path.join(self.directory, mrcm_snapshot.COMPONENTS_FILE)))
+
+        target = MemoryGraphStore()
+        self.assertEqual(mrcm_snapshot.import_snapshot(target, self.directory, batch_size=1), (2, 1))
+        fields = list(COMPONENT_FIELDS)
+        # An empty string comes back as no property, as neo4j-admin loads it
+        expected = [{field: value if value != '' else None for field, value in row.items()}
+                    for row in self.source.fetch_components(fields)]
+        self.assertEqual(target.fetch_components(fields), expected)
+        self.assertEqual(target.fetch_contents(['a', 'b']), self.source.fetch_contents(['a', 'b']))
+        self.assertEqual(target.fetch_tag_links(), [('a', 'Card Payments')])
+        self.assertEqual(sorted(target.tag_weights()), ['Card Payments', 'Cloud'])
+
+    def test_empty_fields(self):
+        mrcm_snapshot.export_snapshot(self.source, self.directory)
+        rows = {row['comp_key']: row for row in mrcm_snapshot.read_component_rows(self.directory)}
+        self.assertIsNone(rows['a']['comp_comment'])
+        self.assertIsNone(rows['b']['comp_about'])
+        self.assertIsNone(rows['b']['comp_tagged_taxonomy'])
+        self.assertIsNone(rows['b']['comp_content'])
+        self.assertIsNone(rows['b']['comp_extracted_tags'])
+        self.assertEqual(rows['a']['comp_extracted_tags'], ['card payments', 'a | b table'])
+
+    def test_array_delimiter_is_rejected_in_elements(self):
+        self.source.replace_component_tags([('b', ['ledger\tentries'], [])], 'fingerprint')
+        with self.assertRaises(ValueError):
+            mrcm_snapshot.export_snapshot(self.source, self.directory)
+
+    def test_columns_are_read_by_header(self):
+        # An older snapshot: a column since dropped, another column order, '|' arrays and no manifest
+        with mrcm_snapshot.open_csv(os.path.join(self.directory, mrcm_snapshot.COMPONENTS_FILE), 'w') as file:
+            file.write("comp_name,comp_tagged_key,comp_key:ID(Component),comp_size:int,comp_comment,comp_extracted_tags:string[]\n")
+            file.write("Ledger,b,b,7,,ledger|entries\n")
+        self.assertEqual(list(mrcm_snapshot.read_component_rows(self.directory)), [{
+            'comp_name': 'Ledger', 'comp_key': 'b', 'comp_size': 7, 'comp_comment': None, 'comp_extracted_tags': ['ledger', 'entries'],
+        }])
+
+if __name__ == '__main__':
+    unittest.main()
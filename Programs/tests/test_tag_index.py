@@ -0,0 +1,70 @@
+import threading
+import time
+import unittest
+
+from mrcm_tag_index import TagIndex, TagIndexCache, normalize_tag
+
+class TagIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TagIndex({'Cloud': 3, 'cloud computing': 7, 'Cloudflare': 1, 'CRM': 5, ' cloud ': 2})
+
+    def test_merges_normalized_names(self):
+        self.assertEqual(normalize_tag('  Open   Banking '), 'open banking')
+        self.assertEqual(len(self.index), 4)
+        self.assertIn('CLOUD', self.index)
+        self.assertNotIn('clou', self.index)
+
+    def test_suggest_heaviest_first(self):
+        self.assertEqual(self.index.suggest('clo'), [('cloud computing', 7), ('Cloud', 5), ('Cloudflare', 1)])
+        self.assertEqual(self.index.suggest('Clo', limit=2), [('cloud computing', 7), ('Cloud', 5)])
+
+    def test_prefix_without_match(self):
+        self.assertEqual(self.index.complete('zz'), [])
+        self.assertEqual(self.index.complete('crm'), ['CRM'])
+
+class TagIndexCacheTest(unittest.TestCase):
+
+    def test_rebuilds_when_signature_changes(self):
+        weights = {'cloud': 1}
+        signature = ['v1']
+        cache = TagIndexCache(lambda: dict(weights), signature=lambda: signature[0], check_interval=0)
+        cache.check()
+        self.assertEqual(cache.get().complete('c'), ['cloud'])
+
+        weights['crm'] = 2
+        cache.check()
+        self.assertEqual(cache.get().complete('c'), ['cloud'])
+        signature[0] = 'v2'
+        cache.check()
+        self.assertEqual(cache.get().complete('c'), ['crm', 'cloud'])
+
+    def test_lookups_do_not_wait_for_the_check(self):
+        checking, release = threading.Event(), threading.Event()
+        signature = ['v1']
+
+        def slow_signature():
+            checking.set()
+            release.wait(5)
+            return signature[0]
+
+        cache = TagIndexCache(lambda: {'cloud': 1, 'crm': int(signature[0] == 'v2')}, signature=slow_signature, check_interval=0)
+        release.set()
+        cache.warm()
+        release.clear()
+        checking.clear()
+        signature[0] = 'v2'
+
+        # The check runs in the background while the current index answers
+        self.assertEqual(cache.get().complete('c'), ['cloud', 'crm'])
+        self.assertTrue(checking.wait(5))
+        self.assertEqual(cache.get().suggest('cr'), [('crm', 0)])
+        release.set()
+        for _ in range(500):
+            if cache.get().suggest('cr') != [('crm', 0)]:
+                break
+            time.sleep(0.01)
+        self.assertEqual(cache.get().suggest('cr'), [('crm', 1)])
+
+if __name__ == '__main__':
+    unittest.main()
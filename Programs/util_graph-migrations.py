@@ -0,0 +1,70 @@
+import argparse
+import os
+import sys
+
+import mrcm_metrics
+from mrcm_graph_store import Neo4jGraphStore
+from mrcm_query_log import configure_logging
+
+# Neo4j connection settings
+NEO4J_URI = os.environ.get('MARCOM_NEO4J_URI', "bolt://localhost:7687")
+NEO4J_USER = "neo4j"
+NEO4J_PASSWORD = "marcomapp"
+
+def drop_tag_of(store, args):
+    """
+    Single-direction tag relations: deletes the reverse TAG_OF edges, keeping HAS_TAG.
+    """
+    with mrcm_metrics.stage('drop_tag_of'):
+        deleted = store.drop_tag_of_edges(args.batch_size)
+    print(f"Deleted {deleted} TAG_OF edges.")
+    print("The programs no longer write them unless MARCOM_TAG_OF_EDGES=1 is set.")
+
+def move_content(store, args):
+    """
+    Moves comp_content off the Component nodes into compressed Content nodes.
+    """
+    store.ensure_constraints()
+    with mrcm_metrics.stage('move_content'):
+        moved = store.move_content_to_nodes(args.batch_size)
+    print(f"Moved the content of {moved} components to Content nodes.")
+
+def split_sections(store, args):
+    """
+    Splits the content of the components stored before segmentation into Section nodes.
+    """
+    store.ensure_constraints()
+    with mrcm_metrics.stage('split_sections'):
+        split = store.split_content_into_sections(args.batch_size)
+    print(f"Split the content of {split} components into sections.")
+
+# Migration name -> (function, description, default batch size)
+MIGRATIONS = {
+    'drop-tag-of': (drop_tag_of, "Delete the reverse TAG_OF edges (readers traverse HAS_TAG in both directions).", 10000),
+    'move-content': (move_content, "Move component content into compressed Content nodes, loaded only when needed.", 500),
+    'split-sections': (split_sections, "Split component content into paragraph Section nodes for size-targeted search.", 500),
+}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Migrations of the Marcom graph. Each one runs in bounded batches and can be re-run safely.")
+    subparsers = parser.add_subparsers(dest='migration', required=True)
+    for name, (_, description, batch_size) in MIGRATIONS.items():
+        subparser = subparsers.add_parser(name, help=description, description=description)
+        subparser.add_argument('--batch-size', type=int, default=batch_size, help="Items changed per transaction.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    configure_logging()
+    args = parse_args(argv)
+
+    # Connect to Neo4j
+    store = Neo4jGraphStore(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+    try:
+        MIGRATIONS[args.migration][0](store, args)
+    finally:
+        store.close()
+        mrcm_metrics.print_stage_report()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
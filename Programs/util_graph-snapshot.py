@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import time
+
+import mrcm_metrics
+import mrcm_snapshot
+from mrcm_graph_store import Neo4jGraphStore
+from mrcm_query_log import configure_logging
+
+# Neo4j connection settings
+NEO4J_URI = os.environ.get('MARCOM_NEO4J_URI', "bolt://localhost:7687")
+NEO4J_USER = "neo4j"
+NEO4J_PASSWORD = "marcomapp"
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Exports the graph (Components with content, Tags, HAS_TAG) to a compressed CSV snapshot, "
+                    "or imports a snapshot into Neo4j. No Google Drive access or NLP is needed.",
+        epilog="Offline bulk load of an empty database: neo4j-admin database import full --array-delimiter=TAB "
+               "--multiline-fields=true --nodes=DIR/components.csv.gz --nodes=DIR/tags.csv.gz "
+               "--relationships=DIR/has_tag.csv.gz neo4j, then util_graph-migrations.py move-content.")
+    parser.add_argument('command', choices=['export', 'import'])
+    parser.add_argument('directory', help="Snapshot directory.")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Components per transaction.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    configure_logging()
+    args = parse_args(argv)
+
+    # Connect to Neo4j
+    store = Neo4jGraphStore(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+    start = time.perf_counter()
+    try:
+        if args.command == 'export':
+            manifest = mrcm_snapshot.export_snapshot(store, args.directory, args.batch_size)
+            print(f"Exported {manifest['components']} components, {manifest['tags']} tags and "
+                  f"{manifest['has_tag']} tag relations to '{args.directory}' in {time.perf_counter() - start:.1f}s.")
+        else:
+            written, relations = mrcm_snapshot.import_snapshot(store, args.directory, args.batch_size)
+            print(f"Imported {written} components and {relations} tag relations from '{args.directory}' "
+                  f"in {time.perf_counter() - start:.1f}s.")
+    finally:
+        store.close()
+        mrcm_metrics.print_stage_report()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
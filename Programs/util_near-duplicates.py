@@ -0,0 +1,91 @@
+import argparse
+import os
+import sys
+
+import mrcm_dedup
+import mrcm_metrics
+from mrcm_graph_store import Neo4jGraphStore
+from mrcm_query_log import configure_logging
+
+# Neo4j connection settings
+NEO4J_URI = os.environ.get('MARCOM_NEO4J_URI', "bolt://localhost:7687")
+NEO4J_USER = "neo4j"
+NEO4J_PASSWORD = "marcomapp"
+
+def compute_missing_signatures(store, batch_size):
+    """
+    Computes and stores the MinHash signatures of the components ingested without one.
+    Returns {comp_key: signature} for every component.
+    """
+    with mrcm_metrics.stage('fetch_signatures'):
+        signatures = store.fetch_signatures()
+        missing = [component['key'] for component in store.fetch_components(['key']) if component['key'] not in signatures]
+    for i in range(0, len(missing), batch_size):
+        with mrcm_metrics.stage('fetch_content'):
+            contents = store.fetch_contents(missing[i:i + batch_size])
+        with mrcm_metrics.stage('minhash'):
+            rows = [(comp_key, mrcm_dedup.minhash(content or '')) for comp_key, content in contents.items()]
+            rows = [(comp_key, signature) for comp_key, signature in rows if signature is not None]
+        with mrcm_metrics.stage('save_signatures'):
+            store.save_signatures(rows)
+        signatures.update(rows)
+        print(f"Computed {min(i + batch_size, len(missing))} of {len(missing)} missing signatures.")
+    return signatures
+
+def print_report(store, pairs):
+    """
+    Prints the near-duplicates grouped by component. The relations are undirected, so each one is listed under
+    the component it points to.
+    """
+    if not pairs:
+        print("No near-duplicate components found.")
+        return
+    keys = {comp_key for pair in pairs for comp_key in pair[:2]}
+    names = {component['key']: component['name'] for component in store.fetch_components_by_keys(keys, ['key', 'name'])}
+    groups = {}
+    for comp_key, original_key, score in pairs:
+        groups.setdefault(original_key, []).append((score, comp_key))
+    print(f"{len(pairs)} near-duplicate relations over {len(groups)} components:")
+    for original_key, duplicates in sorted(groups.items(), key=lambda group: names.get(group[0]) or ''):
+        print(f"'{names.get(original_key)}' ({original_key[:12]})")
+        for score, comp_key in sorted(duplicates, reverse=True):
+            print(f"    {score:.2f}  '{names.get(comp_key)}' ({comp_key[:12]})")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Finds near-duplicate components (MinHash signatures of word shingles, LSH buckets), records them as "
+                    "NEAR_DUPLICATE_OF relations and prints a report.")
+    parser.add_argument('--threshold', type=float, default=mrcm_dedup.DEFAULT_THRESHOLD,
+                        help="Estimated Jaccard similarity from which two components are near-duplicates.")
+    parser.add_argument('--batch-size', type=int, default=500, help="Components per transaction when computing missing signatures.")
+    parser.add_argument('--report-only', action='store_true', help="Print the recorded relations without recomputing them.")
+    parser.add_argument('--dry-run', action='store_true', help="Compute and print the near-duplicates without changing the relations.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    configure_logging()
+    args = parse_args(argv)
+
+    # Connect to Neo4j
+    store = Neo4jGraphStore(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+    try:
+        if args.report_only:
+            pairs = store.fetch_near_duplicates()
+        else:
+            signatures = compute_missing_signatures(store, args.batch_size)
+            with mrcm_metrics.stage('lsh_search'):
+                pairs = mrcm_dedup.find_near_duplicates(signatures, args.threshold)
+            if not args.dry_run:
+                # The relations are recomputed as a whole, so those below a raised threshold go away
+                with mrcm_metrics.stage('neo4j_write'):
+                    store.clear_near_duplicates()
+                    for i in range(0, len(pairs), args.batch_size):
+                        store.write_near_duplicates(pairs[i:i + args.batch_size])
+        print_report(store, pairs)
+    finally:
+        store.close()
+        mrcm_metrics.print_stage_report()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,14 @@
 import pandas as pd
-from neo4j import GraphDatabase
 import os
-import spacy
 import csv  # Import the csv module
 
-# Initialize the NLP model (ensure spaCy's English model is installed)
-nlp = spacy.load("en_core_web_sm")
+import mrcm_metrics
+import mrcm_nlp
+from mrcm_graph_store import Neo4jGraphStore
+from mrcm_query_log import configure_logging
 
 # Neo4j connection settings
-NEO4J_URI = "bolt://localhost:7687"
+NEO4J_URI = os.environ.get('MARCOM_NEO4J_URI', "bolt://localhost:7687")
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "marcomapp"
 
@@ -23,7 +23,8 @@ def extract_tags_from_text(text):
     Extracts meaningful tags from the text using NLP.
     This uses Named Entity Recognition (NER) and keyword extraction.
     """
-    doc = nlp(text)
+    with mrcm_metrics.stage('nlp'):
+        doc = mrcm_nlp.nlp(text)
     
     # Collect named entities as tags
     original_tags = []
@@ -51,7 +52,8 @@ def extract_tags_from_text(text):
 
     # Prepare tags for logging: Pair each original tag with its filtered version
     tag_pairs = list(zip(original_tags, filtered_tags))
-    log_tags_to_csv(tag_pairs)
+    with mrcm_metrics.stage('log_write'):
+        log_tags_to_csv(tag_pairs)
     
     return tag_pairs  # Return the list of tag pairs
 
@@ -70,14 +72,11 @@ def log_tags_to_csv(tag_pairs):
         for original_tag, filtered_tag in tag_pairs:
             writer.writerow([original_tag, filtered_tag])
 
-def fetch_components_from_neo4j(driver):
+def fetch_components_from_neo4j(store):
     """
-    Fetch all Component nodes from Neo4j.
+    Fetch all Component nodes from the graph store.
     """
-    query = "MATCH (c:Component) RETURN c.comp_name AS name, c.comp_domain AS domain, c.comp_about AS about, c.comp_context AS context, c.comp_size AS size, c.comp_content AS content, c.comp_key AS key"
-    with driver.session() as session:
-        result = session.run(query)
-        return result.data()
+    return store.fetch_components(['name', 'domain', 'about', 'context', 'size', 'key'])
 
 def prompt_user_for_processing(comp_data, process_all):
     """
@@ -94,11 +93,12 @@ def prompt_user_for_processing(comp_data, process_all):
     user_input = input("[y]es to process, [x] to exit, [s]kip to next, [A]ll: ").strip().lower()
     return user_input
 
-def process_components(driver):
+def process_components(store):
     """
     Process components for NLP filtering improvement.
     """
-    components = fetch_components_from_neo4j(driver)
+    with mrcm_metrics.stage('fetch_components'):
+        components = fetch_components_from_neo4j(store)
     process_all = False  # Flag to check if 'All' option is selected
     
     for comp_data in components:
@@ -115,7 +115,9 @@ def process_components(driver):
             process_all = True
             user_input = 'y'  # Set to 'yes' to process the current component
         elif user_input == 'y':
-            tag_pairs = extract_tags_from_text(comp_data['content'])
+            with mrcm_metrics.stage('fetch_content'):
+                content = store.fetch_content(comp_data['key'])
+            tag_pairs = extract_tags_from_text(content or '')
             print(f"\nExtracted Tags for Component '{comp_data['name']}':")
             for original_tag, filtered_tag in tag_pairs:
                 print(f"[{original_tag}, {filtered_tag}]")
@@ -123,10 +125,13 @@ def process_components(driver):
             print("Invalid input. Please enter [y], [x], [s], or [A].")
 
 if __name__ == "__main__":
+    configure_logging()
+
     # Connect to Neo4j
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    store = Neo4jGraphStore(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
     
     try:
-        process_components(driver)
+        process_components(store)
     finally:
-        driver.close()
+        store.close()
+        mrcm_metrics.print_stage_report()
@@ -12,10 +12,15 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Shared modules (mrcm_*.py) live next to the command-line Programs
+PROGRAMS_DIR = BASE_DIR.parent / 'Programs'
+sys.path.append(str(PROGRAMS_DIR))
+
 
 
 
@@ -44,6 +49,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'marcomapp.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -128,3 +134,47 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]  # Your static files direc
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Neo4j connection details. With a cluster, a neo4j:// URI (e.g. neo4j://core1:7687) spreads the searches over
+# the read replicas while writes go to the leader; bolt:// connects to a single instance.
+MARCOM_NEO4J_URI = os.environ.get('MARCOM_NEO4J_URI', "bolt://localhost:7687")
+MARCOM_NEO4J_USER = "neo4j"
+MARCOM_NEO4J_PASSWORD = "marcomapp"
+
+# Graph backend serving the web UI: 'neo4j' (query the server on every request),
+# 'replica' (in-memory copy of Neo4j reloaded every MARCOM_REPLICA_REFRESH_SECONDS) or 'memory' (empty, for tests)
+MARCOM_GRAPH_BACKEND = 'neo4j'
+MARCOM_REPLICA_REFRESH_SECONDS = 300
+
+# Tag autocomplete: seconds between background checks for taxonomy changes
+MARCOM_TAG_INDEX_CHECK_SECONDS = 30
+
+# Neo4j queries taking at least this many milliseconds go to the slow-query log
+MARCOM_SLOW_QUERY_MS = 200
+
+# Prefix every Neo4j query with PROFILE and log its db-hit plan (development only)
+MARCOM_PROFILE_QUERIES = False
+
+# Logging
+# https://docs.djangoproject.com/en/5.1/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'standard': {'format': '%(asctime)s %(levelname)s %(name)s: %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'standard'},
+        'slow_queries': {
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR / 'slow-queries.log',
+            'formatter': 'standard',
+        },
+    },
+    'loggers': {
+        'marcomapp': {'handlers': ['console'], 'level': 'INFO'},
+        'marcom.query': {'handlers': ['console'], 'level': 'INFO'},
+        'marcom.slowquery': {'handlers': ['console', 'slow_queries'], 'level': 'WARNING', 'propagate': False},
+    },
+}
@@ -1,6 +1,40 @@
+import threading
+
 from django.apps import AppConfig
 
 
 class MarcomappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'marcomapp'
+
+    def ready(self):
+        import mrcm_query_log
+        from django.conf import settings
+        from django.core.signals import request_started
+
+        mrcm_query_log.configure(settings.MARCOM_SLOW_QUERY_MS, settings.MARCOM_PROFILE_QUERIES)
+
+        # The read replica and the tag autocomplete index are loaded when the server gets its first request,
+        # not in ready(), which also runs for every manage.py command
+        self._warm_lock = threading.Lock()
+        self._warmed = False
+        request_started.connect(self.warm_caches, dispatch_uid='marcomapp.warm_caches')
+
+    def warm_caches(self, **kwargs):
+        """
+        Starts loading the read replica and the tag index in the background, once.
+        """
+        with self._warm_lock:
+            if self._warmed:
+                return
+            self._warmed = True
+        from django.core.signals import request_started
+        from . import views
+
+        request_started.disconnect(dispatch_uid='marcomapp.warm_caches')
+
+        def warm():
+            views.store.warm()
+            views.tag_index.warm()
+
+        threading.Thread(target=warm, name='marcomapp-warm', daemon=True).start()
@@ -0,0 +1,280 @@
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlencode
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+import mrcm_synth
+from mrcm_graph_store import MemoryGraphStore
+from mrcm_search import SIZE_LIMITS, TAGS_FIELD
+from mrcm_tag_index import TagIndexCache
+
+from marcomapp import views
+
+# Endpoints in report order: the index search (whole components or sections) and the content views
+ENDPOINTS = ['index', 'index_sections', 'view_component', 'view_section']
+
+def seed_store(num_components, num_tags, seed):
+    """
+    Builds an in-memory store holding a synthetic corpus (content, sections and tag relations included).
+    """
+    taxonomy = mrcm_synth.generate_taxonomy(num_tags, seed=seed)
+    components = mrcm_synth.generate_components(num_components, taxonomy, seed=seed)
+    store = MemoryGraphStore()
+    store.upsert_tags(taxonomy)
+    store.write_components([(mrcm_synth.component_properties(component), component['tags']) for component in components])
+    return store
+
+def search_path(rng, tags, sections=False):
+    """
+    Returns the index URL of a random filter combination, as the search form submits it.
+    """
+    parameters = {'search': ''}
+    for name, values in (('comp_domain', mrcm_synth.DOMAINS), ('comp_about', mrcm_synth.ABOUTS), ('comp_context', mrcm_synth.CONTEXTS)):
+        if rng.random() < 0.5:
+            parameters[name] = rng.choice(values)
+    size = rng.choice(list(SIZE_LIMITS)) if sections else rng.choice([None] + list(SIZE_LIMITS))
+    if size:
+        parameters['comp_size'] = size
+    if tags and rng.random() < 0.3:
+        parameters['tag'] = rng.choice(tags)
+    if sections:
+        parameters['sections'] = '1'
+    return reverse('index') + '?' + urlencode(parameters)
+
+def generate_requests(components, num_requests, view_ratio, sections_ratio, seed):
+    """
+    Generates the replayed workload: (endpoint, path) pairs mixing searches and component views.
+    `components` are sampled rows with key, sections and tags.
+    """
+    rng = random.Random(seed)
+    tags = sorted({tag_name for component in components for tag_name in component.get(TAGS_FIELD) or ()})
+    requests = []
+    for _ in range(num_requests):
+        draw = rng.random()
+        if components and draw < view_ratio:
+            component = rng.choice(components)
+            if component.get('sections') and rng.random() < 0.5:
+                requests.append(('view_section', reverse('view_section', args=[component['key'], rng.randrange(component['sections'])])))
+            else:
+                requests.append(('view_component', reverse('view_component', args=[component['key']])))
+        elif draw < view_ratio + sections_ratio:
+            requests.append(('index_sections', search_path(rng, tags, sections=True)))
+        else:
+            requests.append(('index', search_path(rng, tags)))
+    return requests
+
+def summarize(latencies, errors, wall_seconds):
+    """
+    Summarizes one endpoint's latencies (seconds) and error count over the run's wall-clock time.
+    """
+    if not latencies:
+        return {'count': 0}
+    ordered = sorted(latencies)
+    percentile = lambda p: ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+    return {
+        'count': len(ordered),
+        'errors': errors,
+        'error_rate': round(errors / len(ordered), 4),
+        'requests_per_s': round(len(ordered) / wall_seconds, 2) if wall_seconds else None,
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p50_ms': round(percentile(0.50) * 1000, 3),
+        'p95_ms': round(percentile(0.95) * 1000, 3),
+        'p99_ms': round(percentile(0.99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+class Command(BaseCommand):
+    help = ("Replays a mix of index searches and component views at a given concurrency and reports throughput, "
+            "p50/p95/p99 latency and error rate per endpoint. By default the requests run in-process (Django test "
+            "client) against a seeded synthetic corpus; --dataset existing uses the configured graph backend, and "
+            "--url sends them to a running server.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', choices=['synthetic', 'existing'], default='synthetic',
+                            help="Serve a seeded in-memory corpus, or the data of the configured MARCOM_GRAPH_BACKEND.")
+        parser.add_argument('--url', help="Base URL of a running server (e.g. http://127.0.0.1:8000) to load over HTTP; "
+                                          "components are sampled from its /api/components.")
+        parser.add_argument('--components', type=int, default=2000, help="Synthetic components to seed.")
+        parser.add_argument('--tags', type=int, default=200, help="Synthetic taxonomy tags to seed.")
+        parser.add_argument('--sample', type=int, default=500, help="Components whose views are requested.")
+        parser.add_argument('--requests', type=int, default=2000, help="Requests to replay (after the warm-up).")
+        parser.add_argument('--warmup', type=int, default=50, help="Requests sent first and left out of the statistics.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Concurrent clients.")
+        parser.add_argument('--view-ratio', type=float, default=0.3, help="Share of component and section views.")
+        parser.add_argument('--sections-ratio', type=float, default=0.1, help="Share of section searches.")
+        parser.add_argument('--timeout', type=float, default=30, help="HTTP request timeout in seconds (--url).")
+        parser.add_argument('--seed', type=int, default=42, help="Seed of the corpus and of the request mix.")
+        parser.add_argument('--output', help="Write the results as JSON to this file.")
+        parser.add_argument('--baseline', help="Compare with a previous JSON results file; fails on regressions.")
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help="Allowed p95 increase or throughput decrease per endpoint (0.2 = 20%%).")
+
+    def handle(self, *args, **options):
+        original_store, original_tag_index = views.store, views.tag_index
+        app_config = apps.get_app_config('marcomapp')
+        original_warmed = app_config._warmed
+        try:
+            if options['url']:
+                components = self.sample_over_http(options)
+                fetch = self.http_fetcher(options['url'].rstrip('/'), options['timeout'])
+            else:
+                if options['dataset'] == 'synthetic':
+                    self.stdout.write(f"Seeding {options['components']} synthetic components...")
+                    views.store = seed_store(options['components'], options['tags'], options['seed'])
+                    views.tag_index = TagIndexCache(views.store.tag_weights, signature=views.store.taxonomy_signature)
+                    views.tag_index.warm()
+                    # Both caches serve the seeded corpus: the first request must not warm the configured backend
+                    app_config._warmed = True
+                components = views.store.fetch_components(['key', 'sections', TAGS_FIELD])
+                fetch = self.client_fetcher()
+            components = random.Random(options['seed']).sample(components, min(options['sample'], len(components)))
+
+            requests = generate_requests(components, options['warmup'] + options['requests'],
+                                         options['view_ratio'], options['sections_ratio'], options['seed'])
+            self.stdout.write(f"Replaying {options['requests']} requests with {options['concurrency']} concurrent clients...")
+            self.run_requests(requests[:options['warmup']], options['concurrency'], fetch)
+            samples, wall_seconds = self.run_requests(requests[options['warmup']:], options['concurrency'], fetch)
+        finally:
+            views.store, views.tag_index = original_store, original_tag_index
+            app_config._warmed = original_warmed
+
+        results = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'target': options['url'] or 'in-process',
+                'dataset': 'existing' if options['url'] else options['dataset'],
+                'components': options['components'] if not options['url'] and options['dataset'] == 'synthetic' else None,
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'seed': options['seed'],
+                'wall_s': round(wall_seconds, 3),
+            },
+            'endpoints': {endpoint: summarize(latencies, errors, wall_seconds) for endpoint, (latencies, errors) in samples.items()},
+        }
+        all_latencies = [latency for latencies, _ in samples.values() for latency in latencies]
+        results['endpoints']['all'] = summarize(all_latencies, sum(errors for _, errors in samples.values()), wall_seconds)
+        self.print_results(results)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                json.dump(results, output_file, indent=2)
+            self.stdout.write(f"\nResults written to '{options['output']}'.")
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as baseline_file:
+                baseline = json.load(baseline_file)
+            regressions = self.compare_results(results, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError(f"Regressions detected in: {', '.join(regressions)}")
+
+    def client_fetcher(self):
+        """
+        Returns a function requesting a path in-process (full middleware, view and template rendering)
+        and returning the status code. Each worker thread gets its own test client.
+        """
+        local = threading.local()
+
+        def fetch(path):
+            if not hasattr(local, 'client'):
+                local.client = Client(raise_request_exception=False, HTTP_HOST='localhost')
+            return local.client.get(path).status_code
+
+        return fetch
+
+    def http_fetcher(self, base_url, timeout):
+        """
+        Returns a function requesting a path from a running server and returning the status code.
+        """
+        def fetch(path):
+            try:
+                with urllib.request.urlopen(base_url + path, timeout=timeout) as response:
+                    response.read()
+                    return response.status
+            except urllib.error.HTTPError as e:
+                return e.code
+
+        return fetch
+
+    def sample_over_http(self, options):
+        """
+        Reads the components to view (key, sections, tags) from the server's /api/components stream.
+        """
+        url = f"{options['url'].rstrip('/')}{reverse('api_components')}?" + urlencode({'fields': 'key,sections,tags', 'limit': options['sample']})
+        try:
+            with urllib.request.urlopen(url, timeout=options['timeout']) as response:
+                return [json.loads(line) for line in response if line.strip()]
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read components from '{url}': {e}")
+
+    def run_requests(self, requests, concurrency, fetch):
+        """
+        Sends the requests from `concurrency` threads. Returns {endpoint: (latencies, errors)} and the wall-clock time.
+        A status of 400 or more, or an exception, counts as an error.
+        """
+        samples = {endpoint: ([], 0) for endpoint in ENDPOINTS}
+        lock = threading.Lock()
+
+        def send(request):
+            endpoint, path = request
+            start = time.perf_counter()
+            try:
+                failed = fetch(path) >= 400
+            except Exception:
+                failed = True
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies, errors = samples[endpoint]
+                latencies.append(elapsed)
+                samples[endpoint] = (latencies, errors + failed)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(send, requests))
+        return samples, time.perf_counter() - start
+
+    def print_results(self, results):
+        """
+        Prints the per-endpoint statistics of a run.
+        """
+        self.stdout.write(f"\n{'Endpoint':<16}{'Count':>8}{'Req/s':>10}{'Errors':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'Max ms':>10}")
+        for endpoint in ENDPOINTS + ['all']:
+            stats = results['endpoints'][endpoint]
+            if not stats.get('count'):
+                self.stdout.write(f"{endpoint:<16}{0:>8}")
+                continue
+            self.stdout.write(f"{endpoint:<16}{stats['count']:>8}{stats['requests_per_s'] or 0:>10.1f}{stats['error_rate']:>9.1%}"
+                              f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+
+    def compare_results(self, current, baseline, tolerance):
+        """
+        Compares each endpoint's p95 latency, throughput and error rate with a baseline run and returns the regressed endpoints.
+        """
+        regressions = []
+        self.stdout.write(f"\n{'Endpoint':<16}{'Base p95':>10}{'p95':>10}{'Change':>9}{'Base req/s':>12}{'Req/s':>10}{'Change':>9}")
+        for endpoint in ENDPOINTS + ['all']:
+            old = baseline.get('endpoints', {}).get(endpoint, {})
+            new = current['endpoints'].get(endpoint, {})
+            if not old.get('count') or not new.get('count'):
+                self.stdout.write(f"{endpoint:<16}{'n/a':>10}")
+                continue
+            latency_change = (new['p95_ms'] - old['p95_ms']) / old['p95_ms'] if old['p95_ms'] else 0.0
+            throughput_change = ((new['requests_per_s'] - old['requests_per_s']) / old['requests_per_s']
+                                 if old['requests_per_s'] else 0.0)
+            flag = ''
+            if latency_change > tolerance or throughput_change < -tolerance or new['error_rate'] > old['error_rate']:
+                regressions.append(endpoint)
+                flag = '  REGRESSION'
+            self.stdout.write(f"{endpoint:<16}{old['p95_ms']:>10.2f}{new['p95_ms']:>10.2f}{latency_change:>+9.1%}"
+                              f"{old['requests_per_s']:>12.1f}{new['requests_per_s']:>10.1f}{throughput_change:>+9.1%}{flag}")
+        return regressions
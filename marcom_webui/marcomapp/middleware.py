@@ -0,0 +1,24 @@
+import time
+
+import mrcm_metrics
+
+class MetricsMiddleware:
+    """
+    Records the count and latency of every request, labelled with the view name and status code.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.requests = mrcm_metrics.counter('marcom_http_requests_total', "HTTP requests served.", ('view', 'status'))
+        self.latency = mrcm_metrics.histogram('marcom_http_request_seconds', "HTTP request latency.", ('view',))
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match and match.url_name else 'unmatched'
+        self.requests.inc(view=view, status=response.status_code)
+        self.latency.observe(elapsed, view=view)
+        return response
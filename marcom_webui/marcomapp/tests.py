@@ -1,3 +1,165 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from mrcm_graph_store import MemoryGraphStore
+from mrcm_tag_index import TagIndexCache
+
+from . import views
+
+
+def setUpModule():
+    # Keep the first request from loading the configured store's caches (see WarmCachesTest)
+    apps.get_app_config('marcomapp')._warmed = True
+
+
+class TagAutocompleteTest(SimpleTestCase):
+    """
+    The autocomplete endpoint against an in-memory taxonomy instead of Neo4j.
+    """
+
+    def setUp(self):
+        weights = {'Cloud': 4, 'Card Payments': 1, 'Cards': 0}
+        cache = TagIndexCache(lambda: weights)
+        cache.warm()
+        patch = mock.patch.object(views, 'tag_index', cache)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_suggestions_heaviest_first(self):
+        response = self.client.get('/api/tags/autocomplete/', {'q': 'ca'})
+        self.assertEqual(response.json(), {
+            'query': 'ca',
+            'suggestions': [{'tag': 'Card Payments', 'weight': 1}, {'tag': 'Cards', 'weight': 0}],
+        })
+
+    def test_empty_prefix(self):
+        response = self.client.get('/api/tags/autocomplete/', {'q': ' '})
+        self.assertEqual(response.json()['suggestions'], [])
+
+
+class SearchViewTest(SimpleTestCase):
+    """
+    The index search against a MemoryGraphStore instead of Neo4j.
+    """
+
+    def setUp(self):
+        store = MemoryGraphStore()
+        for comp_key, name, domain in (('a', 'Card payments', 'Fintech'), ('b', 'Ledger', 'Banking')):
+            store.upsert_component({
+                'comp_key': comp_key, 'comp_name': name, 'comp_domain': domain, 'comp_about': 'Payments',
+                'comp_context': 'Product', 'comp_size': 10, 'comp_content': "Some content.",
+            })
+        patch = mock.patch.object(views, 'store', store)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_search(self):
+        response = self.client.get('/', {'search': '1', 'comp_domain': 'Fintech'})
+        self.assertContains(response, 'Card payments')
+        self.assertNotContains(response, 'Ledger')
+
+    def test_sections(self):
+        views.store.upsert_component({
+            'comp_key': 'c', 'comp_name': 'Refunds', 'comp_domain': 'Retail', 'comp_about': 'Payments',
+            'comp_context': 'Product', 'comp_size': 29, 'comp_content': "Refunds.\n\nRefunds reverse a settlement.",
+        })
+        response = self.client.get('/', {'search': '1', 'sections': '1', 'comp_domain': 'Retail', 'comp_size': 'bullet'})
+        self.assertContains(response, '/view/c/1/')
+        response = self.client.get('/view/c/1/')
+        self.assertContains(response, "Refunds reverse a settlement.")
+        self.assertNotContains(response, "Refunds.\n")
+
+    def test_no_search_before_submit(self):
+        response = self.client.get('/', {'comp_domain': 'Fintech'})
+        self.assertNotContains(response, 'Card payments')
+
+
+class ComponentsApiTest(SimpleTestCase):
+    """
+    The NDJSON component API against a MemoryGraphStore instead of Neo4j.
+    """
+
+    def setUp(self):
+        store = MemoryGraphStore()
+        for comp_key, domain in (('c', 'Fintech'), ('a', 'Fintech'), ('b', 'Banking')):
+            store.upsert_component({
+                'comp_key': comp_key, 'comp_name': f"Component {comp_key}", 'comp_domain': domain, 'comp_about': 'Payments',
+                'comp_context': 'Product', 'comp_size': 10, 'comp_content': "Some content.",
+            })
+        patch = mock.patch.object(views, 'store', store)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def stream_lines(self, response):
+        return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_pages_with_cursor(self):
+        response = self.client.get('/api/components', {'comp_domain': 'Fintech', 'fields': 'name', 'limit': 1})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(self.stream_lines(response), [{'key': 'a', 'name': 'Component a'}])
+
+        response = self.client.get('/api/components', {'comp_domain': 'Fintech', 'fields': 'name', 'cursor': 'a'})
+        self.assertEqual(self.stream_lines(response), [{'key': 'c', 'name': 'Component c'}])
+
+    def test_rejects_unknown_fields_and_bad_limits(self):
+        self.assertEqual(self.client.get('/api/components', {'fields': 'key,password'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/components', {'limit': 'ten'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/components', {'limit': '0'}).status_code, 400)
+
+
+class MetricsViewTest(SimpleTestCase):
+
+    def test_requests_are_counted(self):
+        with mock.patch.object(views, 'tag_index', TagIndexCache(lambda: {})):
+            self.client.get('/api/tags/autocomplete/', {'q': 'cl'})
+        response = self.client.get('/metrics')
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'# TYPE marcom_http_request_seconds histogram', response.content)
+        self.assertIn(b'marcom_http_requests_total{view="tag_autocomplete",status="200"}', response.content)
+
+
+class WarmCachesTest(SimpleTestCase):
+
+    def test_caches_are_loaded_once(self):
+        config = apps.get_app_config('marcomapp')
+        loaded = threading.Event()
+        store = mock.Mock()
+        tag_index = mock.Mock(**{'warm.side_effect': loaded.set})
+        with mock.patch.object(views, 'store', store), mock.patch.object(views, 'tag_index', tag_index), \
+                mock.patch.object(config, '_warmed', False):
+            config.warm_caches()
+            config.warm_caches()
+            self.assertTrue(loaded.wait(5))
+        store.warm.assert_called_once_with()
+        tag_index.warm.assert_called_once_with()
+
+
+# The command's in-process client sends Host: localhost, which DEBUG allows outside tests
+@override_settings(ALLOWED_HOSTS=['localhost'])
+class LoadtestCommandTest(SimpleTestCase):
+
+    def test_synthetic_run_leaves_the_configured_caches_alone(self):
+        config = apps.get_app_config('marcomapp')
+        store, tag_index = mock.Mock(), mock.Mock()
+        path = os.path.join(tempfile.mkdtemp(), 'results.json')
+        with mock.patch.object(views, 'store', store), mock.patch.object(views, 'tag_index', tag_index), \
+                mock.patch.object(config, '_warmed', False):
+            call_command('loadtest', components=50, tags=20, sample=20, requests=60, warmup=5, concurrency=2,
+                         view_ratio=0.5, sections_ratio=0.3, output=path, stdout=io.StringIO())
+            self.assertFalse(config._warmed)
+            self.assertIs(views.store, store)
+            self.assertIs(views.tag_index, tag_index)
+        store.warm.assert_not_called()
+        tag_index.warm.assert_not_called()
+        with open(path, encoding='utf-8') as results_file:
+            endpoints = json.load(results_file)['endpoints']
+        self.assertEqual(endpoints['all']['errors'], 0)
+        self.assertGreater(endpoints['view_section']['count'], 0)
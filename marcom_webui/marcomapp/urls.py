@@ -4,4 +4,8 @@ from . import views
 urlpatterns = [
     path('', views.index, name='index'),
     path('view/<str:comp_key>/', views.view_component, name='view_component'),
+    path('view/<str:comp_key>/<int:section>/', views.view_component, name='view_section'),
+    path('api/components', views.api_components, name='api_components'),
+    path('api/tags/autocomplete/', views.tag_autocomplete, name='tag_autocomplete'),
+    path('metrics', views.metrics, name='metrics'),
 ]
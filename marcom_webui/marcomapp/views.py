@@ -1,13 +1,44 @@
-from django.shortcuts import render
-from neo4j import GraphDatabase
+import json
+import logging
 
-# Define Neo4j connection details
-NEO4J_URI = "bolt://localhost:7687"
-NEO4J_USER = "neo4j"
-NEO4J_PASSWORD = "marcomapp"
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render
 
-# Initialize Neo4j driver
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+import mrcm_metrics
+from mrcm_graph_store import open_graph_store
+from mrcm_search import COMPONENT_FIELDS, LIST_FIELDS, TAGS_FIELD
+from mrcm_tag_index import TagIndexCache
+
+logger = logging.getLogger(__name__)
+
+# Initialize the graph store (see MARCOM_GRAPH_BACKEND in settings)
+store = open_graph_store(
+    settings.MARCOM_GRAPH_BACKEND,
+    settings.MARCOM_NEO4J_URI,
+    settings.MARCOM_NEO4J_USER,
+    settings.MARCOM_NEO4J_PASSWORD,
+    refresh_interval=settings.MARCOM_REPLICA_REFRESH_SECONDS,
+)
+
+# In-memory tag index for autocomplete, loaded when the first request starts (see MarcomappConfig.ready)
+tag_index = TagIndexCache(
+    store.tag_weights,
+    signature=store.taxonomy_signature,
+    check_interval=settings.MARCOM_TAG_INDEX_CHECK_SECONDS,
+)
+
+def search_filters(request):
+    """
+    Returns the search filters of a request (the index form parameters).
+    """
+    return {
+        'domain': request.GET.get('comp_domain'),
+        'about': request.GET.get('comp_about'),
+        'context': request.GET.get('comp_context'),
+        'size': request.GET.get('comp_size'),
+        'tag': request.GET.get('tag', '').strip(),
+    }
 
 def index(request):
     """
@@ -15,75 +46,108 @@ def index(request):
     """
     components = []  # Initialize an empty list to store the results
 
-    print("Index view called.")  # Debugging line
-
     # Check if the request is a search request (i.e., triggered by the 'Search' button)
     if 'search' in request.GET:  # 'search' is the name of the search button in the HTML form
-        print("Search button clicked.")  # Debugging line
-        domain = request.GET.get('comp_domain')
-        about = request.GET.get('comp_about')
-        context = request.GET.get('comp_context')
-        size = request.GET.get('comp_size')
-
-        print(f"Search parameters - Domain: {domain}, About: {about}, Context: {context}, Size: {size}")  # Debugging line
-
-        # Start constructing the Cypher query
-        query = "MATCH (c:Component) "
-        conditions = []
-
-        # Add conditions based on selected filters
-        if domain:
-            conditions.append(f"c.comp_domain = '{domain}'")
-        if about:
-            conditions.append(f"c.comp_about = '{about}'")
-        if context:
-            conditions.append(f"c.comp_context = '{context}'")
-        if size:
-            if size == "bullet":
-                conditions.append("c.comp_size <= 50")
-            elif size == "summary":
-                conditions.append("c.comp_size <= 500")
-            elif size == "description":
-                conditions.append("c.comp_size <= 1000")
-            elif size == "overview":
-                conditions.append("c.comp_size <= 3000")
-
-        # If conditions exist, append them to the query
-        if conditions:
-            query += "WHERE " + " AND ".join(conditions)
-
-        # Complete the query
-        query += " RETURN c.comp_name AS name, c.comp_domain AS domain, c.comp_about AS about, c.comp_context AS context, c.comp_size AS size, c.comp_key AS key"
-
-        print(f"Cypher query: {query}")  # Debugging line
+        filters = search_filters(request)
+        logger.debug("Search parameters: %s", filters)
 
         try:
-            # Execute the query
-            with driver.session() as session:
-                components = session.run(query).data()
-                print(f"Query results: {components}")  # Debugging line
+            # Execute the search: whole components, or with 'sections' the paragraphs fitting the size filter
+            with mrcm_metrics.stage('index.search'):
+                if request.GET.get('sections'):
+                    components = store.search_sections(filters)
+                else:
+                    components = store.search_components(filters)
+            logger.debug("Search returned %d results", len(components))
         except Exception as e:
-            print(f"Error executing query: {e}")
+            logger.exception("Error executing query: %s", e)
 
     # Render the template with the results
-    return render(request, 'marcomapp/index.html', {'components': components})
+    with mrcm_metrics.stage('index.render'):
+        return render(request, 'marcomapp/index.html', {'components': components})
 
-def view_component(request, comp_key):
+def view_component(request, comp_key, section=None):
     """
-    View to display the content of a specific component.
+    View to display the content of a specific component, or only one of its sections.
     """
     content = "Component not found."  # Default message if component is not found
 
     try:
-        with driver.session() as session:
-            # Fetch the component content using the comp_key
-            query = "MATCH (c:Component {comp_key: $comp_key}) RETURN c.comp_content AS content"
-            result = session.run(query, comp_key=comp_key).single()
-            
-            if result and result.get("content"):
-                content = result["content"]
+        # Fetch the component content (or the section's text) using the comp_key
+        with mrcm_metrics.stage('view_component.fetch'):
+            if section is None:
+                stored_content = store.fetch_content(comp_key)
+            else:
+                stored_content = store.fetch_section(comp_key, section)
+
+        if stored_content:
+            content = stored_content
 
     except Exception as e:
-        print(f"Error fetching component content: {e}")
+        logger.exception("Error fetching component content: %s", e)
+
+    with mrcm_metrics.stage('view_component.render'):
+        return render(request, 'marcomapp/view_component.html', {'content': content})
+
+def api_components(request):
+    """
+    Stream the components matching the index filters as NDJSON, one object per line, in comp_key order.
+    'fields' selects the fields (comma-separated, 'key' always included), 'cursor' resumes after a comp_key
+    and 'limit' caps the number of components. Records are written as Neo4j delivers them.
+    """
+    fields = [field.strip() for field in request.GET.get('fields', ','.join(LIST_FIELDS)).split(',') if field.strip()]
+    unknown = [field for field in fields if field not in COMPONENT_FIELDS and field != TAGS_FIELD]
+    if unknown:
+        return JsonResponse({'error': f"Unknown fields: {', '.join(unknown)}"}, status=400)
+    if 'key' not in fields:
+        fields.insert(0, 'key')
+    try:
+        limit = int(request.GET['limit']) if request.GET.get('limit') else None
+    except ValueError:
+        return JsonResponse({'error': "limit must be an integer"}, status=400)
+    if limit is not None and limit < 1:
+        return JsonResponse({'error': "limit must be positive"}, status=400)
+
+    records = store.iter_components(search_filters(request), fields, after=request.GET.get('cursor') or None, limit=limit)
 
-    return render(request, 'marcomapp/view_component.html', {'content': content})
+    def stream():
+        sent = 0
+        try:
+            for record in records:
+                sent += 1
+                yield json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        except Exception as e:
+            # The status is already sent: the client sees a truncated stream and resumes from its last key
+            logger.exception("Error streaming components: %s", e)
+        finally:
+            # Releases the Neo4j session when the client disconnects early
+            records.close()
+            mrcm_metrics.counter('marcom_api_components_streamed_total', "Components streamed by /api/components.").inc(sent)
+
+    return StreamingHttpResponse(stream(), content_type='application/x-ndjson')
+
+def tag_autocomplete(request):
+    """
+    Return the best-weighted tag names starting with the 'q' prefix, served from the in-memory tag index.
+    """
+    prefix = request.GET.get('q', '').strip()
+    try:
+        limit = min(int(request.GET.get('limit', 10)), 50)
+    except ValueError:
+        limit = 10
+
+    suggestions = []
+    if prefix:
+        with mrcm_metrics.stage('tag_autocomplete.lookup'):
+            suggestions = [
+                {'tag': tag_name, 'weight': weight}
+                for tag_name, weight in tag_index.get().suggest(prefix, limit)
+            ]
+
+    return JsonResponse({'query': prefix, 'suggestions': suggestions})
+
+def metrics(request):
+    """
+    Expose the process metrics (request counts and latencies, stage timers, Neo4j query times) in Prometheus text format.
+    """
+    return HttpResponse(mrcm_metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -16,3 +16,35 @@ function copyToClipboard() {
     }
   );
 }
+
+// Tag autocomplete: fill the datalist from the server-side tag index as the user types
+const tagInput = document.querySelector("input[data-autocomplete-url]");
+if (tagInput) {
+  const datalist = document.getElementById(tagInput.getAttribute("list"));
+  let pending = null;
+  tagInput.addEventListener("input", function () {
+    const prefix = tagInput.value.trim();
+    if (pending) {
+      pending.abort();
+    }
+    if (!prefix) {
+      datalist.innerHTML = "";
+      return;
+    }
+    pending = new AbortController();
+    const url =
+      tagInput.dataset.autocompleteUrl + "?q=" + encodeURIComponent(prefix);
+    fetch(url, { signal: pending.signal })
+      .then((response) => response.json())
+      .then((data) => {
+        datalist.innerHTML = "";
+        data.suggestions.forEach(function (suggestion) {
+          const option = document.createElement("option");
+          option.value = suggestion.tag;
+          option.label = suggestion.tag + " (" + suggestion.weight + ")";
+          datalist.appendChild(option);
+        });
+      })
+      .catch(function () {});
+  });
+}